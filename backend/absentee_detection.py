@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+"""
+Absentee Detection for Cheick Mohamed School
+Diffs the active student roster against the students seen each day and emits
+absent and late lists per institution and class. Designed to run every few
+minutes across all tenants against school.db.
+"""
+
+import argparse
+import csv
+import json
+import logging
+import os
+import sqlite3
+import sys
+import time
+from array import array
+from datetime import datetime
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(SCRIPT_DIR)
+DEFAULT_DB_PATH = os.path.join(PROJECT_ROOT, 'database', 'school.db')
+
+LATE_AFTER = '08:00:00'   # first sighting after this is late
+ABSENT_CUTOFF = '09:00:00'  # not seen by this time is absent
+UNASSIGNED_CLASS = 'Unassigned'
+NOT_SEEN = -1
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+
+def time_to_seconds(value):
+    """'HH:MM[:SS]' -> seconds since midnight"""
+    parts = value.split(':')
+    return int(parts[0]) * 3600 + int(parts[1]) * 60 + (int(parts[2]) if len(parts) > 2 else 0)
+
+
+def seconds_to_time(seconds):
+    return f'{seconds // 3600:02d}:{seconds % 3600 // 60:02d}:{seconds % 60:02d}'
+
+
+class RosterIndex:
+    """Active students sorted by (institution, class) with an ID -> slot index"""
+
+    FINGERPRINT_QUERY = "SELECT COUNT(*), SUM(status = 'active'), MAX(updated_at), MAX(rowid) FROM students"
+
+    def __init__(self):
+        self.ids = []
+        self.names = []
+        self.slot = {}
+        self.groups = []  # (institution_id, class, start, end) ranges over the slots
+        self.fingerprint = None
+
+    def __len__(self):
+        return len(self.ids)
+
+    def refresh(self, conn, institution_id=None):
+        """Reload the roster only if the students table changed; returns True if reloaded"""
+        fingerprint = conn.execute(self.FINGERPRINT_QUERY).fetchone() + (institution_id,)
+        if fingerprint == self.fingerprint:
+            return False
+
+        query = "SELECT id, name, class, institution_id FROM students WHERE status = 'active'"
+        params = []
+        if institution_id is not None:
+            query += ' AND institution_id = ?'
+            params.append(institution_id)
+        query += " ORDER BY institution_id, COALESCE(NULLIF(class, ''), ?), id"
+        params.append(UNASSIGNED_CLASS)
+
+        ids, names, slot, groups = [], [], {}, []
+        current = None
+        for student_id, name, class_name, inst in conn.execute(query, params):
+            key = (inst, class_name or UNASSIGNED_CLASS)
+            if key != current:
+                if groups:
+                    groups[-1][3] = len(ids)
+                groups.append([key[0], key[1], len(ids), None])
+                current = key
+            slot[str(student_id)] = len(ids)
+            ids.append(str(student_id))
+            names.append(name)
+        if groups:
+            groups[-1][3] = len(ids)
+
+        self.ids, self.names, self.slot = ids, names, slot
+        self.groups = [tuple(g) for g in groups]
+        self.fingerprint = fingerprint
+        logger.info(f"Roster loaded: {len(ids)} active students in {len(groups)} classes")
+        return True
+
+
+def has_table(conn, table):
+    return conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (table,)).fetchone() is not None
+
+
+def seen_from_db(conn, day):
+    """(student_id, first_in) for the day from the attendance_daily rollup (one row per institution)"""
+    return conn.execute('SELECT student_id, MIN(first_in) FROM attendance_daily WHERE date = ? GROUP BY student_id',
+                        (day,))
+
+
+def seen_from_csv(path, day):
+    """(student_id, first_in) for the day from a Pattendance_log.csv export"""
+    first_in = {}
+    with open(path, 'r', newline='', encoding='utf-8') as f:
+        for row in csv.DictReader(f):
+            if row.get('Date') != day:
+                continue
+            student_id = row['ID'].strip()
+            seen = first_in.get(student_id)
+            if seen is None or row['Time'] < seen:
+                first_in[student_id] = row['Time']
+    return first_in.items()
+
+
+def detect_absentees(roster, seen, late_after=LATE_AFTER, cutoff=ABSENT_CUTOFF):
+    """Diff the roster against (student_id, first_in) sightings.
+
+    Returns {institution_id: {class: {present, absent, late}}}. Students first
+    seen after the cutoff count as absent; after late_after as late.
+    """
+    late_seconds = time_to_seconds(late_after)
+    cutoff_seconds = time_to_seconds(cutoff)
+    first_in = array('i', [NOT_SEEN]) * len(roster)
+    unknown = 0
+
+    slot = roster.slot
+    for student_id, first_time in seen:
+        index = slot.get(str(student_id))
+        if index is None:
+            unknown += 1
+            continue
+        seconds = time_to_seconds(first_time)
+        if seconds <= cutoff_seconds:
+            first_in[index] = seconds
+
+    report = {}
+    for inst, class_name, start, end in roster.groups:
+        absent, late = [], []
+        for index in range(start, end):
+            seconds = first_in[index]
+            if seconds == NOT_SEEN:
+                absent.append({'student_id': roster.ids[index], 'name': roster.names[index]})
+            elif seconds > late_seconds:
+                late.append({
+                    'student_id': roster.ids[index],
+                    'name': roster.names[index],
+                    'first_in': seconds_to_time(seconds),
+                    'minutes_late': (seconds - late_seconds) // 60
+                })
+        report.setdefault(str(inst), {})[class_name] = {
+            'enrolled': end - start,
+            'present': end - start - len(absent),
+            'absent': absent,
+            'late': late
+        }
+    return report, unknown
+
+
+def run_once(conn, roster, args):
+    started = time.perf_counter()
+    roster.refresh(conn, args.institution)
+    roster_seconds = time.perf_counter() - started
+
+    day = args.date or datetime.now().strftime('%Y-%m-%d')
+    seen = seen_from_csv(args.csv, day) if args.csv else seen_from_db(conn, day)
+    classes, unknown = detect_absentees(roster, seen, args.late_after, args.cutoff)
+    elapsed = time.perf_counter() - started
+
+    absent = sum(len(c['absent']) for inst in classes.values() for c in inst.values())
+    late = sum(len(c['late']) for inst in classes.values() for c in inst.values())
+    report = {
+        'date': day,
+        'late_after': args.late_after,
+        'cutoff': args.cutoff,
+        'summary': {
+            'institutions': len(classes),
+            'enrolled': len(roster),
+            'absent': absent,
+            'late': late,
+            'unknown_sightings': unknown,
+            'roster_seconds': round(roster_seconds, 4),
+            'total_seconds': round(elapsed, 4)
+        },
+        'institutions': classes,
+        'generated_at': datetime.now().isoformat()
+    }
+
+    output = args.output or f'absentees_{day}.json'
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    logger.info(f"{day}: {absent} absent, {late} late of {len(roster)} enrolled "
+                f"({elapsed * 1000:.1f}ms) -> {output}")
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Emit absent and late lists per class by diffing the roster')
+    parser.add_argument('--db', default=DEFAULT_DB_PATH, help='Path to school.db')
+    parser.add_argument('--institution', type=int, default=None, help='Restrict to one institution_id')
+    parser.add_argument('--date', default=None, help='Day to check (YYYY-MM-DD, default today)')
+    parser.add_argument('--late-after', default=LATE_AFTER, help='First sighting after this time is late')
+    parser.add_argument('--cutoff', default=ABSENT_CUTOFF, help='Not seen by this time is absent')
+    parser.add_argument('--csv', default=None, help='Read sightings from a Pattendance_log.csv instead of the database')
+    parser.add_argument('--output', default=None, help='Report path (default absentees_<date>.json)')
+    parser.add_argument('--interval', type=float, default=0, help='Re-run every N minutes (0 = run once)')
+    args = parser.parse_args()
+
+    if not os.path.exists(args.db):
+        print(f"❌ Database not found: {args.db}")
+        return 1
+
+    roster = RosterIndex()
+    conn = sqlite3.connect(args.db)
+    if not args.csv and not has_table(conn, 'attendance_daily'):
+        conn.close()
+        print(f"❌ {args.db} has no attendance_daily table: start server.js against it once to create and "
+              f"backfill the rollup, or pass --csv")
+        return 1
+    try:
+        run_once(conn, roster, args)
+        while args.interval > 0:
+            time.sleep(args.interval * 60)
+            run_once(conn, roster, args)
+    except KeyboardInterrupt:
+        logger.info("Absentee detection stopped by user")
+    finally:
+        conn.close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
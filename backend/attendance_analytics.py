@@ -0,0 +1,390 @@
+#!/usr/bin/env python3
+"""
+Offline Attendance Analytics for Cheick Mohamed School
+Loads attendance history from Pattendance_log.csv exports or school.db into
+NumPy columnar arrays and computes attendance rates, streaks, chronic-absence
+lists and late-arrival distributions per institution, class and department.
+"""
+
+import argparse
+import csv
+import json
+import os
+import sqlite3
+import sys
+import time
+from datetime import date
+
+import numpy as np
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(SCRIPT_DIR)
+DEFAULT_DB_PATH = os.path.join(PROJECT_ROOT, 'database', 'school.db')
+
+LATE_CUTOFF = '08:00:00'
+CHRONIC_ABSENCE_THRESHOLD = 0.90  # attendance rate below this is chronic absence
+LATE_BUCKETS_MINUTES = [0, 5, 15, 30, 60]  # late-arrival histogram edges
+UNASSIGNED = 'Unassigned'
+EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+
+def time_to_seconds(value):
+    """'HH:MM:SS' -> seconds since midnight"""
+    parts = value.split(':')
+    return int(parts[0]) * 3600 + int(parts[1]) * 60 + (int(parts[2]) if len(parts) > 2 else 0)
+
+
+class Encoder:
+    """Dictionary-encodes string keys to dense integer codes"""
+
+    def __init__(self):
+        self.codes = {}
+        self.values = []
+
+    def encode(self, value):
+        code = self.codes.get(value)
+        if code is None:
+            code = self.codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+
+class AttendanceColumns:
+    """Columnar attendance events plus a roster aligned with the student codes"""
+
+    def __init__(self):
+        self.students = Encoder()
+        self.classes = Encoder()
+        self.departments = Encoder()
+        self.institutions = Encoder()
+        self.roster_class = []
+        self.roster_department = []
+        self.roster_institution = []
+        self.roster_name = []
+        self.event_student = []
+        self.event_day = []
+        self.event_seconds = []
+        self.day_cache = {}
+        self.time_cache = {}
+
+    def add_student(self, student_id, name='', class_name=None, department=None, institution=None):
+        """Register (or enrich) a roster entry and return its student code"""
+        code = self.students.encode(str(student_id))
+        if code == len(self.roster_class):
+            self.roster_class.append(self.classes.encode(class_name or UNASSIGNED))
+            self.roster_department.append(self.departments.encode(department or UNASSIGNED))
+            self.roster_institution.append(self.institutions.encode(institution))
+            self.roster_name.append(name or '')
+        return code
+
+    def add_event(self, date_str, time_str, student_id, name='', department=None, institution=None):
+        code = self.students.codes.get(str(student_id))
+        if code is None:
+            code = self.add_student(student_id, name, None, department, institution)
+
+        day = self.day_cache.get(date_str)
+        if day is None:
+            day = self.day_cache[date_str] = date.fromisoformat(date_str).toordinal() - EPOCH_ORDINAL
+        seconds = self.time_cache.get(time_str)
+        if seconds is None:
+            seconds = self.time_cache[time_str] = time_to_seconds(time_str)
+
+        self.event_student.append(code)
+        self.event_day.append(day)
+        self.event_seconds.append(seconds)
+
+    def arrays(self):
+        """Freeze the columns into NumPy arrays"""
+        return {
+            'student': np.asarray(self.event_student, dtype=np.int32),
+            'day': np.asarray(self.event_day, dtype=np.int32),
+            'seconds': np.asarray(self.event_seconds, dtype=np.int32),
+            'class': np.asarray(self.roster_class, dtype=np.int32),
+            'department': np.asarray(self.roster_department, dtype=np.int32),
+            'institution': np.asarray(self.roster_institution, dtype=np.int32)
+        }
+
+
+def load_roster(columns, db_path, institution_id=None):
+    """Load active students from school.db into the roster"""
+    query = "SELECT id, name, class, department, institution_id FROM students WHERE status = 'active'"
+    params = []
+    if institution_id is not None:
+        query += ' AND institution_id = ?'
+        params.append(institution_id)
+    with sqlite3.connect(db_path) as conn:
+        for student_id, name, class_name, department, inst in conn.execute(query, params):
+            columns.add_student(student_id, name, class_name, department, inst)
+
+
+def load_csv(path, columns=None):
+    """Load a Pattendance_log.csv export (Date,Time,Name,ID,Dept,Role)"""
+    columns = columns or AttendanceColumns()
+    with open(path, 'r', newline='', encoding='utf-8') as f:
+        reader = csv.reader(f)
+        header = next(reader, None)
+        if not header:
+            return columns
+        index = {name: i for i, name in enumerate(header)}
+        date_i, time_i, id_i, name_i, dept_i = (index[k] for k in ('Date', 'Time', 'ID', 'Name', 'Dept'))
+        role_i = index.get('Role')
+        add_event = columns.add_event
+        for row in reader:
+            if role_i is not None and row[role_i] not in ('Student', ''):
+                continue
+            add_event(row[date_i], row[time_i], row[id_i], row[name_i], row[dept_i])
+    return columns
+
+
+def load_db(db_path, institution_id=None, columns=None):
+    """Load attendance rows from school.db"""
+    columns = columns or AttendanceColumns()
+    query = 'SELECT date, time, student_id, student_name, department, institution_id FROM attendance'
+    params = []
+    if institution_id is not None:
+        query += ' WHERE institution_id = ?'
+        params.append(institution_id)
+    with sqlite3.connect(db_path) as conn:
+        for row in conn.execute(query, params):
+            columns.add_event(*row)
+    return columns
+
+
+def run_lengths(matrix):
+    """Longest run of True per row and length of the trailing True run per row"""
+    rows, cols = matrix.shape
+    if cols == 0:
+        return np.zeros(rows, dtype=np.int32), np.zeros(rows, dtype=np.int32)
+
+    padded = np.zeros((rows, cols + 2), dtype=np.int8)
+    padded[:, 1:-1] = matrix
+    edges = np.diff(padded, axis=1)
+    start_rows, start_cols = np.nonzero(edges == 1)
+    _, end_cols = np.nonzero(edges == -1)
+    longest = np.zeros(rows, dtype=np.int32)
+    np.maximum.at(longest, start_rows, (end_cols - start_cols).astype(np.int32))
+
+    # Trailing run: distance from the end to the last False
+    reversed_false = ~matrix[:, ::-1]
+    trailing = np.where(reversed_false.any(axis=1), reversed_false.argmax(axis=1), cols).astype(np.int32)
+    return longest, trailing
+
+
+def grouped_rate(codes, present, expected, group_count):
+    """Attendance rate per group = sum(present days) / sum(expected days)"""
+    present_sum = np.bincount(codes, weights=present, minlength=group_count)
+    expected_sum = np.bincount(codes, weights=expected, minlength=group_count)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(expected_sum > 0, present_sum / expected_sum, 0.0), present_sum, expected_sum
+
+
+class AttendanceAnalytics:
+    """Vectorized attendance analytics over AttendanceColumns"""
+
+    def __init__(self, columns, late_cutoff=LATE_CUTOFF, chronic_threshold=CHRONIC_ABSENCE_THRESHOLD):
+        self.columns = columns
+        self.data = columns.arrays()
+        self.late_cutoff_label = late_cutoff
+        self.late_cutoff = time_to_seconds(late_cutoff)
+        self.chronic_threshold = chronic_threshold
+        self.build_presence()
+
+    def build_presence(self):
+        """Student x school-day presence matrix and first-in time per present cell"""
+        data = self.data
+        n_students = len(data['class'])
+        self.days, day_index = np.unique(data['day'], return_inverse=True)
+        n_days = len(self.days)
+
+        # First sighting per (student, day): sort by cell then time, keep the first of each cell
+        cell = data['student'].astype(np.int64) * n_days + day_index
+        order = np.lexsort((data['seconds'], cell))
+        sorted_cell = cell[order]
+        first = np.ones(len(sorted_cell), dtype=bool)
+        first[1:] = sorted_cell[1:] != sorted_cell[:-1]
+        unique_cells = sorted_cell[first]
+        self.cell_student = (unique_cells // n_days).astype(np.int32) if n_days else unique_cells.astype(np.int32)
+        self.cell_day = (unique_cells % n_days).astype(np.int32) if n_days else unique_cells.astype(np.int32)
+        self.cell_first_in = data['seconds'][order][first]
+
+        self.present = np.zeros((n_students, n_days), dtype=bool)
+        self.present[self.cell_student, self.cell_day] = True
+
+        # A school day for an institution is any day on which it recorded attendance
+        n_institutions = len(self.columns.institutions.values)
+        self.school_days = np.zeros((n_institutions, n_days), dtype=bool)
+        self.school_days[data['institution'][self.cell_student], self.cell_day] = True
+        self.expected = self.school_days[data['institution']]
+        self.absent = self.expected & ~self.present
+
+    def student_summary(self):
+        present_days = self.present.sum(axis=1)
+        expected_days = self.expected.sum(axis=1)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            rate = np.where(expected_days > 0, present_days / expected_days, 0.0)
+
+        longest_present = np.zeros(len(rate), dtype=np.int32)
+        current_absence = np.zeros(len(rate), dtype=np.int32)
+        for inst in range(self.school_days.shape[0]):
+            rows = np.nonzero(self.data['institution'] == inst)[0]
+            day_cols = np.nonzero(self.school_days[inst])[0]
+            if len(rows) and len(day_cols):
+                longest, _ = run_lengths(self.present[np.ix_(rows, day_cols)])
+                _, trailing = run_lengths(self.absent[np.ix_(rows, day_cols)])
+                longest_present[rows] = longest
+                current_absence[rows] = trailing
+        return present_days, expected_days, rate, longest_present, current_absence
+
+    def group_report(self, dimension, present_days, expected_days):
+        """Overall and monthly attendance rate per class/department/institution"""
+        codes = self.data[dimension]
+        names = getattr(self.columns, {'class': 'classes', 'department': 'departments',
+                                       'institution': 'institutions'}[dimension]).values
+        rates, present_sum, expected_sum = grouped_rate(codes, present_days, expected_days, len(names))
+
+        # Monthly: students x months via a day->month one-hot product, then grouped
+        months = (self.days.astype('datetime64[D]').astype('datetime64[M]'))
+        month_labels, month_index = np.unique(months, return_inverse=True)
+        onehot = np.zeros((len(self.days), len(month_labels)), dtype=np.int32)
+        onehot[np.arange(len(self.days)), month_index] = 1
+        present_month = self.present.astype(np.int32) @ onehot
+        expected_month = self.expected.astype(np.int32) @ onehot
+
+        n_groups, n_months = len(names), len(month_labels)
+        flat = (codes[:, None] * n_months + np.arange(n_months)[None, :]).ravel()
+        monthly_present = np.bincount(flat, weights=present_month.ravel(), minlength=n_groups * n_months)
+        monthly_expected = np.bincount(flat, weights=expected_month.ravel(), minlength=n_groups * n_months)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            monthly = np.where(monthly_expected > 0, monthly_present / monthly_expected, np.nan).reshape(n_groups, n_months)
+
+        report = {}
+        for g, name in enumerate(names):
+            if expected_sum[g] == 0:
+                continue
+            report[str(name)] = {
+                'attendance_rate': round(float(rates[g]), 4),
+                'present_days': int(present_sum[g]),
+                'expected_days': int(expected_sum[g]),
+                'monthly': {str(m): round(float(monthly[g, i]), 4)
+                            for i, m in enumerate(month_labels) if not np.isnan(monthly[g, i])}
+            }
+        return report
+
+    def late_distribution(self, dimension):
+        """Histogram of minutes late (first sighting after the cutoff) per group"""
+        codes = self.data[dimension][self.cell_student]
+        minutes_late = (self.cell_first_in - self.late_cutoff) / 60.0
+        late = minutes_late > 0
+        edges = np.asarray(LATE_BUCKETS_MINUTES[1:], dtype=np.float64)
+        bucket = np.searchsorted(edges, minutes_late[late], side='right')
+        n_buckets = len(LATE_BUCKETS_MINUTES)
+        names = getattr(self.columns, {'class': 'classes', 'department': 'departments',
+                                       'institution': 'institutions'}[dimension]).values
+        counts = np.bincount(codes[late] * n_buckets + bucket, minlength=len(names) * n_buckets).reshape(len(names), n_buckets)
+        arrivals = np.bincount(codes, minlength=len(names))
+
+        labels = [f'{lo}-{hi}m' for lo, hi in zip(LATE_BUCKETS_MINUTES, LATE_BUCKETS_MINUTES[1:])]
+        labels.append(f'{LATE_BUCKETS_MINUTES[-1]}m+')
+        return {
+            str(name): {
+                'arrivals': int(arrivals[g]),
+                'late': int(counts[g].sum()),
+                'late_rate': round(float(counts[g].sum() / arrivals[g]), 4),
+                'buckets': dict(zip(labels, (int(c) for c in counts[g])))
+            }
+            for g, name in enumerate(names) if arrivals[g]
+        }
+
+    def report(self):
+        started = time.perf_counter()
+        present_days, expected_days, rate, longest_present, current_absence = self.student_summary()
+
+        chronic = np.nonzero((expected_days > 0) & (rate < self.chronic_threshold))[0]
+        chronic = chronic[np.argsort(rate[chronic], kind='stable')]
+        columns = self.columns
+        chronic_list = [{
+            'student_id': columns.students.values[s],
+            'name': columns.roster_name[s],
+            'class': columns.classes.values[self.data['class'][s]],
+            'department': columns.departments.values[self.data['department'][s]],
+            'institution_id': columns.institutions.values[self.data['institution'][s]],
+            'attendance_rate': round(float(rate[s]), 4),
+            'days_absent': int(expected_days[s] - present_days[s]),
+            'current_absence_streak': int(current_absence[s])
+        } for s in chronic]
+
+        report = {
+            'summary': {
+                'students': int(len(rate)),
+                'events': int(len(self.data['student'])),
+                'school_days': int(self.school_days.any(axis=0).sum()),
+                'from': str(self.days[0].astype('datetime64[D]')) if len(self.days) else None,
+                'to': str(self.days[-1].astype('datetime64[D]')) if len(self.days) else None,
+                'overall_attendance_rate': round(float(present_days.sum() / max(expected_days.sum(), 1)), 4),
+                'chronic_absence_threshold': self.chronic_threshold,
+                'late_cutoff': self.late_cutoff_label
+            },
+            'by_institution': self.group_report('institution', present_days, expected_days),
+            'by_class': self.group_report('class', present_days, expected_days),
+            'by_department': self.group_report('department', present_days, expected_days),
+            'late_arrivals': {
+                'by_class': self.late_distribution('class'),
+                'by_department': self.late_distribution('department')
+            },
+            'streaks': {
+                'longest_present_streak_max': int(longest_present.max()) if len(rate) else 0,
+                'students_with_current_absence_streak_3plus': int((current_absence >= 3).sum())
+            },
+            'chronic_absence': chronic_list
+        }
+        report['summary']['compute_seconds'] = round(time.perf_counter() - started, 4)
+        return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Attendance rate, streak, chronic-absence and lateness reports')
+    parser.add_argument('--csv', action='append', default=[], help='Pattendance_log.csv export(s) to load')
+    parser.add_argument('--db', default=None, help=f'school.db to load attendance and roster from (e.g. {DEFAULT_DB_PATH})')
+    parser.add_argument('--roster-db', default=None, help='Load only the student roster (class/department) from this school.db')
+    parser.add_argument('--institution', type=int, default=None, help='Restrict to one institution_id')
+    parser.add_argument('--late-cutoff', default=LATE_CUTOFF, help='Arrivals after this time count as late (HH:MM:SS)')
+    parser.add_argument('--chronic-threshold', type=float, default=CHRONIC_ABSENCE_THRESHOLD)
+    parser.add_argument('--output', default='attendance_analytics_report.json')
+    args = parser.parse_args()
+
+    if not args.csv and not args.db:
+        parser.error('Provide --csv and/or --db')
+
+    started = time.perf_counter()
+    columns = AttendanceColumns()
+    roster_db = args.roster_db or args.db
+    if roster_db:
+        load_roster(columns, roster_db, args.institution)
+    for path in args.csv:
+        load_csv(path, columns)
+    if args.db:
+        load_db(args.db, args.institution, columns)
+    load_seconds = time.perf_counter() - started
+
+    analytics = AttendanceAnalytics(columns, args.late_cutoff, args.chronic_threshold)
+    report = analytics.report()
+    report['summary']['load_seconds'] = round(load_seconds, 4)
+    report['summary']['total_seconds'] = round(time.perf_counter() - started, 4)
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+
+    summary = report['summary']
+    print("📊 Attendance Analytics")
+    print("=" * 60)
+    print(f"Students: {summary['students']}, events: {summary['events']}, school days: {summary['school_days']}")
+    print(f"Period: {summary['from']} to {summary['to']}")
+    print(f"Overall attendance rate: {summary['overall_attendance_rate']:.1%}")
+    print(f"Chronic absentees (<{args.chronic_threshold:.0%}): {len(report['chronic_absence'])}")
+    print(f"Load: {summary['load_seconds']:.3f}s, compute: {summary['compute_seconds']:.3f}s")
+    print(f"✅ Report saved to: {args.output}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
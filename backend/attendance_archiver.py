@@ -0,0 +1,297 @@
+#!/usr/bin/env python3
+"""
+Attendance Cold-Storage Archiver for Cheick Mohamed School
+Moves closed months of the attendance table out of school.db into compressed,
+columnar, per-institution archive files so the hot table only holds the
+current term. A small JSON index lets historical queries read just the
+archives (and columns) they need.
+"""
+
+import argparse
+import csv
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import sys
+import zlib
+from datetime import date, datetime
+from itertools import groupby
+
+from db_maintenance import vacuum
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(SCRIPT_DIR)
+DEFAULT_DB_PATH = os.path.join(PROJECT_ROOT, 'database', 'school.db')
+DEFAULT_ARCHIVE_DIR = os.path.join(PROJECT_ROOT, 'database', 'archive')
+INDEX_FILE = 'index.json'
+ARCHIVE_MAGIC = 'SCHOOLAPP-ATTENDANCE-COLUMNS-1'
+
+TERM_START_MONTHS = [1, 5, 9]  # terms start in January, May and September
+COLUMNS = ['id', 'date', 'time', 'student_id', 'student_name', 'department', 'status',
+           'face_recognition', 'institution_id', 'created_at']
+UNASSIGNED = 'unassigned'
+VACUUM_MOVED_RATIO = 0.20  # force a VACUUM when at least this share of the table was archived
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+
+def current_term_start(today=None):
+    """First day of the term containing today"""
+    today = today or date.today()
+    month = max(m for m in TERM_START_MONTHS if m <= today.month)
+    return date(today.year, month, 1)
+
+
+def next_month(month):
+    """'2025-01' -> '2025-02-01'"""
+    year, mon = int(month[:4]), int(month[5:7])
+    return f'{year + mon // 12}-{mon % 12 + 1:02d}-01'
+
+
+def institution_key(institution_id):
+    return str(institution_id) if institution_id is not None else UNASSIGNED
+
+
+# ===== COLUMNAR FILE FORMAT =====
+# Line 1: magic. Line 2: JSON header {rows, columns: [{name, offset, length}]}.
+# Then one zlib block per column holding its values as JSON.
+
+def write_archive(path, rows):
+    """Write rows (list of tuples in COLUMNS order) atomically; returns bytes written"""
+    blocks = []
+    for i, name in enumerate(COLUMNS):
+        values = [row[i] for row in rows]
+        blocks.append((name, zlib.compress(json.dumps(values, separators=(',', ':')).encode('utf-8'), 9)))
+
+    offset = 0
+    header_columns = []
+    for name, block in blocks:
+        header_columns.append({'name': name, 'offset': offset, 'length': len(block)})
+        offset += len(block)
+    header = json.dumps({'rows': len(rows), 'columns': header_columns}).encode('utf-8')
+
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(ARCHIVE_MAGIC.encode('ascii') + b'\n' + header + b'\n')
+        for _, block in blocks:
+            f.write(block)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    return os.path.getsize(path)
+
+
+def read_archive(path, columns=None):
+    """Read selected columns -> {name: [values]}; only the requested blocks are decompressed"""
+    columns = columns or COLUMNS
+    with open(path, 'rb') as f:
+        if f.readline().strip().decode('ascii') != ARCHIVE_MAGIC:
+            raise ValueError(f'Not an attendance archive: {path}')
+        header = json.loads(f.readline())
+        data_start = f.tell()
+        blocks = {c['name']: c for c in header['columns']}
+        result = {}
+        for name in columns:
+            block = blocks[name]
+            f.seek(data_start + block['offset'])
+            result[name] = json.loads(zlib.decompress(f.read(block['length'])))
+    return result
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+# ===== ARCHIVE INDEX =====
+
+def load_index(archive_dir):
+    path = os.path.join(archive_dir, INDEX_FILE)
+    if not os.path.exists(path):
+        return {'archives': {}}
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def save_index(archive_dir, index):
+    path = os.path.join(archive_dir, INDEX_FILE)
+    with open(path + '.tmp', 'w', encoding='utf-8') as f:
+        json.dump(index, f, indent=2, sort_keys=True)
+    os.replace(path + '.tmp', path)
+
+
+# ===== ARCHIVING =====
+
+class AttendanceArchiver:
+    """Moves closed months from the hot attendance table into archive files"""
+
+    def __init__(self, db_path, archive_dir):
+        self.db_path = db_path
+        self.archive_dir = archive_dir
+        os.makedirs(archive_dir, exist_ok=True)
+        self.index = load_index(archive_dir)
+
+    def archivable_months(self, conn, cutoff):
+        """Closed months with rows dated before the cutoff"""
+        return [row[0] for row in conn.execute(
+            'SELECT DISTINCT substr(date, 1, 7) AS month FROM attendance WHERE date < ? ORDER BY month', (cutoff,))]
+
+    def archive_month(self, conn, month, cutoff, dry_run=False):
+        """Archive one month for every institution in a single table pass; returns {institution: rows}"""
+        rows = conn.execute(f"""
+            SELECT {', '.join(COLUMNS)} FROM attendance
+            WHERE date >= ? AND date < ? AND date < ?
+            ORDER BY institution_id, date, time, id
+        """, (f'{month}-01', next_month(month), cutoff)).fetchall()
+        institution_column = COLUMNS.index('institution_id')
+
+        counts = {}
+        for institution_id, group in groupby(rows, key=lambda row: row[institution_column]):
+            group = list(group)
+            if not dry_run:
+                self.write_group(institution_id, month, group)
+            counts[institution_key(institution_id)] = len(group)
+
+        if not dry_run and rows:
+            # Only delete once the archives and their index entries are durable
+            conn.executemany('DELETE FROM attendance WHERE id = ?', ((row[0],) for row in rows))
+            conn.commit()
+        return counts
+
+    def write_group(self, institution_id, month, rows):
+        inst = institution_key(institution_id)
+        relative = os.path.join(inst, f'{month}.cols')
+        path = os.path.join(self.archive_dir, relative)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        key = f'{inst}/{month}'
+        if key in self.index['archives'] and os.path.exists(path):
+            # Late rows for an already archived month: merge with what is on disk
+            existing = read_archive(path)
+            archived_ids = set(existing['id'])
+            merged = list(zip(*(existing[c] for c in COLUMNS)))
+            merged.extend(row for row in rows if row[0] not in archived_ids)
+            merged.sort(key=lambda row: (row[1], row[2], row[0]))
+            rows_to_write = merged
+        else:
+            rows_to_write = rows
+
+        size = write_archive(path, rows_to_write)
+        if len(read_archive(path, ['id'])['id']) != len(rows_to_write):
+            raise RuntimeError(f'Archive verification failed for {path}')
+
+        self.index['archives'][key] = {
+            'institution': inst,
+            'month': month,
+            'file': relative.replace(os.sep, '/'),
+            'rows': len(rows_to_write),
+            'first_date': rows_to_write[0][1],
+            'last_date': rows_to_write[-1][1],
+            'bytes': size,
+            'sha256': file_sha256(path),
+            'archived_at': datetime.now().isoformat()
+        }
+        save_index(self.archive_dir, self.index)
+
+    def run(self, cutoff, dry_run=False, compact=True):
+        conn = sqlite3.connect(self.db_path)
+        try:
+            total_before = conn.execute('SELECT COUNT(*) FROM attendance').fetchone()[0]
+            moved = groups = 0
+            for month in self.archivable_months(conn, cutoff):
+                counts = self.archive_month(conn, month, cutoff, dry_run)
+                moved += sum(counts.values())
+                groups += len(counts)
+                action = 'would archive' if dry_run else 'archived'
+                logger.info(f"{action} {month}: {sum(counts.values())} rows across {len(counts)} institutions")
+            remaining = total_before - moved if dry_run else conn.execute('SELECT COUNT(*) FROM attendance').fetchone()[0]
+
+            # Archived rows are interleaved with current ones, so their pages are rarely
+            # freed outright; rewrite the file whenever a large share of the table moved
+            compaction = None
+            if moved and compact and not dry_run:
+                compaction = vacuum(conn, force=moved >= total_before * VACUUM_MOVED_RATIO)
+        finally:
+            conn.close()
+        return {'cutoff': cutoff, 'groups': groups, 'rows_archived': moved,
+                'hot_rows_remaining': remaining, 'vacuum': compaction, 'dry_run': dry_run}
+
+
+# ===== HISTORICAL QUERIES =====
+
+def query_archives(archive_dir, institution=None, start=None, end=None, student_id=None, columns=None):
+    """Yield row dicts from the archives matching the filters, in (date, time) order"""
+    index = load_index(archive_dir)
+    columns = columns or COLUMNS
+    needed = list(dict.fromkeys(columns + ['date'] + (['student_id'] if student_id else [])))
+
+    entries = sorted(index['archives'].values(), key=lambda e: (e['month'], e['institution']))
+    for entry in entries:
+        if institution is not None and entry['institution'] != institution_key(institution):
+            continue
+        if (start and entry['last_date'] < start) or (end and entry['first_date'] > end):
+            continue
+        data = read_archive(os.path.join(archive_dir, entry['file']), needed)
+        for i, day in enumerate(data['date']):
+            if (start and day < start) or (end and day > end):
+                continue
+            if student_id and data['student_id'][i] != student_id:
+                continue
+            yield {name: data[name][i] for name in columns}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Archive closed months of attendance to cold storage')
+    parser.add_argument('--db', default=DEFAULT_DB_PATH, help='Path to school.db')
+    parser.add_argument('--archive-dir', default=DEFAULT_ARCHIVE_DIR)
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    archive = sub.add_parser('archive', help='Move closed months before the current term into archives')
+    archive.add_argument('--before', default=None, help='Archive rows dated before this day (default: current term start)')
+    archive.add_argument('--dry-run', action='store_true')
+    archive.add_argument('--no-vacuum', action='store_true', help='Skip compacting school.db afterwards')
+
+    query = sub.add_parser('query', help='Read archived attendance as CSV')
+    query.add_argument('--institution', default=None)
+    query.add_argument('--from', dest='start', default=None, help='YYYY-MM-DD')
+    query.add_argument('--to', dest='end', default=None, help='YYYY-MM-DD')
+    query.add_argument('--student', default=None)
+    query.add_argument('--columns', default=','.join(COLUMNS[1:7]))
+
+    sub.add_parser('list', help='Show the archive index')
+    args = parser.parse_args()
+
+    if args.command == 'archive':
+        if not os.path.exists(args.db):
+            print(f"❌ Database not found: {args.db}")
+            return 1
+        cutoff = args.before or current_term_start().isoformat()
+        result = AttendanceArchiver(args.db, args.archive_dir).run(cutoff, args.dry_run, not args.no_vacuum)
+        print(f"✅ {result['rows_archived']} rows in {result['groups']} institution-months "
+              f"{'would be ' if args.dry_run else ''}archived before {cutoff}; "
+              f"{result['hot_rows_remaining']} rows remain in the hot table")
+    elif args.command == 'query':
+        columns = [c.strip() for c in args.columns.split(',') if c.strip()]
+        writer = csv.DictWriter(sys.stdout, fieldnames=columns)
+        writer.writeheader()
+        for row in query_archives(args.archive_dir, args.institution, args.start, args.end, args.student, columns):
+            writer.writerow(row)
+    elif args.command == 'list':
+        index = load_index(args.archive_dir)
+        total_rows = total_bytes = 0
+        for key, entry in sorted(index['archives'].items()):
+            print(f"{key:24} {entry['rows']:>9} rows {entry['bytes'] / 1024:>9.1f} KB")
+            total_rows += entry['rows']
+            total_bytes += entry['bytes']
+        print(f"{'total':24} {total_rows:>9} rows {total_bytes / 1024:>9.1f} KB")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
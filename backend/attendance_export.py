@@ -0,0 +1,269 @@
+#!/usr/bin/env python3
+"""
+Attendance History Export Client for Cheick Mohamed School
+Streams GET /api/attendance page by page using keyset cursors, prefetching
+the next page while the current one is written, into CSV (or Parquet when
+pyarrow is installed) in constant memory. Resumes from the last cursor after
+connection drops or restarts.
+"""
+
+import argparse
+import csv
+import json
+import logging
+import os
+import queue
+import sys
+import threading
+import time
+
+import requests
+
+try:
+    import pyarrow
+    import pyarrow.parquet as parquet
+except ImportError:  # Parquet output is optional
+    pyarrow = None
+
+API_BASE_URL = os.getenv('SCHOOL_API_URL', 'http://localhost:3000/api')
+PAGE_SIZE = 1000
+PREFETCH_PAGES = 2
+MAX_RETRIES = 8
+BACKOFF_BASE_SECONDS = 0.5
+BACKOFF_MAX_SECONDS = 30
+REQUEST_TIMEOUT = 30
+COLUMNS = ['id', 'date', 'time', 'student_id', 'student_name', 'department', 'status',
+           'face_recognition', 'institution_id', 'created_at']
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+
+class ExportError(Exception):
+    """Raised when the export cannot continue"""
+
+
+class AttendancePager:
+    """Fetches attendance pages by cursor, retrying transient failures with backoff"""
+
+    def __init__(self, base_url, token, page_size=PAGE_SIZE, filters=None):
+        self.url = f'{base_url}/attendance'
+        self.page_size = page_size
+        self.filters = filters or {}
+        self.session = requests.Session()
+        self.session.headers['Authorization'] = f'Bearer {token}'
+
+    def fetch(self, cursor):
+        """One page -> (rows, next_cursor)"""
+        params = dict(self.filters, limit=self.page_size)
+        if cursor:
+            params['cursor'] = cursor
+
+        for attempt in range(MAX_RETRIES + 1):
+            try:
+                response = self.session.get(self.url, params=params, timeout=REQUEST_TIMEOUT)
+                if response.status_code < 500 and response.status_code != 429:
+                    break
+                reason = f'HTTP {response.status_code}'
+            except requests.exceptions.RequestException as e:
+                reason = str(e)
+            if attempt == MAX_RETRIES:
+                raise ExportError(f'Giving up after {MAX_RETRIES} retries: {reason}')
+            delay = min(BACKOFF_MAX_SECONDS, BACKOFF_BASE_SECONDS * 2 ** attempt)
+            logger.warning(f"Page fetch failed ({reason}), retrying in {delay:.1f}s")
+            time.sleep(delay)
+
+        if response.status_code != 200:
+            raise ExportError(f'HTTP {response.status_code}: {response.text[:200]}')
+        body = response.json()
+        return body.get('data', []), body.get('next_cursor')
+
+    def pages(self, cursor=None, prefetch=PREFETCH_PAGES):
+        """Yield (rows, next_cursor) with up to `prefetch` pages fetched ahead in a background thread"""
+        pending = queue.Queue(maxsize=max(1, prefetch))
+        stop = threading.Event()
+
+        def producer():
+            position = cursor
+            try:
+                while not stop.is_set():
+                    rows, next_cursor = self.fetch(position)
+                    pending.put((rows, next_cursor))
+                    if not next_cursor:
+                        return
+                    position = next_cursor
+            except Exception as e:  # surfaced to the consumer
+                pending.put(e)
+
+        thread = threading.Thread(target=producer, daemon=True)
+        thread.start()
+        try:
+            while True:
+                item = pending.get()
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+                if not item[1]:
+                    return
+        finally:
+            stop.set()
+            while thread.is_alive():  # unblock a producer waiting on a full queue
+                try:
+                    pending.get_nowait()
+                except queue.Empty:
+                    thread.join(timeout=0.1)
+
+
+class CsvSink:
+    """Appends pages to a CSV file; resumable by truncating to the last committed offset"""
+
+    def __init__(self, path, offset=None):
+        resuming = offset is not None and os.path.exists(path)
+        self.file = open(path, 'r+' if resuming else 'w', newline='', encoding='utf-8')
+        if resuming:
+            self.file.seek(offset)
+            self.file.truncate()
+        self.writer = csv.DictWriter(self.file, fieldnames=COLUMNS, extrasaction='ignore')
+        if not resuming:
+            self.writer.writeheader()
+
+    def write(self, rows):
+        self.writer.writerows(rows)
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        return self.file.tell()
+
+    def close(self):
+        self.file.close()
+
+
+class ParquetSink:
+    """Writes each page as a Parquet row group; not resumable across restarts"""
+
+    def __init__(self, path, offset=None):
+        if pyarrow is None:
+            raise ExportError('Parquet output requires pyarrow (pip install pyarrow)')
+        if offset is not None:
+            raise ExportError('Parquet exports cannot resume after a restart; delete the state file to start over')
+        schema = pyarrow.schema([(c, pyarrow.int64() if c in ('id', 'institution_id') else pyarrow.string())
+                                 for c in COLUMNS])
+        self.schema = schema
+        self.writer = parquet.ParquetWriter(path, schema, compression='zstd')
+
+    def write(self, rows):
+        columns = {c: [row.get(c) for row in rows] for c in COLUMNS}
+        for c in COLUMNS:
+            if self.schema.field(c).type == pyarrow.string():
+                columns[c] = [None if v is None else str(v) for v in columns[c]]
+        self.writer.write_table(pyarrow.table(columns, schema=self.schema))
+        return None
+
+    def close(self):
+        self.writer.close()
+
+
+class ExportState:
+    """Last committed cursor and output offset, saved after every page"""
+
+    def __init__(self, path):
+        self.path = path
+        self.data = {}
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                self.data = json.load(f)
+
+    def save(self, **values):
+        self.data.update(values)
+        with open(self.path + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump(self.data, f)
+        os.replace(self.path + '.tmp', self.path)
+
+    def clear(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+def export_attendance(pager, output, fmt='csv', prefetch=PREFETCH_PAGES, state_path=None):
+    """Stream every page into output; returns a summary dict"""
+    state = ExportState(state_path or f'{output}.state.json')
+    resuming = bool(state.data.get('cursor'))
+    cursor = state.data.get('cursor')
+    rows_written = state.data.get('rows', 0) if resuming else 0
+    if resuming:
+        logger.info(f"Resuming export after {rows_written} rows")
+
+    sink_class = ParquetSink if fmt == 'parquet' else CsvSink
+    sink = sink_class(output, state.data.get('offset') if resuming else None)
+    started = time.monotonic()
+    pages = 0
+    try:
+        for rows, next_cursor in pager.pages(cursor, prefetch):
+            offset = sink.write(rows)
+            rows_written += len(rows)
+            pages += 1
+            if next_cursor:
+                state.save(cursor=next_cursor, rows=rows_written, offset=offset)
+            if pages % 50 == 0:
+                logger.info(f"{rows_written} rows exported")
+    finally:
+        sink.close()
+
+    state.clear()
+    elapsed = time.monotonic() - started
+    return {
+        'rows': rows_written,
+        'pages': pages,
+        'seconds': round(elapsed, 2),
+        'rows_per_sec': round(rows_written / elapsed, 1) if elapsed else 0.0,
+        'resumed': resuming
+    }
+
+
+def login(base_url, username, password):
+    response = requests.post(f'{base_url}/auth/login', json={'username': username, 'password': password},
+                             timeout=REQUEST_TIMEOUT)
+    if response.status_code != 200:
+        raise ExportError(f'Login failed: HTTP {response.status_code}')
+    return response.json()['token']
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Export attendance history with cursor pagination')
+    parser.add_argument('output', help='Output file (.csv or .parquet)')
+    parser.add_argument('--api', default=API_BASE_URL, help='API base URL')
+    parser.add_argument('--username', default=os.getenv('SCHOOL_API_USERNAME', 'admin'))
+    parser.add_argument('--password', default=os.getenv('SCHOOL_API_PASSWORD'))
+    parser.add_argument('--token', default=os.getenv('SCHOOL_API_TOKEN'), help='Use an existing JWT instead of logging in')
+    parser.add_argument('--format', choices=['csv', 'parquet'], default=None, help='Default: from the file extension')
+    parser.add_argument('--date', default=None, help='Only this day')
+    parser.add_argument('--student', default=None, help='Only this student_id')
+    parser.add_argument('--page-size', type=int, default=PAGE_SIZE)
+    parser.add_argument('--prefetch', type=int, default=PREFETCH_PAGES, help='Pages fetched ahead of the writer')
+    parser.add_argument('--restart', action='store_true', help='Ignore any saved cursor and start over')
+    args = parser.parse_args()
+
+    fmt = args.format or ('parquet' if args.output.endswith('.parquet') else 'csv')
+    state_path = f'{args.output}.state.json'
+    if args.restart:
+        ExportState(state_path).clear()
+
+    try:
+        token = args.token or login(args.api, args.username, args.password or '')
+        filters = {k: v for k, v in (('date', args.date), ('student_id', args.student)) if v}
+        pager = AttendancePager(args.api, token, args.page_size, filters)
+        summary = export_attendance(pager, args.output, fmt, args.prefetch, state_path)
+    except ExportError as e:
+        print(f"❌ {e}")
+        print(f"   Re-run the same command to resume from the last saved cursor")
+        return 1
+    except KeyboardInterrupt:
+        print("\n⏸️  Export interrupted; re-run the same command to resume")
+        return 130
+
+    print(f"✅ Exported {summary['rows']} rows in {summary['pages']} pages "
+          f"({summary['seconds']}s, {summary['rows_per_sec']} rows/s) to {args.output}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
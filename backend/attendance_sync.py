@@ -9,9 +9,11 @@ import time
 import csv
 import requests
 import json
-from datetime import datetime
+from datetime import datetime, timedelta
 import logging
 
+from name_reconciliation import NameIndex
+
 # Configuration
 import os
 import sys
@@ -34,9 +36,28 @@ else:
     LOCALHOST_URL = 'http://localhost:3000/api'
     API_BASE_URL = REPLIT_URL  # Will test both in connection function
 
+# Explicit overrides, e.g. pointing at tests/stub_api_server.py for offline runs
+API_URL_OVERRIDE = os.getenv('ATTENDANCE_API_URL')
+if API_URL_OVERRIDE:
+    API_BASE_URL = API_URL_OVERRIDE.rstrip('/')
+CSV_FILE_PATH = os.getenv('ATTENDANCE_CSV_PATH', CSV_FILE_PATH)
+
 ATTENDANCE_ENDPOINT = f'{API_BASE_URL}/attendance/realtime'
 CHECK_INTERVAL = 5  # seconds
-PROCESSED_RECORDS_FILE = os.path.join(SCRIPT_DIR, 'processed_records.json')
+PROCESSED_RECORDS_FILE = os.getenv('ATTENDANCE_CHECKPOINT_PATH', os.path.join(SCRIPT_DIR, 'processed_records.json'))
+# Records older than this many days (relative to the newest CSV date) are forgotten and never resent
+PROCESSED_RETENTION_DAYS = int(os.getenv('ATTENDANCE_RETENTION_DAYS', '2'))
+# Records the API has not confirmed yet; never pruned, so an outage longer than the retention window loses nothing
+RETRY_RECORDS_FILE = os.getenv('ATTENDANCE_RETRY_PATH', os.path.join(SCRIPT_DIR, 'retry_records.json'))
+
+# Roster validation: events are checked against /api/students before sending.
+# Needs a token or admin credentials; without them events are forwarded unvalidated.
+API_TOKEN = os.getenv('ATTENDANCE_API_TOKEN')
+API_USERNAME = os.getenv('ATTENDANCE_API_USERNAME')
+API_PASSWORD = os.getenv('ATTENDANCE_API_PASSWORD')
+ROSTER_CACHE_FILE = os.getenv('ATTENDANCE_ROSTER_CACHE_PATH', os.path.join(SCRIPT_DIR, 'roster_cache.json'))
+QUARANTINE_FILE = os.getenv('ATTENDANCE_QUARANTINE_PATH', os.path.join(SCRIPT_DIR, 'quarantine.jsonl'))
+ROSTER_REFRESH_INTERVAL = int(os.getenv('ATTENDANCE_ROSTER_REFRESH', '300'))  # seconds
 
 # Setup logging with UTF-8 encoding
 logging.basicConfig(
@@ -50,10 +71,119 @@ logging.basicConfig(
 
 logger = logging.getLogger(__name__)
 
+def normalize_student_id(value):
+    """Key used to match recognizer IDs against the roster (case and whitespace insensitive)"""
+    return str(value).strip().casefold()
+
+class RosterCache:
+    """Local copy of /api/students, refreshed with conditional requests (ETag / If-None-Match)"""
+
+    def __init__(self, cache_path=ROSTER_CACHE_FILE):
+        self.cache_path = cache_path
+        self.token = API_TOKEN
+        self.etag = None
+        self.students = {}  # normalized id -> {'id', 'name', 'department'}
+        self.names = NameIndex([])
+        self.last_refresh = 0
+        self.enabled = bool(API_TOKEN or (API_USERNAME and API_PASSWORD))
+        if not self.enabled:
+            logger.info("Roster validation disabled (set ATTENDANCE_API_TOKEN or ATTENDANCE_API_USERNAME/PASSWORD)")
+        else:
+            self.load_cache()
+
+    @property
+    def ready(self):
+        return bool(self.students)
+
+    def load_cache(self):
+        """Restore the last roster so validation works before the first refresh"""
+        try:
+            if os.path.exists(self.cache_path):
+                with open(self.cache_path, 'r', encoding='utf-8') as f:
+                    cached = json.load(f)
+                self.etag = cached.get('etag')
+                self.build_index(cached.get('students', []))
+                logger.info(f"Loaded cached roster with {len(self.students)} students")
+        except Exception as e:
+            logger.error(f"Error loading roster cache: {e}")
+
+    def save_cache(self, students):
+        try:
+            with open(self.cache_path, 'w', encoding='utf-8') as f:
+                json.dump({'etag': self.etag, 'students': students}, f)
+        except Exception as e:
+            logger.error(f"Error saving roster cache: {e}")
+
+    def build_index(self, students):
+        self.students = {
+            normalize_student_id(s['id']): {'id': s['id'], 'name': s['name'], 'department': s.get('department')}
+            for s in students if s.get('id')
+        }
+        self.names = NameIndex(students)
+
+    def login(self):
+        response = requests.post(f'{API_BASE_URL}/auth/login',
+                                 json={'username': API_USERNAME, 'password': API_PASSWORD}, timeout=10)
+        if response.status_code != 200:
+            logger.error(f"Roster login failed: {response.status_code}")
+            return False
+        self.token = response.json().get('token')
+        return bool(self.token)
+
+    def refresh(self, force=False):
+        """Re-fetch the roster if the refresh interval elapsed; unchanged rosters cost a 304.
+        Returns True when a new roster was loaded."""
+        if not self.enabled or (not force and time.time() - self.last_refresh < ROSTER_REFRESH_INTERVAL):
+            return
+        self.last_refresh = time.time()
+
+        try:
+            if not self.token and not self.login():
+                return
+            for attempt in range(2):
+                headers = {'Authorization': f'Bearer {self.token}'}
+                if self.etag and self.students:
+                    headers['If-None-Match'] = self.etag
+                response = requests.get(f'{API_BASE_URL}/students', headers=headers, timeout=10)
+                if response.status_code == 401 and attempt == 0 and API_USERNAME and self.login():
+                    continue  # token expired
+                break
+
+            if response.status_code == 304:
+                logger.debug("Roster unchanged")
+            elif response.status_code == 200:
+                students = response.json().get('data', [])
+                self.etag = response.headers.get('ETag')
+                self.build_index(students)
+                self.save_cache(students)
+                logger.info(f"Roster refreshed: {len(self.students)} students")
+                return True
+            else:
+                logger.warning(f"Roster refresh failed: {response.status_code}")
+        except requests.exceptions.RequestException as e:
+            logger.warning(f"Roster refresh failed: {e}")
+
+    def lookup(self, student_id):
+        return self.students.get(normalize_student_id(student_id))
+
+    def reconcile_name(self, name, department=None):
+        """Roster entry for a confident fuzzy name match, or None"""
+        match = self.names.reconcile(name, department)
+        return self.students.get(normalize_student_id(match.student_id)) if match else None
+
 class AttendanceSync:
     def __init__(self):
         self.processed_records = self.load_processed_records()
+        self.retry_records = self.load_retry_records()
+        # Pending rows count as seen even if the checkpoint was not saved after them
+        self.processed_records.update(self.retry_records)
+        self.roster = RosterCache()
         self.last_csv_mtime = 0
+        self.retention_cutoff = ''
+        # Restore the retention window so rows pruned before a restart are not resent
+        newest_processed = max((r.split('_', 1)[0] for r in self.processed_records), default='')
+        if newest_processed:
+            self.prune_processed_records(newest_processed)
         logger.info("Attendance sync service initialized")
 
     def load_processed_records(self):
@@ -69,12 +199,48 @@ class AttendanceSync:
 
     def save_processed_records(self):
         """Save processed records to file"""
+        self.save_retry_records()
         try:
             with open(PROCESSED_RECORDS_FILE, 'w') as f:
                 json.dump(list(self.processed_records), f)
         except Exception as e:
             logger.error(f"Error saving processed records: {e}")
 
+    def load_retry_records(self):
+        """Records whose send failed, keyed by record id, waiting to be resent"""
+        try:
+            if os.path.exists(RETRY_RECORDS_FILE):
+                with open(RETRY_RECORDS_FILE, 'r', encoding='utf-8') as f:
+                    return {record['id']: record for record in json.load(f)}
+            return {}
+        except Exception as e:
+            logger.error(f"Error loading retry records: {e}")
+            return {}
+
+    def save_retry_records(self):
+        try:
+            with open(RETRY_RECORDS_FILE, 'w', encoding='utf-8') as f:
+                json.dump(list(self.retry_records.values()), f)
+        except Exception as e:
+            logger.error(f"Error saving retry records: {e}")
+
+    def prune_processed_records(self, newest_date):
+        """Drop records outside the retention window so the checkpoint stays bounded"""
+        try:
+            cutoff_date = datetime.strptime(newest_date, '%Y-%m-%d') - timedelta(days=PROCESSED_RETENTION_DAYS)
+        except ValueError:
+            return
+
+        cutoff = cutoff_date.strftime('%Y-%m-%d')
+        if cutoff <= self.retention_cutoff:
+            return
+
+        self.retention_cutoff = cutoff
+        before = len(self.processed_records)
+        self.processed_records = {r for r in self.processed_records if r.split('_', 1)[0] >= cutoff}
+        if len(self.processed_records) < before:
+            logger.info(f"Pruned {before - len(self.processed_records)} processed records older than {cutoff}")
+
     def read_csv_file(self):
         """Read the attendance CSV file and return new records"""
         try:
@@ -90,10 +256,15 @@ class AttendanceSync:
             self.last_csv_mtime = current_mtime
             
             new_records = []
+            newest_date = ''
             with open(CSV_FILE_PATH, 'r', newline='', encoding='utf-8') as csvfile:
                 reader = csv.DictReader(csvfile)
                 
                 for row in reader:
+                    newest_date = max(newest_date, row['Date'])
+                    if row['Date'] < self.retention_cutoff:
+                        continue  # Already outside the retention window
+
                     # Create unique identifier for each record
                     record_id = f"{row['Date']}_{row['Time']}_{row['ID']}"
                     
@@ -109,6 +280,9 @@ class AttendanceSync:
                         })
                         self.processed_records.add(record_id)
 
+            if newest_date:
+                self.prune_processed_records(newest_date)
+
             if new_records:
                 logger.info(f"Found {len(new_records)} new attendance records")
                 
@@ -118,6 +292,66 @@ class AttendanceSync:
             logger.error(f"Error reading CSV file: {e}")
             return []
 
+    def validate_record(self, record):
+        """Canonicalize a student record against the roster; None if the ID is unknown"""
+        if record['role'] != 'Student' or not self.roster.ready:
+            return record
+
+        student = self.roster.lookup(record['student_id'])
+        if student is None:
+            # Wrong or missing ID: fall back to the recognizer's name
+            student = self.roster.reconcile_name(record['name'], record['department'])
+            if student is None:
+                return None
+            logger.info(f"Reconciled '{record['name']}' (ID: {record['student_id']}) to {student['name']} (ID: {student['id']})")
+        return dict(record, student_id=student['id'], name=student['name'],
+                    department=student['department'] or record['department'])
+
+    def quarantine_records(self, records):
+        """Append events with unknown student IDs to the quarantine file for review"""
+        try:
+            with open(QUARANTINE_FILE, 'a', encoding='utf-8') as f:
+                for record in records:
+                    entry = dict(record, reason='unknown_student_id', quarantined_at=datetime.now().isoformat())
+                    f.write(json.dumps(entry) + '\n')
+            logger.warning(f"Quarantined {len(records)} records with unknown student IDs: "
+                           f"{', '.join(sorted({r['student_id'] for r in records}))}")
+        except Exception as e:
+            logger.error(f"Error writing quarantine file: {e}")
+
+    def has_quarantine(self):
+        return os.path.exists(QUARANTINE_FILE) and os.path.getsize(QUARANTINE_FILE) > 0
+
+    def replay_quarantine(self):
+        """Re-validate quarantined records against a changed roster. Returns the ones the
+        roster now knows, ready to send, and keeps the rest in the quarantine file."""
+        try:
+            with open(QUARANTINE_FILE, 'r', encoding='utf-8') as f:
+                entries = [json.loads(line) for line in f if line.strip()]
+        except Exception as e:
+            logger.error(f"Error reading quarantine file: {e}")
+            return []
+
+        known, remaining = [], []
+        for entry in entries:
+            record = {k: v for k, v in entry.items() if k not in ('reason', 'quarantined_at')}
+            validated = self.validate_record(record)
+            if validated is None:
+                remaining.append(entry)
+            else:
+                known.append(validated)
+        if not known:
+            return []
+
+        try:
+            with open(QUARANTINE_FILE, 'w', encoding='utf-8') as f:
+                f.writelines(json.dumps(entry) + '\n' for entry in remaining)
+        except Exception as e:
+            logger.error(f"Error rewriting quarantine file: {e}")
+            return []
+        logger.info(f"Replaying {len(known)} quarantined records now on the roster ({len(remaining)} still unknown)")
+        return known
+
     def send_to_api(self, record):
         """Send attendance record to the web API"""
         try:
@@ -158,17 +392,37 @@ class AttendanceSync:
         """Main sync function"""
         try:
             new_records = self.read_csv_file()
+            roster_changed = False
+            if new_records or self.has_quarantine():
+                roster_changed = self.roster.refresh()
+
+            # Quarantined rows go out once the roster learns their student
+            valid_records = self.replay_quarantine() if roster_changed and self.has_quarantine() else []
+            replayed = len(valid_records)
+            unknown_records = []
+            for record in new_records:
+                validated = self.validate_record(record)
+                if validated is None:
+                    unknown_records.append(record)
+                else:
+                    valid_records.append(validated)
+            if unknown_records:
+                self.quarantine_records(unknown_records)
             
+            # Earlier failures go first; they stay in processed_records so the CSV never re-adds them
+            retrying = len(self.retry_records)
             successful_syncs = 0
-            for record in new_records:
+            for record in list(self.retry_records.values()) + valid_records:
                 if self.send_to_api(record):
                     successful_syncs += 1
+                    self.retry_records.pop(record['id'], None)
                 else:
-                    # Remove from processed records if API call failed
-                    self.processed_records.discard(record['id'])
+                    self.retry_records[record['id']] = record
             
-            if new_records:
-                logger.info(f"Sync completed: {successful_syncs}/{len(new_records)} records sent successfully")
+            if new_records or retrying or replayed:
+                logger.info(f"Sync completed: {successful_syncs}/{retrying + len(valid_records)} records sent successfully"
+                            + (f", {len(unknown_records)} quarantined" if unknown_records else "")
+                            + (f", {len(self.retry_records)} awaiting retry" if self.retry_records else ""))
                 self.save_processed_records()
                 
         except Exception as e:
@@ -199,11 +453,14 @@ def test_api_connection():
     global API_BASE_URL, ATTENDANCE_ENDPOINT
     
     # If not on Replit, try both Replit and localhost
-    if not IS_REPLIT:
-        urls_to_try = [
-            ('Replit', REPLIT_URL),
-            ('Localhost', LOCALHOST_URL)
-        ]
+    if not IS_REPLIT or API_URL_OVERRIDE:
+        if API_URL_OVERRIDE:
+            urls_to_try = [('Configured', API_BASE_URL)]
+        else:
+            urls_to_try = [
+                ('Replit', REPLIT_URL),
+                ('Localhost', LOCALHOST_URL)
+            ]
         
         for name, url in urls_to_try:
             try:
@@ -222,7 +479,7 @@ def test_api_connection():
             except Exception as e:
                 logger.warning(f"⚠️ Error testing {name} connection: {e}")
         
-        logger.error("❌ Cannot connect to any API server (Replit or Localhost)")
+        logger.error(f"❌ Cannot connect to any API server ({', '.join(name for name, _ in urls_to_try)})")
         return False
     else:
         # On Replit, just test the current API
@@ -0,0 +1,450 @@
+#!/usr/bin/env python3
+"""
+SQLite Maintenance and Index Advisor for Cheick Mohamed School
+Replays the query shapes used by server.js against school.db, captures
+EXPLAIN QUERY PLAN output, proposes and applies the indexes those queries
+need, and runs ANALYZE / WAL checkpoint / VACUUM maintenance on a schedule.
+"""
+
+import argparse
+import json
+import logging
+import os
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(SCRIPT_DIR)
+DEFAULT_DB_PATH = os.path.join(PROJECT_ROOT, 'database', 'school.db')
+STATE_FILE = 'db_maintenance_state.json'
+
+# Maintenance schedule (seconds between runs)
+CHECKPOINT_INTERVAL = 15 * 60
+ANALYZE_INTERVAL = 24 * 3600
+VACUUM_INTERVAL = 7 * 24 * 3600
+VACUUM_FREE_RATIO = 0.20  # only VACUUM when this fraction of pages is free
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Indexes server.js creates itself at startup; the advisor never proposes these
+SERVER_INDEXES = frozenset({
+    'idx_attendance_date_time',
+    'idx_attendance_institution_date_time',
+    'idx_attendance_daily_date',
+    'idx_attendance_daily_institution_date',
+    'idx_students_institution_created',
+    'idx_users_institution_role_created',
+    'idx_classes_institution'
+})
+
+# Further indexes the API query shapes need. The attendance index ends in
+# (date, time) so a student's history is read in ORDER BY order without a temp
+# B-tree sort; the students indexes serve the roster lists.
+RECOMMENDED_INDEXES = {
+    'idx_attendance_student_date_time':
+        'CREATE INDEX IF NOT EXISTS idx_attendance_student_date_time ON attendance (student_id, date, time)',
+    'idx_students_institution_status_name':
+        'CREATE INDEX IF NOT EXISTS idx_students_institution_status_name ON students (institution_id, status, name)',
+    'idx_students_status_name': 'CREATE INDEX IF NOT EXISTS idx_students_status_name ON students (status, name)'
+}
+
+# Keyset pagination of GET /api/attendance, as server.js builds it
+ATTENDANCE_PAGE = ' ORDER BY date DESC, time DESC, id DESC LIMIT ?'
+ATTENDANCE_CURSOR = '(date, time, id) < (?, ?, ?)'
+
+# Query shapes replayed from server.js: name -> (sql, params, index that serves it)
+QUERY_SHAPES = {
+    'GET /api/attendance': (
+        'SELECT * FROM attendance' + ATTENDANCE_PAGE, ('limit',), 'idx_attendance_date_time'),
+    'GET /api/attendance?cursor': (
+        f'SELECT * FROM attendance WHERE {ATTENDANCE_CURSOR}' + ATTENDANCE_PAGE,
+        ('cursor_date', 'cursor_time', 'cursor_id', 'limit'), 'idx_attendance_date_time'),
+    'GET /api/attendance/public': (
+        'SELECT * FROM attendance ORDER BY date DESC, time DESC LIMIT ?', ('public_limit',), 'idx_attendance_date_time'),
+    'GET /api/attendance?date': (
+        'SELECT * FROM attendance WHERE date = ?' + ATTENDANCE_PAGE, ('date', 'limit'), 'idx_attendance_date_time'),
+    'GET /api/attendance?student_id': (
+        'SELECT * FROM attendance WHERE student_id = ?' + ATTENDANCE_PAGE,
+        ('student_id', 'limit'), 'idx_attendance_student_date_time'),
+    'GET /api/attendance (institution admin)': (
+        'SELECT * FROM attendance WHERE institution_id = ?' + ATTENDANCE_PAGE,
+        ('institution_id', 'limit'), 'idx_attendance_institution_date_time'),
+    'GET /api/attendance?cursor (institution admin)': (
+        f'SELECT * FROM attendance WHERE {ATTENDANCE_CURSOR} AND institution_id = ?' + ATTENDANCE_PAGE,
+        ('cursor_date', 'cursor_time', 'cursor_id', 'institution_id', 'limit'), 'idx_attendance_institution_date_time'),
+    'GET /api/attendance?date (institution admin)': (
+        'SELECT * FROM attendance WHERE date = ? AND institution_id = ?' + ATTENDANCE_PAGE,
+        ('date', 'institution_id', 'limit'), 'idx_attendance_institution_date_time'),
+    'DELETE /api/students/:id (attendance)': (
+        'SELECT COUNT(*) FROM attendance WHERE student_id = ?', ('student_id',), 'idx_attendance_student_date_time'),
+    'GET /api/students (institution admin)': (
+        'SELECT * FROM students WHERE status = ? AND institution_id = ? ORDER BY name',
+        ('status', 'institution_id'), 'idx_students_institution_status_name'),
+    'GET /api/students': (
+        'SELECT * FROM students WHERE status = ? ORDER BY name', ('status',), 'idx_students_status_name'),
+    'GET /api/institution/stats (students)': (
+        'SELECT COUNT(*) as total, SUM(created_at >= ?) as newThisMonth FROM students WHERE institution_id = ?',
+        ('month_start', 'institution_id'), 'idx_students_institution_created'),
+    'GET /api/institution/stats (attendance rate)': (
+        'SELECT SUM(date = ?) as today, SUM(date = ?) as yesterday FROM attendance_daily '
+        'WHERE institution_id = ? AND date IN (?, ?) AND present = 1',
+        ('date', 'yesterday', 'institution_id', 'date', 'yesterday'), None),
+    'GET /api/attendance/stats (today)': (
+        'SELECT COUNT(DISTINCT student_id) as count FROM attendance_daily WHERE date = ? AND present = 1',
+        ('date',), None)
+}
+
+# Minimal schema mirroring server.js createTables and its startup indexes, used for the synthetic benchmark
+BENCHMARK_SCHEMA = """
+CREATE TABLE institutions (id INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT NOT NULL, institution_code TEXT UNIQUE);
+CREATE TABLE students (id TEXT PRIMARY KEY, name TEXT NOT NULL, department TEXT NOT NULL, class TEXT,
+    status TEXT DEFAULT 'active', institution_id INTEGER, created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+    updated_at DATETIME DEFAULT CURRENT_TIMESTAMP);
+CREATE TABLE attendance (id INTEGER PRIMARY KEY AUTOINCREMENT, date TEXT NOT NULL, time TEXT NOT NULL,
+    student_id TEXT NOT NULL, student_name TEXT NOT NULL, department TEXT NOT NULL, status TEXT DEFAULT 'present',
+    face_recognition BOOLEAN DEFAULT true, institution_id INTEGER, created_at DATETIME DEFAULT CURRENT_TIMESTAMP);
+CREATE TABLE attendance_daily (institution_id INTEGER NOT NULL DEFAULT 0, student_id TEXT NOT NULL,
+    date TEXT NOT NULL, first_in TEXT, last_out TEXT, sighting_count INTEGER DEFAULT 0, present INTEGER DEFAULT 1,
+    updated_at DATETIME DEFAULT CURRENT_TIMESTAMP, PRIMARY KEY (institution_id, student_id, date));
+CREATE INDEX idx_attendance_date_time ON attendance (date, time);
+CREATE INDEX idx_attendance_institution_date_time ON attendance (institution_id, date, time);
+CREATE INDEX idx_attendance_daily_date ON attendance_daily (date, student_id);
+CREATE INDEX idx_attendance_daily_institution_date ON attendance_daily (institution_id, date);
+CREATE INDEX idx_students_institution_created ON students (institution_id, created_at);
+"""
+
+
+def sample_params(conn):
+    """Representative parameter values taken from the data itself"""
+    row = conn.execute('SELECT date, student_id, institution_id FROM attendance ORDER BY rowid DESC LIMIT 1').fetchone()
+    day, student_id, institution_id = row if row else (date.today().isoformat(), '0', 1)
+    # Cursor from the end of a first page, as the API hands it back
+    cursor = conn.execute('SELECT date, time, id FROM attendance ORDER BY date DESC, time DESC, id DESC '
+                          'LIMIT 1 OFFSET 99').fetchone() or (day, '23:59:59', 0)
+    if institution_id is None:
+        institution_id = conn.execute('SELECT MIN(id) FROM institutions').fetchone()[0] or 1
+    yesterday = (date.fromisoformat(day) - timedelta(days=1)).isoformat()
+    return {
+        'limit': 100,
+        'public_limit': 10,
+        'date': day,
+        'yesterday': yesterday,
+        'student_id': student_id,
+        'institution_id': institution_id,
+        'cursor_date': cursor[0],
+        'cursor_time': cursor[1],
+        'cursor_id': cursor[2],
+        'status': 'active',
+        'month_start': day[:8] + '01'
+    }
+
+
+def existing_indexes(conn):
+    return {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+
+
+def explain(conn, sql, params):
+    """EXPLAIN QUERY PLAN detail lines for one statement"""
+    return [row[-1] for row in conn.execute(f'EXPLAIN QUERY PLAN {sql}', params)]
+
+
+def plan_problems(plan, sql=''):
+    """Full scans and temp-B-tree sorts are what the indexes are meant to remove. A
+    filtered query that walks a whole non-covering index (used only for its order)
+    is still a full scan."""
+    filtered = ' WHERE ' in sql
+    problems = []
+    for detail in plan:
+        if detail.startswith('SCAN ') and ('USING' not in detail or (filtered and 'COVERING' not in detail)):
+            problems.append(detail)
+        elif 'USE TEMP B-TREE' in detail:
+            problems.append(detail)
+    return problems
+
+
+def analyze_shapes(conn):
+    """Replay every query shape and collect plans plus problems. Shapes the
+    database cannot run yet (a table or column server.js has not created on
+    it) are reported as skipped rather than aborting the run."""
+    params = sample_params(conn)
+    results = []
+    for name, (sql, keys, index) in QUERY_SHAPES.items():
+        try:
+            plan = explain(conn, sql, [params[k] for k in keys])
+        except sqlite3.OperationalError as e:
+            results.append({'query': name, 'sql': sql, 'plan': [], 'problems': [], 'index': index, 'skipped': str(e)})
+            continue
+        results.append({
+            'query': name,
+            'sql': sql,
+            'plan': plan,
+            'problems': plan_problems(plan, sql),
+            'index': index
+        })
+    return results
+
+
+def propose_indexes(conn, shapes=None):
+    """Recommended indexes that are missing and would fix at least one problem plan.
+    Indexes in SERVER_INDEXES are left to server.js, which creates them on start."""
+    shapes = shapes if shapes is not None else analyze_shapes(conn)
+    present = existing_indexes(conn)
+    proposals = {}
+    for shape in shapes:
+        index = shape['index']
+        if index and shape['problems'] and index not in present and index not in SERVER_INDEXES:
+            proposals.setdefault(index, []).append(shape['query'])
+    return proposals
+
+
+def apply_indexes(conn, names):
+    for name in names:
+        started = time.perf_counter()
+        conn.execute(RECOMMENDED_INDEXES[name])
+        logger.info(f"Created {name} ({time.perf_counter() - started:.2f}s)")
+    conn.commit()
+
+
+def time_shapes(conn, repeat=5):
+    """Median wall time per query shape in milliseconds"""
+    params = sample_params(conn)
+    timings = {}
+    for name, (sql, keys, _) in QUERY_SHAPES.items():
+        values = [params[k] for k in keys]
+        samples = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            conn.execute(sql, values).fetchall()
+            samples.append((time.perf_counter() - started) * 1000)
+        timings[name] = round(statistics.median(samples), 3)
+    return timings
+
+
+# ===== MAINTENANCE =====
+
+def checkpoint(conn):
+    """Truncating WAL checkpoint; a no-op when the database is not in WAL mode"""
+    mode = conn.execute('PRAGMA journal_mode').fetchone()[0]
+    if mode.lower() != 'wal':
+        return {'journal_mode': mode, 'skipped': True}
+    busy, wal_pages, checkpointed = conn.execute('PRAGMA wal_checkpoint(TRUNCATE)').fetchone()
+    return {'journal_mode': mode, 'busy': busy, 'wal_pages': wal_pages, 'checkpointed': checkpointed}
+
+
+def analyze(conn):
+    started = time.perf_counter()
+    conn.execute('ANALYZE')
+    conn.commit()
+    return {'seconds': round(time.perf_counter() - started, 3)}
+
+
+def vacuum(conn, force=False):
+    """VACUUM only when enough of the file is free pages (it rewrites the whole database)"""
+    page_count = conn.execute('PRAGMA page_count').fetchone()[0]
+    free = conn.execute('PRAGMA freelist_count').fetchone()[0]
+    ratio = free / page_count if page_count else 0.0
+    if not force and ratio < VACUUM_FREE_RATIO:
+        return {'skipped': True, 'free_ratio': round(ratio, 4)}
+    started = time.perf_counter()
+    conn.execute('VACUUM')
+    return {'free_ratio': round(ratio, 4), 'seconds': round(time.perf_counter() - started, 3),
+            'pages_before': page_count, 'pages_after': conn.execute('PRAGMA page_count').fetchone()[0]}
+
+
+def load_state(path):
+    try:
+        with open(path, 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def run_due_tasks(conn, state, now=None, force_vacuum=False):
+    """Run each maintenance task whose interval has elapsed; returns what ran"""
+    now = now if now is not None else time.time()
+    tasks = [
+        ('checkpoint', CHECKPOINT_INTERVAL, lambda: checkpoint(conn)),
+        ('analyze', ANALYZE_INTERVAL, lambda: analyze(conn)),
+        ('vacuum', VACUUM_INTERVAL, lambda: vacuum(conn, force_vacuum))
+    ]
+    ran = {}
+    for name, interval, task in tasks:
+        if now - state.get(name, 0) >= interval:
+            ran[name] = task()
+            state[name] = now
+            logger.info(f"{name}: {ran[name]}")
+    return ran
+
+
+# ===== SYNTHETIC BENCHMARK =====
+
+def build_synthetic_db(path, rows, institutions, students_per_institution, seed=42):
+    """Populate a fresh database with realistic attendance volume"""
+    rng = random.Random(seed)
+    conn = sqlite3.connect(path)
+    conn.executescript(BENCHMARK_SCHEMA)
+    conn.executemany('INSERT INTO institutions (id, name, institution_code) VALUES (?, ?, ?)',
+                     [(i, f'Institution {i}', f'INST{i:04d}') for i in range(1, institutions + 1)])
+    students = [(f'S{i:03d}{n:05d}', f'Student {i}-{n}', rng.choice(['CSE', 'BBA', 'EEE', 'Math']),
+                 f'Class {n % 12 + 1}', 'active' if rng.random() > 0.05 else 'inactive', i,
+                 (date(2024, 9, 1) + timedelta(days=rng.randint(0, 365))).isoformat())
+                for i in range(1, institutions + 1) for n in range(students_per_institution)]
+    conn.executemany('INSERT INTO students (id, name, department, class, status, institution_id, created_at) '
+                     'VALUES (?, ?, ?, ?, ?, ?, ?)', students)
+
+    start = date(2025, 1, 6)
+    def attendance_rows():
+        for _ in range(rows):
+            student = students[rng.randrange(len(students))]
+            day = start + timedelta(days=rng.randrange(365))
+            minute = rng.randrange(7 * 60, 16 * 60)
+            yield (day.isoformat(), f'{minute // 60:02d}:{minute % 60:02d}:{rng.randrange(60):02d}',
+                   student[0], student[1], student[2], student[5])
+    conn.executemany('INSERT INTO attendance (date, time, student_id, student_name, department, institution_id) '
+                     'VALUES (?, ?, ?, ?, ?, ?)', attendance_rows())
+    conn.execute("""
+        INSERT INTO attendance_daily (institution_id, student_id, date, first_in, last_out, sighting_count, present)
+        SELECT COALESCE(institution_id, 0), student_id, date, MIN(time), MAX(time), COUNT(*), 1
+        FROM attendance GROUP BY COALESCE(institution_id, 0), student_id, date
+    """)
+    conn.commit()
+    return conn
+
+
+def run_benchmark(args):
+    workdir = tempfile.mkdtemp(prefix='db_maintenance_')
+    path = os.path.join(workdir, 'school.db')
+    print(f"🏗️  Building synthetic database: {args.rows} attendance rows, "
+          f"{args.institutions} institutions x {args.students} students")
+    started = time.perf_counter()
+    conn = build_synthetic_db(path, args.rows, args.institutions, args.students)
+    print(f"   built in {time.perf_counter() - started:.1f}s at {path}")
+
+    analyze(conn)
+    before_plans = analyze_shapes(conn)
+    before = time_shapes(conn, args.repeat)
+    proposals = propose_indexes(conn, before_plans)
+    apply_indexes(conn, proposals)
+    analyze(conn)
+    after_plans = analyze_shapes(conn)
+    after = time_shapes(conn, args.repeat)
+    conn.close()
+
+    results = []
+    for shape, plan in zip(before_plans, after_plans):
+        name = shape['query']
+        results.append({
+            'query': name,
+            'before_ms': before[name],
+            'after_ms': after[name],
+            'speedup': round(before[name] / after[name], 1) if after[name] else None,
+            'plan_before': shape['plan'],
+            'plan_after': plan['plan']
+        })
+        print(f"{name:48} {before[name]:9.2f}ms -> {after[name]:8.2f}ms")
+
+    report = {
+        'dataset': {'attendance_rows': args.rows, 'institutions': args.institutions,
+                    'students_per_institution': args.students, 'path': path},
+        'indexes_applied': proposals,
+        'queries': results,
+        'generated_at': datetime.now().isoformat()
+    }
+    if not args.keep:
+        os.remove(path)
+    return report
+
+
+def print_shapes(shapes):
+    for shape in shapes:
+        if 'skipped' in shape:
+            print(f"⏭️  {shape['query']} (skipped: {shape['skipped']})")
+            continue
+        status = '⚠️ ' if shape['problems'] else '✅'
+        print(f"{status} {shape['query']}")
+        for detail in shape['plan']:
+            print(f"      {detail}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='school.db index advisor and maintenance')
+    parser.add_argument('--db', default=DEFAULT_DB_PATH, help='Path to school.db')
+    parser.add_argument('--output', default='db_maintenance_report.json')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    sub.add_parser('explain', help='Show EXPLAIN QUERY PLAN for every API query shape')
+    advise = sub.add_parser('advise', help='Propose (and optionally apply) missing indexes')
+    advise.add_argument('--apply', action='store_true', help='Create the proposed indexes and ANALYZE')
+
+    maintain = sub.add_parser('maintain', help='Run due ANALYZE / WAL checkpoint / VACUUM tasks')
+    maintain.add_argument('--schedule', action='store_true', help='Keep running, checking for due tasks every minute')
+    maintain.add_argument('--force', action='store_true', help='Run every task now regardless of schedule')
+    maintain.add_argument('--enable-wal', action='store_true', help='Switch the database to WAL journal mode first')
+    maintain.add_argument('--state', default=STATE_FILE, help='Where last-run times are kept')
+
+    bench = sub.add_parser('benchmark', help='Before/after query timings on a synthetic large dataset')
+    bench.add_argument('--rows', type=int, default=500000)
+    bench.add_argument('--institutions', type=int, default=50)
+    bench.add_argument('--students', type=int, default=400, help='Students per institution')
+    bench.add_argument('--repeat', type=int, default=5)
+    bench.add_argument('--keep', action='store_true', help='Keep the synthetic database')
+    args = parser.parse_args()
+
+    if args.command == 'benchmark':
+        report = run_benchmark(args)
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"✅ Report saved to: {args.output}")
+        return 0
+
+    if not os.path.exists(args.db):
+        print(f"❌ Database not found: {args.db}")
+        return 1
+    conn = sqlite3.connect(args.db)
+    try:
+        if args.command == 'explain':
+            print_shapes(analyze_shapes(conn))
+        elif args.command == 'advise':
+            shapes = analyze_shapes(conn)
+            print_shapes(shapes)
+            proposals = propose_indexes(conn, shapes)
+            pending = sorted(SERVER_INDEXES - existing_indexes(conn))
+            if pending:
+                print(f"\nℹ️  Created by server.js on its next start: {', '.join(pending)}")
+            if not proposals:
+                print("\n🎉 No missing indexes")
+                return 0
+            print("\nProposed indexes:")
+            for name, queries in proposals.items():
+                print(f"  {RECOMMENDED_INDEXES[name]};")
+                print(f"      serves: {', '.join(queries)}")
+            if args.apply:
+                apply_indexes(conn, proposals)
+                analyze(conn)
+                print("✅ Indexes created and statistics refreshed")
+        elif args.command == 'maintain':
+            if args.enable_wal:
+                logger.info(f"journal_mode: {conn.execute('PRAGMA journal_mode=WAL').fetchone()[0]}")
+            state = {} if args.force else load_state(args.state)
+            while True:
+                run_due_tasks(conn, state, force_vacuum=args.force)
+                with open(args.state, 'w') as f:
+                    json.dump(state, f, indent=2)
+                if not args.schedule:
+                    break
+                time.sleep(60)
+    except KeyboardInterrupt:
+        logger.info("Maintenance stopped by user")
+    finally:
+        conn.close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,506 @@
+#!/usr/bin/env python3
+"""
+Incremental uploads/ -> Google Drive Mirror for Cheick Mohamed School
+Mirrors uploads/<institution>/students/<Name>/* into the same
+SchoolApp_Photos/<Institution (CODE)>/Students/<Name> layout that
+services/googleDrive.js creates. A local manifest records (path, hash,
+remote id) and cached folder IDs, so reruns only send new or changed files.
+Uploads run with bounded concurrency as chunked resumable sessions that
+survive restarts. Photos whose content is already on Drive are copied
+server-side instead of uploaded again. LocalDrive is a filesystem stand-in
+for tests and dry runs.
+"""
+
+import argparse
+import json
+import logging
+import mimetypes
+import os
+import shutil
+import sqlite3
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+
+try:
+    from google.auth.transport.requests import AuthorizedSession
+    from google.oauth2 import service_account
+except ImportError:  # only needed for the real Drive backend
+    service_account = None
+
+from photo_preprocess import PHOTO_EXTENSIONS, UPLOADS_DIR, file_sha256
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(SCRIPT_DIR)
+DEFAULT_DB_PATH = os.path.join(PROJECT_ROOT, 'database', 'school.db')
+DEFAULT_CREDENTIALS = os.path.join(PROJECT_ROOT, 'config', 'service-account.json')
+MANIFEST_FILE = '.drive_mirror.json'
+ROOT_FOLDER = 'SchoolApp_Photos'
+USER_FOLDERS = {'students': 'Students', 'teachers': 'Teachers'}
+DEFAULT_WORKERS = 4
+CHUNK_SIZE = 8 * 1024 * 1024  # Drive requires multiples of 256 KiB
+MAX_RETRIES = 5
+BACKOFF_BASE_SECONDS = 0.5
+BACKOFF_MAX_SECONDS = 30
+SAVE_INTERVAL_SECONDS = 2.0
+DRIVE_API = 'https://www.googleapis.com/drive/v3'
+DRIVE_UPLOAD_API = 'https://www.googleapis.com/upload/drive/v3'
+FOLDER_MIME = 'application/vnd.google-apps.folder'
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+
+class DriveError(Exception):
+    """Raised for failures that retrying will not fix"""
+
+
+class TransientDriveError(DriveError):
+    """Raised for failures worth retrying (timeouts, 429, 5xx)"""
+
+
+# ===== DRIVE BACKENDS =====
+# Both backends expose: find_folder, create_folder, start_upload, upload_offset,
+# upload_chunk, copy_file and delete_file. upload_offset returns
+# (offset, file_id) for a live session (file_id once complete) or None if the
+# session has expired.
+
+class LocalDrive:
+    """Filesystem stand-in for Drive; IDs are paths relative to root"""
+
+    def __init__(self, root):
+        self.root = root
+        self.sessions_dir = os.path.join(root, '.sessions')
+        os.makedirs(self.sessions_dir, exist_ok=True)
+        self.calls = Counter()
+        self.lock = threading.Lock()
+
+    def _path(self, item_id):
+        return os.path.join(self.root, *item_id.split('/')) if item_id else self.root
+
+    def _count(self, name):
+        with self.lock:
+            self.calls[name] += 1
+
+    def find_folder(self, name, parent_id=None):
+        self._count('find_folder')
+        item_id = f'{parent_id}/{name}' if parent_id else name
+        return item_id if os.path.isdir(self._path(item_id)) else None
+
+    def create_folder(self, name, parent_id=None):
+        self._count('create_folder')
+        item_id = f'{parent_id}/{name}' if parent_id else name
+        os.makedirs(self._path(item_id), exist_ok=True)
+        return item_id
+
+    def start_upload(self, name, parent_id, size, mime_type, file_id=None):
+        self._count('start_upload')
+        session = uuid.uuid4().hex
+        target = file_id or f'{parent_id}/{name}'
+        with open(os.path.join(self.sessions_dir, session + '.json'), 'w', encoding='utf-8') as f:
+            json.dump({'target': target, 'size': size}, f)
+        open(os.path.join(self.sessions_dir, session + '.part'), 'wb').close()
+        return session
+
+    def upload_offset(self, session, size):
+        self._count('upload_offset')
+        info_path = os.path.join(self.sessions_dir, session + '.json')
+        if not os.path.exists(info_path):
+            return None
+        with open(info_path, 'r', encoding='utf-8') as f:
+            info = json.load(f)
+        if info.get('done'):
+            return size, info['target']
+        return os.path.getsize(os.path.join(self.sessions_dir, session + '.part')), None
+
+    def upload_chunk(self, session, data, offset, size):
+        self._count('upload_chunk')
+        part = os.path.join(self.sessions_dir, session + '.part')
+        if os.path.getsize(part) != offset:
+            raise DriveError(f'Chunk offset {offset} does not match session {session}')
+        with open(part, 'ab') as f:
+            f.write(data)
+        offset += len(data)
+        if offset < size:
+            return offset, None
+        info_path = os.path.join(self.sessions_dir, session + '.json')
+        with open(info_path, 'r', encoding='utf-8') as f:
+            info = json.load(f)
+        os.replace(part, self._path(info['target']))
+        info['done'] = True
+        with open(info_path, 'w', encoding='utf-8') as f:
+            json.dump(info, f)
+        return offset, info['target']
+
+    def copy_file(self, file_id, name, parent_id):
+        self._count('copy_file')
+        target = f'{parent_id}/{name}'
+        shutil.copyfile(self._path(file_id), self._path(target))
+        return target
+
+    def delete_file(self, file_id):
+        self._count('delete_file')
+        if os.path.exists(self._path(file_id)):
+            os.remove(self._path(file_id))
+
+
+class GoogleDrive:
+    """Drive v3 REST backend using resumable upload sessions"""
+
+    def __init__(self, credentials_info, timeout=60):
+        if service_account is None:
+            raise DriveError('Google Drive mirroring requires google-auth (pip install google-auth)')
+        credentials = service_account.Credentials.from_service_account_info(
+            credentials_info, scopes=['https://www.googleapis.com/auth/drive'])
+        self.session = AuthorizedSession(credentials)
+        self.timeout = timeout
+
+    def _request(self, method, url, **kwargs):
+        try:
+            response = self.session.request(method, url, timeout=self.timeout, **kwargs)
+        except Exception as e:  # requests/transport errors
+            raise TransientDriveError(str(e))
+        if response.status_code == 429 or response.status_code >= 500:
+            raise TransientDriveError(f'HTTP {response.status_code}')
+        return response
+
+    @staticmethod
+    def _check(response):
+        if response.status_code not in (200, 201, 204):
+            raise DriveError(f'HTTP {response.status_code}: {response.text[:200]}')
+        return response
+
+    def find_folder(self, name, parent_id=None):
+        escaped = name.replace('\\', '\\\\').replace("'", "\\'")
+        query = f"name='{escaped}' and mimeType='{FOLDER_MIME}' and trashed=false"
+        if parent_id:
+            query += f" and '{parent_id}' in parents"
+        files = self._check(self._request('GET', f'{DRIVE_API}/files', params={'q': query, 'fields': 'files(id)'}))
+        files = files.json().get('files', [])
+        return files[0]['id'] if files else None
+
+    def create_folder(self, name, parent_id=None):
+        metadata = {'name': name, 'mimeType': FOLDER_MIME}
+        if parent_id:
+            metadata['parents'] = [parent_id]
+        return self._check(self._request('POST', f'{DRIVE_API}/files', json=metadata)).json()['id']
+
+    def start_upload(self, name, parent_id, size, mime_type, file_id=None):
+        headers = {'X-Upload-Content-Length': str(size), 'X-Upload-Content-Type': mime_type}
+        if file_id:  # new revision of an existing file
+            response = self._request('PATCH', f'{DRIVE_UPLOAD_API}/files/{file_id}',
+                                     params={'uploadType': 'resumable'}, json={}, headers=headers)
+        else:
+            response = self._request('POST', f'{DRIVE_UPLOAD_API}/files', params={'uploadType': 'resumable'},
+                                     json={'name': name, 'parents': [parent_id]}, headers=headers)
+        return self._check(response).headers['Location']
+
+    def upload_offset(self, session, size):
+        response = self._request('PUT', session, headers={'Content-Range': f'bytes */{size}'})
+        if response.status_code in (200, 201):
+            return size, response.json()['id']
+        if response.status_code == 308:
+            received = response.headers.get('Range')
+            return (int(received.rsplit('-', 1)[1]) + 1 if received else 0), None
+        if response.status_code in (404, 410):
+            return None
+        raise DriveError(f'HTTP {response.status_code}: {response.text[:200]}')
+
+    def upload_chunk(self, session, data, offset, size):
+        content_range = f'bytes {offset}-{offset + len(data) - 1}/{size}' if data else f'bytes */{size}'
+        response = self._request('PUT', session, data=data, headers={'Content-Range': content_range})
+        if response.status_code in (200, 201):
+            return size, response.json()['id']
+        if response.status_code == 308:
+            received = response.headers.get('Range')
+            return (int(received.rsplit('-', 1)[1]) + 1 if received else 0), None
+        if response.status_code in (404, 410):
+            raise TransientDriveError('Upload session expired')
+        raise DriveError(f'HTTP {response.status_code}: {response.text[:200]}')
+
+    def copy_file(self, file_id, name, parent_id):
+        response = self._request('POST', f'{DRIVE_API}/files/{file_id}/copy', json={'name': name, 'parents': [parent_id]})
+        return self._check(response).json()['id']
+
+    def delete_file(self, file_id):
+        response = self._request('DELETE', f'{DRIVE_API}/files/{file_id}')
+        if response.status_code != 404:
+            self._check(response)
+
+
+def load_credentials(path):
+    """Service account info from the environment (as on Replit) or config/service-account.json"""
+    if os.getenv('GOOGLE_CLIENT_EMAIL') and os.getenv('GOOGLE_PRIVATE_KEY'):
+        return {
+            'type': os.getenv('GOOGLE_SERVICE_TYPE', 'service_account'),
+            'project_id': os.getenv('GOOGLE_PROJECT_ID'),
+            'private_key_id': os.getenv('GOOGLE_PRIVATE_KEY_ID'),
+            'private_key': os.getenv('GOOGLE_PRIVATE_KEY').replace('\\n', '\n'),
+            'client_email': os.getenv('GOOGLE_CLIENT_EMAIL'),
+            'client_id': os.getenv('GOOGLE_CLIENT_ID'),
+            'token_uri': os.getenv('GOOGLE_TOKEN_URI', 'https://oauth2.googleapis.com/token')
+        }
+    if not os.path.exists(path):
+        raise DriveError(f'Google Drive credentials not found: set GOOGLE_* variables or create {path}')
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def institution_folder_names(db_path):
+    """uploads/ folder name -> 'Name (CODE)' as used by services/googleDrive.js"""
+    if not db_path or not os.path.exists(db_path):
+        return {}
+    conn = sqlite3.connect(db_path)
+    try:
+        rows = conn.execute('SELECT folder_name, name, institution_code FROM institutions '
+                            'WHERE folder_name IS NOT NULL').fetchall()
+    except sqlite3.Error:
+        return {}
+    finally:
+        conn.close()
+    return {folder: f'{name} ({code})' if code else name for folder, name, code in rows}
+
+
+# ===== MIRROR =====
+
+class DriveMirror:
+    """Plans and runs one incremental mirror pass; state lives in the manifest"""
+
+    def __init__(self, drive, uploads_dir=UPLOADS_DIR, manifest_path=None, workers=DEFAULT_WORKERS,
+                 chunk_size=CHUNK_SIZE, folder_names=None, backoff_base=BACKOFF_BASE_SECONDS):
+        self.drive = drive
+        self.uploads_dir = uploads_dir
+        self.manifest_path = manifest_path or os.path.join(uploads_dir, MANIFEST_FILE)
+        self.workers = max(1, workers)
+        self.chunk_size = chunk_size
+        self.folder_names = folder_names or {}
+        self.backoff_base = backoff_base
+        self.lock = threading.Lock()
+        self.last_save = 0.0
+        self.manifest = {'files': {}, 'folders': {}, 'pending': {}}
+        if os.path.exists(self.manifest_path):
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                self.manifest.update(json.load(f))
+
+    def save(self, force=False):
+        with self.lock:
+            now = time.monotonic()
+            if not force and now - self.last_save < SAVE_INTERVAL_SECONDS:
+                return
+            self.last_save = now
+            tmp_path = f'{self.manifest_path}.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self.manifest, f, indent=1, sort_keys=True)
+            os.replace(tmp_path, self.manifest_path)
+
+    def local_files(self):
+        """Yield (relative path, remote folder parts) for every mirrored photo"""
+        for institution in sorted(os.listdir(self.uploads_dir)):
+            for kind, remote_kind in USER_FOLDERS.items():
+                kind_dir = os.path.join(self.uploads_dir, institution, kind)
+                if not os.path.isdir(kind_dir):
+                    continue
+                for person in sorted(os.listdir(kind_dir)):
+                    person_dir = os.path.join(kind_dir, person)
+                    if not os.path.isdir(person_dir):
+                        continue
+                    folder = (ROOT_FOLDER, self.folder_names.get(institution, institution), remote_kind, person)
+                    for name in sorted(os.listdir(person_dir)):
+                        if name.lower().endswith(PHOTO_EXTENSIONS):
+                            yield f'{institution}/{kind}/{person}/{name}', folder
+
+    def content_hash(self, relative, stat):
+        entry = self.manifest['files'].get(relative)
+        if entry and entry['size'] == stat.st_size and entry['mtime'] == stat.st_mtime:
+            return entry['sha256']
+        return file_sha256(os.path.join(self.uploads_dir, *relative.split('/')))
+
+    def folder_id(self, parts):
+        """Resolve a folder path, using and filling the cached folder IDs"""
+        parent_id = None
+        for depth in range(1, len(parts) + 1):
+            key = '/'.join(parts[:depth])
+            cached = self.manifest['folders'].get(key)
+            if cached:
+                parent_id = cached
+                continue
+            name = parts[depth - 1]
+            folder = self.retry(self.drive.find_folder, name, parent_id) or self.retry(
+                self.drive.create_folder, name, parent_id)
+            self.manifest['folders'][key] = parent_id = folder
+        return parent_id
+
+    def retry(self, func, *args):
+        for attempt in range(MAX_RETRIES + 1):
+            try:
+                return func(*args)
+            except TransientDriveError as e:
+                if attempt == MAX_RETRIES:
+                    raise
+                delay = min(BACKOFF_MAX_SECONDS, self.backoff_base * 2 ** attempt)
+                logger.warning(f"{func.__name__} failed ({e}), retrying in {delay:.1f}s")
+                time.sleep(delay)
+
+    def plan(self):
+        """Files that are new or changed since they were last mirrored"""
+        tasks, unchanged, live = [], 0, set()
+        for relative, folder in self.local_files():
+            live.add(relative)
+            stat = os.stat(os.path.join(self.uploads_dir, *relative.split('/')))
+            content_hash = self.content_hash(relative, stat)
+            entry = self.manifest['files'].get(relative)
+            if entry and entry['sha256'] == content_hash and entry.get('remote_id'):
+                entry['mtime'] = stat.st_mtime
+                unchanged += 1
+                continue
+            tasks.append({'path': relative, 'folder': folder, 'sha256': content_hash,
+                          'size': stat.st_size, 'mtime': stat.st_mtime,
+                          'remote_id': entry.get('remote_id') if entry else None})
+        removed = sorted(set(self.manifest['files']) - live)
+        return tasks, unchanged, removed
+
+    def transfer(self, task, parent_id):
+        """Resumable chunked upload of one file; returns the remote file id"""
+        relative, size = task['path'], task['size']
+        pending = self.manifest['pending'].get(relative)
+        offset = 0
+        if pending and pending['sha256'] == task['sha256']:
+            status = self.drive.upload_offset(pending['session'], size)
+            if status is None:
+                pending = None
+            else:
+                offset, file_id = status
+                if file_id:
+                    return file_id
+        else:
+            pending = None
+        if pending is None:
+            mime_type = mimetypes.guess_type(relative)[0] or 'application/octet-stream'
+            session = self.drive.start_upload(os.path.basename(relative), parent_id, size, mime_type,
+                                              task['remote_id'])
+            with self.lock:
+                self.manifest['pending'][relative] = {'session': session, 'sha256': task['sha256']}
+            self.save(force=True)
+            pending = self.manifest['pending'][relative]
+
+        with open(os.path.join(self.uploads_dir, *relative.split('/')), 'rb') as f:
+            while True:
+                f.seek(offset)
+                offset, file_id = self.drive.upload_chunk(pending['session'], f.read(self.chunk_size), offset, size)
+                if file_id:
+                    return file_id
+
+    def mirror_file(self, task, parent_id, remote_by_hash):
+        """Copy server-side when the content is already on Drive, otherwise upload"""
+        source_id = remote_by_hash.get(task['sha256'])
+        if source_id and not task['remote_id']:
+            try:
+                return 'copied', self.retry(self.drive.copy_file, source_id, os.path.basename(task['path']), parent_id)
+            except DriveError as e:
+                logger.warning(f"Server-side copy failed for {task['path']} ({e}); uploading instead")
+        return 'uploaded', self.retry(self.transfer, task, parent_id)
+
+    def run(self, delete=False, dry_run=False):
+        started = time.perf_counter()
+        tasks, unchanged, removed = self.plan()
+        report = {'planned': len(tasks), 'unchanged': unchanged, 'uploaded': 0, 'copied': 0, 'failed': 0,
+                  'deleted': 0, 'stale_remote': 0 if delete else len(removed), 'bytes_uploaded': 0,
+                  'dry_run': dry_run}
+        if dry_run:
+            report['bytes_to_upload'] = sum(task['size'] for task in tasks)
+            report['seconds'] = round(time.perf_counter() - started, 3)
+            return report
+
+        # Folders are resolved up front, one at a time, so concurrent uploads never race to create them
+        parents = {}
+        for task in tasks:
+            if task['folder'] not in parents:
+                parents[task['folder']] = self.folder_id(task['folder'])
+        remote_by_hash = {entry['sha256']: entry['remote_id'] for entry in self.manifest['files'].values()
+                          if entry.get('remote_id')}
+
+        # Send each distinct content once; repeats wait for it and become server-side copies
+        first, repeats, seen = [], [], set(remote_by_hash)
+        for task in tasks:
+            (repeats if task['sha256'] in seen and not task['remote_id'] else first).append(task)
+            seen.add(task['sha256'])
+
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            for batch in (first, repeats):
+                futures = {pool.submit(self.mirror_file, task, parents[task['folder']], remote_by_hash): task
+                           for task in batch}
+                for future in as_completed(futures):
+                    task = futures[future]
+                    try:
+                        action, remote_id = future.result()
+                    except (DriveError, OSError) as e:
+                        report['failed'] += 1
+                        logger.error(f"Failed to mirror {task['path']}: {e}")
+                        continue
+                    with self.lock:
+                        self.manifest['pending'].pop(task['path'], None)
+                        self.manifest['files'][task['path']] = {
+                            'sha256': task['sha256'], 'size': task['size'], 'mtime': task['mtime'],
+                            'remote_id': remote_id, 'mirrored_at': datetime.now().isoformat()}
+                        remote_by_hash.setdefault(task['sha256'], remote_id)
+                    report[action] += 1
+                    if action == 'uploaded':
+                        report['bytes_uploaded'] += task['size']
+                    self.save()
+
+        if delete:
+            for relative in removed:
+                entry = self.manifest['files'][relative]
+                try:
+                    self.retry(self.drive.delete_file, entry['remote_id'])
+                except DriveError as e:
+                    report['failed'] += 1
+                    logger.error(f"Failed to delete remote copy of {relative}: {e}")
+                    continue
+                del self.manifest['files'][relative]
+                report['deleted'] += 1
+        self.save(force=True)
+
+        elapsed = time.perf_counter() - started
+        report['seconds'] = round(elapsed, 3)
+        report['mb_per_sec'] = round(report['bytes_uploaded'] / elapsed / 1e6, 2) if elapsed else 0.0
+        return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Mirror uploads/ to Google Drive incrementally')
+    parser.add_argument('--uploads', default=UPLOADS_DIR, help='uploads/ directory')
+    parser.add_argument('--manifest', default=None, help=f'Mirror manifest (default: uploads/{MANIFEST_FILE})')
+    parser.add_argument('--db', default=DEFAULT_DB_PATH, help='school.db for institution folder names')
+    parser.add_argument('--credentials', default=DEFAULT_CREDENTIALS, help='Service account JSON')
+    parser.add_argument('--local-root', default=None, help='Mirror into this directory instead of Drive')
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS, help='Concurrent transfers')
+    parser.add_argument('--chunk-mb', type=int, default=CHUNK_SIZE // (1024 * 1024), help='Upload chunk size in MiB')
+    parser.add_argument('--delete', action='store_true', help='Delete remote copies of removed photos')
+    parser.add_argument('--dry-run', action='store_true', help='Only report what would be sent')
+    args = parser.parse_args()
+
+    try:
+        drive = LocalDrive(args.local_root) if args.local_root else GoogleDrive(load_credentials(args.credentials))
+        mirror = DriveMirror(drive, args.uploads, args.manifest, args.workers, args.chunk_mb * 1024 * 1024,
+                             institution_folder_names(args.db))
+        report = mirror.run(delete=args.delete, dry_run=args.dry_run)
+    except DriveError as e:
+        print(f"❌ {e}")
+        return 1
+    except KeyboardInterrupt:
+        print("\n⏸️  Mirror interrupted; re-run to resume pending uploads")
+        return 130
+
+    print(f"☁️  {report['uploaded']} uploaded, {report['copied']} copied server-side, "
+          f"{report['unchanged']} unchanged, {report['deleted']} deleted, {report['failed']} failed "
+          f"({report['seconds']}s)")
+    return 1 if report['failed'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
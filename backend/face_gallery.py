@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+"""
+Face Gallery Exporter for Cheick Mohamed School
+Packs the normalized enrollment photos of each institution into one
+memory-mappable uint8 array (uploads/<institution>/gallery/faces.npy) plus an
+ID/offset table (faces.json), so the recognizer can np.load(..., mmap_mode='r')
+its gallery instead of decoding the uploads/ tree on every start. Rebuilds
+copy unchanged students' rows from the previous gallery and only decode
+students whose photos changed.
+"""
+
+import argparse
+import json
+import logging
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import numpy as np
+from PIL import Image
+
+from photo_preprocess import UPLOADS_DIR, PhotoPreprocessor, find_photos, generate_photos, output_paths
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(SCRIPT_DIR)
+DEFAULT_DB_PATH = os.path.join(PROJECT_ROOT, 'database', 'school.db')
+GALLERY_DIR = 'gallery'
+ARRAY_FILE = 'faces.npy'
+TABLE_FILE = 'faces.json'
+GALLERY_VERSION = 1
+FACE_SIZE = 112
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+
+def gallery_paths(uploads_dir, institution):
+    folder = os.path.join(uploads_dir, institution, GALLERY_DIR)
+    return os.path.join(folder, ARRAY_FILE), os.path.join(folder, TABLE_FILE)
+
+
+def face_crop(path, size=FACE_SIZE):
+    """Centered square crop of a processed photo as a (size, size, 3) uint8 array"""
+    with Image.open(path) as image:
+        image.draft('RGB', (size, size))
+        image = image.convert('RGB')
+        width, height = image.size
+        side = min(width, height)
+        left, top = (width - side) // 2, (height - side) // 2
+        crop = image.resize((size, size), Image.BILINEAR, box=(left, top, left + side, top + side))
+        return np.asarray(crop, dtype=np.uint8)
+
+
+def load_student_ids(db_path, institution):
+    """Student folder name -> students.id for folders referenced by photo_directory"""
+    if not db_path or not os.path.exists(db_path):
+        return {}
+    prefix = f'uploads/{institution}/students/'
+    conn = sqlite3.connect(db_path)
+    try:
+        rows = conn.execute('SELECT id, photo_directory FROM students WHERE photo_directory LIKE ?',
+                            (prefix + '%',)).fetchall()
+    finally:
+        conn.close()
+    return {directory[len(prefix):]: student_id for student_id, directory in rows}
+
+
+class FaceGallery:
+    """Read-only, zero-copy view of an exported gallery"""
+
+    def __init__(self, uploads_dir, institution):
+        array_path, table_path = gallery_paths(uploads_dir, institution)
+        with open(table_path, 'r', encoding='utf-8') as f:
+            self.table = json.load(f)
+        self.faces = np.load(array_path, mmap_mode='r')
+        if self.faces.shape[0] != self.table['rows']:
+            raise ValueError(f'Gallery {array_path} has {self.faces.shape[0]} rows, table expects {self.table["rows"]}')
+        self.students = {entry['student']: entry for entry in self.table['students']}
+        self.by_id = {entry['student_id']: entry for entry in self.table['students'] if entry['student_id']}
+
+    def rows(self, entry):
+        return self.faces[entry['offset']:entry['offset'] + entry['count']]
+
+    def student_faces(self, student):
+        return self.rows(self.students[student])
+
+    def labels(self):
+        """Per-row student folder names, aligned with faces"""
+        labels = []
+        for entry in self.table['students']:
+            labels.extend([entry['student']] * entry['count'])
+        return labels
+
+
+def current_photos(uploads_dir, institution, preprocessor):
+    """Student -> sorted distinct processed-photo hashes, for photos that have been preprocessed"""
+    students = {}
+    for inst, student, path in find_photos(uploads_dir):
+        if inst != institution:
+            continue
+        hashes = students.setdefault(student, [])
+        content_hash = preprocessor.content_hash(path)
+        processed, _ = output_paths(uploads_dir, institution, student, content_hash)
+        if content_hash not in hashes and os.path.exists(processed):
+            hashes.append(content_hash)
+        elif not os.path.exists(processed):
+            logger.warning(f"No processed image for {path}; run photo_preprocess.py first")
+    return {student: sorted(hashes) for student, hashes in students.items()}
+
+
+def build_gallery(uploads_dir, institution, db_path=None, preprocessor=None):
+    """Write (or incrementally update) one institution's gallery; returns a summary"""
+    started = time.perf_counter()
+    preprocessor = preprocessor or PhotoPreprocessor(uploads_dir)
+    photos = current_photos(uploads_dir, institution, preprocessor)
+    preprocessor.save_manifest()
+    student_ids = load_student_ids(db_path, institution)
+    array_path, table_path = gallery_paths(uploads_dir, institution)
+
+    previous, old_faces = {}, None
+    if os.path.exists(array_path) and os.path.exists(table_path):
+        try:
+            old = FaceGallery(uploads_dir, institution)
+            if old.table.get('version') == GALLERY_VERSION and old.table.get('face_size') == FACE_SIZE:
+                previous, old_faces = old.students, old.faces
+        except (OSError, ValueError) as e:
+            logger.warning(f"Rebuilding {institution} gallery from scratch: {e}")
+
+    students, offset = [], 0
+    for student in sorted(photos):
+        hashes = photos[student]
+        if not hashes:
+            continue
+        students.append({'student': student, 'student_id': student_ids.get(student), 'offset': offset,
+                         'count': len(hashes), 'hashes': hashes})
+        offset += len(hashes)
+
+    unchanged = [entry for entry in students
+                 if entry['student'] in previous and previous[entry['student']]['hashes'] == entry['hashes']]
+    if (len(unchanged) == len(students) == len(previous)
+            and all(previous[e['student']]['offset'] == e['offset'] for e in students)
+            and all(previous[e['student']]['student_id'] == e['student_id'] for e in students)):
+        return {'institution': institution, 'students': len(students), 'faces': offset,
+                'decoded_students': 0, 'copied_students': len(students), 'written': False,
+                'seconds': round(time.perf_counter() - started, 3)}
+
+    os.makedirs(os.path.dirname(array_path), exist_ok=True)
+    tmp_array = array_path + '.tmp.npy'
+    faces = np.lib.format.open_memmap(tmp_array, mode='w+', dtype=np.uint8,
+                                      shape=(offset, FACE_SIZE, FACE_SIZE, 3))
+    unchanged_names = {entry['student'] for entry in unchanged}
+    for entry in students:
+        target = faces[entry['offset']:entry['offset'] + entry['count']]
+        if entry['student'] in unchanged_names:
+            old_entry = previous[entry['student']]
+            target[:] = old_faces[old_entry['offset']:old_entry['offset'] + old_entry['count']]
+            continue
+        for row, content_hash in enumerate(entry['hashes']):
+            processed, _ = output_paths(uploads_dir, institution, entry['student'], content_hash)
+            target[row] = face_crop(processed)
+    faces.flush()
+    del faces, old_faces, previous
+
+    table = {
+        'version': GALLERY_VERSION,
+        'institution': institution,
+        'face_size': FACE_SIZE,
+        'dtype': 'uint8',
+        'layout': 'NHWC',
+        'rows': offset,
+        'generated_at': datetime.now().isoformat(),
+        'students': students
+    }
+    os.replace(tmp_array, array_path)
+    with open(table_path + '.tmp', 'w', encoding='utf-8') as f:
+        json.dump(table, f, indent=1)
+    os.replace(table_path + '.tmp', table_path)
+
+    return {'institution': institution, 'students': len(students), 'faces': offset,
+            'decoded_students': len(students) - len(unchanged), 'copied_students': len(unchanged),
+            'written': True, 'seconds': round(time.perf_counter() - started, 3)}
+
+
+def institutions_with_students(uploads_dir):
+    return [name for name in sorted(os.listdir(uploads_dir))
+            if os.path.isdir(os.path.join(uploads_dir, name, 'students'))]
+
+
+# ===== BENCHMARK =====
+
+def run_benchmark(students, photos_per_student):
+    """Build, rebuild and load a synthetic gallery; compare with decoding every image"""
+    workdir = tempfile.mkdtemp(prefix='face_gallery_')
+    try:
+        count = students * photos_per_student
+        print(f"🖼️  Generating {count} photos for {students} students in {workdir}")
+        generate_photos(workdir, count, size=(480, 640), institutions=1, photos_per_student=photos_per_student)
+        institution = 'school_0'
+        PhotoPreprocessor(workdir).run()
+
+        results = {'cold_build': build_gallery(workdir, institution)}
+        results['unchanged_rebuild'] = build_gallery(workdir, institution)
+        student_dir = os.path.join(workdir, institution, 'students', sorted(os.listdir(
+            os.path.join(workdir, institution, 'students')))[0])
+        victim = os.path.join(student_dir, sorted(os.listdir(student_dir))[0])
+        Image.new('RGB', (480, 640), (10, 20, 30)).save(victim, 'JPEG')
+        PhotoPreprocessor(workdir).run()
+        results['one_student_changed'] = build_gallery(workdir, institution)
+
+        load_started = time.perf_counter()
+        gallery = FaceGallery(workdir, institution)
+        checksum = int(gallery.faces[::max(1, len(gallery.faces) // 100)].sum())
+        results['mmap_load_seconds'] = round(time.perf_counter() - load_started, 4)
+
+        decode_started = time.perf_counter()
+        for entry in gallery.table['students']:
+            for content_hash in entry['hashes']:
+                face_crop(output_paths(workdir, institution, entry['student'], content_hash)[0])
+        results['decode_all_seconds'] = round(time.perf_counter() - decode_started, 3)
+        results['gallery_bytes'] = os.path.getsize(gallery_paths(workdir, institution)[0])
+        results['checksum'] = checksum
+        return {'students': students, 'photos_per_student': photos_per_student, 'runs': results,
+                'generated_at': datetime.now().isoformat()}
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Export memory-mappable face galleries')
+    parser.add_argument('--uploads', default=UPLOADS_DIR, help='uploads/ directory')
+    parser.add_argument('--db', default=DEFAULT_DB_PATH, help='school.db used to attach student IDs')
+    parser.add_argument('--institution', action='append', help='Only this institution folder (repeatable)')
+    parser.add_argument('--preprocess', action='store_true', help='Run photo preprocessing first')
+    parser.add_argument('--benchmark', type=int, default=0, help='Benchmark with N synthetic students instead')
+    parser.add_argument('--photos-per-student', type=int, default=2)
+    parser.add_argument('--output', default='face_gallery_report.json')
+    args = parser.parse_args()
+
+    if args.benchmark:
+        report = run_benchmark(args.benchmark, args.photos_per_student)
+        for name, value in report['runs'].items():
+            print(f"   {name}: {value}")
+    else:
+        preprocessor = PhotoPreprocessor(args.uploads)
+        if args.preprocess:
+            preprocessor.run()
+        report = {'institutions': [], 'generated_at': datetime.now().isoformat()}
+        for institution in args.institution or institutions_with_students(args.uploads):
+            summary = build_gallery(args.uploads, institution, args.db, preprocessor)
+            report['institutions'].append(summary)
+            print(f"🧑 {institution}: {summary['faces']} faces for {summary['students']} students, "
+                  f"{summary['decoded_students']} decoded, {summary['copied_students']} reused "
+                  f"({summary['seconds']}s)")
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"✅ Report saved to: {args.output}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
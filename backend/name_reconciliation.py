@@ -0,0 +1,358 @@
+#!/usr/bin/env python3
+"""
+Name-to-Student Reconciliation for Cheick Mohamed School
+Matches recognizer names ("tonmoy", "Fatima Al Zahra") to roster students
+using normalized tokens and character trigrams. Used by the sync daemon when
+an event's ID is unknown, and offline to clean up existing attendance rows.
+"""
+
+import argparse
+import json
+import logging
+import os
+import random
+import re
+import sqlite3
+import statistics
+import sys
+import time
+import unicodedata
+from datetime import datetime
+from functools import lru_cache
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(SCRIPT_DIR)
+DEFAULT_DB_PATH = os.path.join(PROJECT_ROOT, 'database', 'school.db')
+
+MIN_SCORE = 0.60          # best candidate must score at least this
+AMBIGUITY_MARGIN = 0.05   # and beat the runner-up by this much
+NGRAM_SIZE = 3
+LOOKUP_CACHE_SIZE = 4096
+
+logger = logging.getLogger(__name__)
+
+NON_ALNUM = re.compile(r'[^0-9a-z]+')
+
+
+def normalize_name(name):
+    """'Fatima Al-Zahra' -> 'fatima al zahra' (diacritics, case and punctuation removed)"""
+    decomposed = unicodedata.normalize('NFKD', str(name or ''))
+    stripped = ''.join(ch for ch in decomposed if not unicodedata.combining(ch))
+    return NON_ALNUM.sub(' ', stripped.casefold()).strip()
+
+
+def name_ngrams(normalized):
+    """Character trigrams of each token, padded so short names and word starts count"""
+    grams = set()
+    for token in normalized.split():
+        padded = f' {token} '
+        grams.update(padded[i:i + NGRAM_SIZE] for i in range(max(1, len(padded) - NGRAM_SIZE + 1)))
+    return grams
+
+
+class Match:
+    """Best candidate for a name lookup"""
+
+    __slots__ = ('student_id', 'name', 'department', 'score', 'ambiguous')
+
+    def __init__(self, student_id, name, department, score, ambiguous):
+        self.student_id = student_id
+        self.name = name
+        self.department = department
+        self.score = score
+        self.ambiguous = ambiguous
+
+    @property
+    def confident(self):
+        return self.score >= MIN_SCORE and not self.ambiguous
+
+    def to_dict(self):
+        return {'student_id': self.student_id, 'name': self.name, 'department': self.department,
+                'score': round(self.score, 4), 'ambiguous': self.ambiguous}
+
+
+class NameIndex:
+    """Inverted token and trigram index over student names"""
+
+    def __init__(self, students):
+        """students: iterable of dicts with id, name and optional department / institution_id"""
+        self.students = []
+        self.token_postings = {}
+        self.gram_postings = {}
+        self.gram_sets = []
+        for student in students:
+            normalized = normalize_name(student.get('name'))
+            if not normalized:
+                continue
+            slot = len(self.students)
+            grams = name_ngrams(normalized)
+            self.students.append((student['id'], student.get('name'), student.get('department'),
+                                  student.get('institution_id'), set(normalized.split())))
+            self.gram_sets.append(frozenset(grams))
+            for token in set(normalized.split()):
+                self.token_postings.setdefault(token, []).append(slot)
+            for gram in grams:
+                self.gram_postings.setdefault(gram, []).append(slot)
+        self.lookup = lru_cache(maxsize=LOOKUP_CACHE_SIZE)(self._lookup)
+
+    def __len__(self):
+        return len(self.students)
+
+    def _lookup(self, name, department=None, institution_id=None):
+        """Best Match for a name, or None when nothing shares a trigram with it"""
+        normalized = normalize_name(name)
+        if not normalized:
+            return None
+        query_grams = name_ngrams(normalized)
+        query_tokens = set(normalized.split())
+
+        candidates = self.candidates(query_tokens, query_grams)
+        if not candidates:
+            return None
+
+        scored = []
+        query_size = len(query_grams)
+        dept = normalize_name(department) if department else None
+        for slot in candidates:
+            student_id, full_name, student_dept, inst, tokens = self.students[slot]
+            if institution_id is not None and inst is not None and inst != institution_id:
+                continue
+            grams = self.gram_sets[slot]
+            overlap = len(query_grams & grams)
+            # Containment rewards partial names ("tonmoy" in "tonmoy ahmed"); Dice penalizes extra tokens
+            containment = overlap / query_size
+            dice = 2 * overlap / (query_size + len(grams))
+            score = 0.6 * containment + 0.4 * dice
+            partial = query_tokens < tokens or (len(query_tokens) == 1 and query_tokens <= tokens)
+            if query_tokens <= tokens:
+                score += 0.1  # every query token is an exact roster token
+            if dept and student_dept and normalize_name(student_dept) == dept:
+                score += 0.05
+            scored.append((score, partial, slot))
+        if not scored:
+            return None
+
+        scored.sort(reverse=True)
+        best_score, best_partial, best_slot = scored[0]
+        runner_up = scored[1][0] if len(scored) > 1 else 0.0
+        # "tonmoy" with two Tonmoys on the roster is ambiguous however the surnames score;
+        # a single-token query never settles between names that all contain it
+        ambiguous = best_score - runner_up < AMBIGUITY_MARGIN or (
+            best_partial and sum(1 for _, partial, _ in scored if partial) > 1)
+        student_id, full_name, student_dept, _, _ = self.students[best_slot]
+        return Match(student_id, full_name, student_dept, min(best_score, 1.0), ambiguous)
+
+    def candidates(self, query_tokens, query_grams):
+        """Slots worth scoring: students holding every exact query token, else trigram neighbours"""
+        exact = None
+        for token in query_tokens:
+            postings = self.token_postings.get(token)
+            if postings is None:
+                exact = None
+                break
+            exact = set(postings) if exact is None else exact.intersection(postings)
+        if exact:
+            return exact
+
+        # Misspelt tokens: a candidate sharing at least half of the query trigrams must
+        # contain one of the rarest (len - needed + 1) of them, so only those postings are read
+        needed = max(1, len(query_grams) // 2)
+        rarest = sorted(query_grams, key=lambda g: len(self.gram_postings.get(g, ())))
+        found = set()
+        for gram in rarest[:len(rarest) - needed + 1]:
+            found.update(self.gram_postings.get(gram, ()))
+        return found
+
+    def reconcile(self, name, department=None, institution_id=None):
+        """Confident Match or None"""
+        match = self.lookup(name, department, institution_id)
+        return match if match is not None and match.confident else None
+
+
+def load_students(conn, institution_id=None):
+    query = "SELECT id, name, department, institution_id FROM students WHERE status = 'active'"
+    params = []
+    if institution_id is not None:
+        query += ' AND institution_id = ?'
+        params.append(institution_id)
+    return [{'id': r[0], 'name': r[1], 'department': r[2], 'institution_id': r[3]}
+            for r in conn.execute(query, params)]
+
+
+# ===== PRECISION REPORT =====
+
+def perturb(name, rng):
+    """A recognizer-style variant of a roster name"""
+    tokens = name.split()
+    variant = rng.choice(['lower', 'first', 'ascii', 'typo', 'hyphen', 'swap'])
+    if variant == 'lower':
+        return name.lower(), variant
+    if variant == 'first':
+        return tokens[0].lower(), variant
+    if variant == 'ascii':
+        return unicodedata.normalize('NFKD', name).encode('ascii', 'ignore').decode(), variant
+    if variant == 'hyphen':
+        return name.replace('-', ' ').replace(' ', '-', 1), variant
+    if variant == 'swap':
+        return ' '.join(reversed(tokens)), variant
+    i = rng.randrange(len(name))
+    return name[:i] + name[i + 1:], variant
+
+
+def precision_report(index, students, samples=2000, seed=42):
+    """Match perturbed roster names back and measure precision, coverage and latency"""
+    rng = random.Random(seed)
+    by_variant = {}
+    latencies = []
+    matched = correct = 0
+    for _ in range(samples):
+        student = rng.choice(students)
+        query, variant = perturb(student['name'], rng)
+        started = time.perf_counter()
+        match = index._lookup(query, student.get('department'))
+        latencies.append((time.perf_counter() - started) * 1000)
+        stats = by_variant.setdefault(variant, {'queries': 0, 'matched': 0, 'correct': 0})
+        stats['queries'] += 1
+        if match is not None and match.confident:
+            matched += 1
+            stats['matched'] += 1
+            if match.student_id == student['id']:
+                correct += 1
+                stats['correct'] += 1
+
+    for stats in by_variant.values():
+        stats['precision'] = round(stats['correct'] / stats['matched'], 4) if stats['matched'] else None
+        stats['coverage'] = round(stats['matched'] / stats['queries'], 4)
+    latencies.sort()
+    return {
+        'students': len(index),
+        'queries': samples,
+        'precision': round(correct / matched, 4) if matched else None,
+        'coverage': round(matched / samples, 4),
+        'mean_lookup_ms': round(statistics.mean(latencies), 4),
+        'p99_lookup_ms': round(latencies[int(len(latencies) * 0.99) - 1], 4),
+        'by_variant': by_variant
+    }
+
+
+# ===== BULK CLEANUP =====
+
+def find_orphan_rows(conn):
+    """Attendance rows whose student_id matches no student, grouped by (student_id, name)"""
+    return conn.execute("""
+        SELECT a.student_id, a.student_name, a.department, a.institution_id, COUNT(*)
+        FROM attendance a LEFT JOIN students s ON s.id = a.student_id
+        WHERE s.id IS NULL
+        GROUP BY a.student_id, a.student_name, a.department, a.institution_id
+    """).fetchall()
+
+
+def rebuild_rollups(conn, student_ids):
+    """Recompute attendance_daily for the given students after their rows moved.
+
+    Only days still in attendance are rebuilt; rollups for days the archiver has
+    moved out have no raw rows left to rebuild from, so they are kept as they are.
+    """
+    for student_id in student_ids:
+        conn.execute("""
+            DELETE FROM attendance_daily WHERE student_id = ? AND EXISTS (
+                SELECT 1 FROM attendance a
+                WHERE a.date = attendance_daily.date AND COALESCE(a.institution_id, 0) = attendance_daily.institution_id)
+        """, (student_id,))
+        conn.execute("""
+            INSERT INTO attendance_daily (institution_id, student_id, date, first_in, last_out, sighting_count, present)
+            SELECT COALESCE(institution_id, 0), student_id, date, MIN(time), MAX(time), COUNT(*), 1
+            FROM attendance WHERE student_id = ? GROUP BY COALESCE(institution_id, 0), date
+        """, (student_id,))
+
+
+def cleanup(conn, index, apply=False):
+    proposals = []
+    unmatched = []
+    for student_id, name, department, institution_id, rows in find_orphan_rows(conn):
+        match = index.lookup(name, department, institution_id)
+        entry = {'student_id': student_id, 'student_name': name, 'institution_id': institution_id, 'rows': rows}
+        if match is not None and match.confident:
+            proposals.append(dict(entry, match=match.to_dict()))
+        else:
+            unmatched.append(dict(entry, best=match.to_dict() if match else None))
+
+    if apply and proposals:
+        touched = set()
+        for p in proposals:
+            m = p['match']
+            conn.execute("""
+                UPDATE attendance SET student_id = ?, student_name = ?, department = COALESCE(?, department)
+                WHERE student_id = ? AND student_name = ? AND institution_id IS ?
+            """, (m['student_id'], m['name'], m['department'], p['student_id'], p['student_name'], p['institution_id']))
+            touched.update((p['student_id'], m['student_id']))
+        try:
+            rebuild_rollups(conn, touched)
+        except sqlite3.OperationalError as e:
+            logger.warning(f"attendance_daily not rebuilt: {e}")
+        conn.commit()
+
+    return {
+        'orphan_groups': len(proposals) + len(unmatched),
+        'reconciled_groups': len(proposals),
+        'reconciled_rows': sum(p['rows'] for p in proposals),
+        'unmatched_rows': sum(u['rows'] for u in unmatched),
+        'applied': apply,
+        'proposals': proposals,
+        'unmatched': unmatched
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Reconcile recognizer names with roster students')
+    parser.add_argument('--db', default=DEFAULT_DB_PATH, help='Path to school.db')
+    parser.add_argument('--institution', type=int, default=None)
+    parser.add_argument('--output', default='name_reconciliation_report.json')
+    sub = parser.add_subparsers(dest='command', required=True)
+    lookup = sub.add_parser('lookup', help='Match one name')
+    lookup.add_argument('name')
+    lookup.add_argument('--department', default=None)
+    evaluate = sub.add_parser('evaluate', help='Precision report on perturbed roster names')
+    evaluate.add_argument('--samples', type=int, default=2000)
+    clean = sub.add_parser('cleanup', help='Reconcile attendance rows with unknown student IDs')
+    clean.add_argument('--apply', action='store_true', help='Rewrite the matched rows (default: report only)')
+    args = parser.parse_args()
+    # Configured here rather than at import: the sync daemon imports this module
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    if not os.path.exists(args.db):
+        print(f"❌ Database not found: {args.db}")
+        return 1
+    conn = sqlite3.connect(args.db)
+    try:
+        students = load_students(conn, args.institution)
+        started = time.perf_counter()
+        index = NameIndex(students)
+        logger.info(f"Indexed {len(index)} students in {(time.perf_counter() - started) * 1000:.1f}ms")
+
+        if args.command == 'lookup':
+            match = index.lookup(args.name, args.department, args.institution)
+            print(json.dumps(match.to_dict() if match else None, indent=2))
+            return 0
+        if args.command == 'evaluate':
+            if not students:
+                print("❌ No active students to evaluate against")
+                return 1
+            report = precision_report(index, students, args.samples)
+            print(f"Precision: {report['precision']}, coverage: {report['coverage']}, "
+                  f"mean lookup: {report['mean_lookup_ms']}ms, p99: {report['p99_lookup_ms']}ms")
+        else:
+            report = cleanup(conn, index, args.apply)
+            print(f"{report['reconciled_rows']} rows in {report['reconciled_groups']} groups "
+                  f"{'reconciled' if args.apply else 'can be reconciled'}; {report['unmatched_rows']} rows unmatched")
+        report['generated_at'] = datetime.now().isoformat()
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"✅ Report saved to: {args.output}")
+    finally:
+        conn.close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
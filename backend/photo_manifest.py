@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+Student Photo Manifest Indexer for Cheick Mohamed School
+Walks uploads/<institution>/students/* and writes one photo_manifest.json per
+institution (file, size, dimensions, content hash, thumbnail path) so that
+GET /api/students/:id/photos can answer without scanning directories.
+Reruns only hash and measure files whose size or mtime changed.
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+from datetime import datetime
+
+from PIL import Image
+
+from photo_preprocess import UPLOADS_DIR, PhotoPreprocessor, file_sha256, output_paths
+
+MANIFEST_FILE = 'photo_manifest.json'
+MANIFEST_VERSION = 1
+# Same filter the photos endpoint has always applied
+MANIFEST_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.gif')
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+
+def manifest_path(uploads_dir, institution):
+    return os.path.join(uploads_dir, institution, MANIFEST_FILE)
+
+
+def load_manifest(path):
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError) as e:
+        logger.warning(f"Ignoring unreadable manifest {path}: {e}")
+        return None
+    return manifest if manifest.get('version') == MANIFEST_VERSION else None
+
+
+def describe_photo(uploads_dir, institution, student, filename, stat):
+    """Full manifest entry for one photo: hash plus dimensions read from the image header"""
+    source = os.path.join(uploads_dir, institution, 'students', student, filename)
+    content_hash = file_sha256(source)
+    try:
+        with Image.open(source) as image:
+            width, height = image.size
+    except OSError:
+        width = height = None
+    return {
+        'filename': filename,
+        'path': f'uploads/{institution}/students/{student}/{filename}',
+        'size': stat.st_size,
+        'mtime': stat.st_mtime,
+        'width': width,
+        'height': height,
+        'sha256': content_hash,
+        'thumbnail': None
+    }
+
+
+def thumbnail_for(uploads_dir, institution, student, content_hash):
+    """Relative thumbnail path if photo_preprocess has produced one for this content"""
+    _, thumbnail = output_paths(uploads_dir, institution, student, content_hash)
+    if not os.path.exists(thumbnail):
+        return None
+    return os.path.relpath(thumbnail, os.path.dirname(uploads_dir)).replace(os.sep, '/')
+
+
+def index_institution(uploads_dir, institution):
+    """Update one institution's manifest; returns counts of reused and (re)indexed photos"""
+    path = manifest_path(uploads_dir, institution)
+    previous = load_manifest(path) or {'students': {}}
+    known = {entry['path']: entry for entries in previous['students'].values() for entry in entries}
+
+    students_dir = os.path.join(uploads_dir, institution, 'students')
+    students, reused, indexed = {}, 0, 0
+    newest_folder = 0.0
+    for student in sorted(os.listdir(students_dir)):
+        student_dir = os.path.join(students_dir, student)
+        if not os.path.isdir(student_dir):
+            continue
+        newest_folder = max(newest_folder, os.stat(student_dir).st_mtime)
+        entries = []
+        for filename in sorted(os.listdir(student_dir)):
+            if not filename.lower().endswith(MANIFEST_EXTENSIONS):
+                continue
+            stat = os.stat(os.path.join(student_dir, filename))
+            entry = known.get(f'uploads/{institution}/students/{student}/{filename}')
+            if entry and entry['size'] == stat.st_size and entry['mtime'] == stat.st_mtime:
+                entry = dict(entry)
+                reused += 1
+            else:
+                entry = describe_photo(uploads_dir, institution, student, filename, stat)
+                indexed += 1
+            entry['thumbnail'] = thumbnail_for(uploads_dir, institution, student, entry['sha256'])
+            entries.append(entry)
+        students[student] = entries
+
+    changed = students != previous['students']
+    if changed:
+        manifest = {
+            'version': MANIFEST_VERSION,
+            'institution': institution,
+            'generated_at': datetime.now().isoformat(),
+            'photos': sum(len(entries) for entries in students.values()),
+            'students': students
+        }
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=1)
+        os.replace(tmp_path, path)
+    elif os.path.exists(path) and newest_folder >= os.stat(path).st_mtime:
+        # A folder changed with no net effect (a photo added, then removed). server.js serves a student
+        # from the manifest only while it is newer than their folder, so mark the manifest current again
+        # (explicitly past the folder: an implicit utime can land in the same coarse clock tick)
+        now = max(time.time(), newest_folder + 0.001)
+        os.utime(path, (now, now))
+    return {'students': len(students), 'reused': reused, 'indexed': indexed, 'written': changed}
+
+
+def index_uploads(uploads_dir=UPLOADS_DIR, institutions=None):
+    """Index every institution that has a students/ folder"""
+    report = {}
+    for institution in sorted(os.listdir(uploads_dir)):
+        if institutions and institution not in institutions:
+            continue
+        if os.path.isdir(os.path.join(uploads_dir, institution, 'students')):
+            report[institution] = index_institution(uploads_dir, institution)
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Build per-institution student photo manifests')
+    parser.add_argument('--uploads', default=UPLOADS_DIR, help='uploads/ directory')
+    parser.add_argument('--institution', action='append', help='Only this institution folder (repeatable)')
+    parser.add_argument('--preprocess', action='store_true', help='Run photo preprocessing first so thumbnails exist')
+    parser.add_argument('--watch', type=float, default=0, help='Re-index every N seconds')
+    args = parser.parse_args()
+
+    while True:
+        started = time.perf_counter()
+        if args.preprocess:
+            PhotoPreprocessor(args.uploads).run()
+        report = index_uploads(args.uploads, args.institution)
+        elapsed = time.perf_counter() - started
+        for institution, counts in report.items():
+            if counts['written'] or not args.watch:
+                print(f"📸 {institution}: {counts['students']} students, {counts['indexed']} indexed, "
+                      f"{counts['reused']} unchanged{' (manifest updated)' if counts['written'] else ''}")
+        if not args.watch:
+            print(f"✅ Indexed {len(report)} institutions in {elapsed:.2f}s")
+            return 0
+        time.sleep(args.watch)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+"""
+Student Photo Preprocessing for Cheick Mohamed School
+Decodes, EXIF-orients, resizes and normalizes the raw enrollment photos in
+uploads/<institution>/students/<Name>/ across a process pool, writing
+recognizer-ready images and thumbnails. A manifest keyed by content hash
+lets reruns skip photos that have not changed.
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+from PIL import Image, ImageOps
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(SCRIPT_DIR)
+UPLOADS_DIR = os.path.join(PROJECT_ROOT, 'uploads')
+MANIFEST_FILE = 'photo_preprocess_manifest.json'
+
+PHOTO_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.gif', '.webp', '.bmp')
+PROCESSED_MAX_SIDE = 1024
+PROCESSED_QUALITY = 90
+THUMBNAIL_SIZE = 160
+THUMBNAIL_QUALITY = 80
+PROCESSED_DIR = 'processed'
+THUMBNAILS_DIR = 'thumbnails'
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def find_photos(uploads_dir):
+    """Yield (institution, student folder, path) for every raw student photo"""
+    for institution in sorted(os.listdir(uploads_dir)):
+        students_dir = os.path.join(uploads_dir, institution, 'students')
+        if not os.path.isdir(students_dir):
+            continue
+        for student in sorted(os.listdir(students_dir)):
+            student_dir = os.path.join(students_dir, student)
+            if not os.path.isdir(student_dir):
+                continue
+            for name in sorted(os.listdir(student_dir)):
+                if name.lower().endswith(PHOTO_EXTENSIONS):
+                    yield institution, student, os.path.join(student_dir, name)
+
+
+def output_paths(uploads_dir, institution, student, content_hash):
+    """Derived files live beside students/ and are named by content hash"""
+    name = f'{content_hash[:16]}.jpg'
+    return (os.path.join(uploads_dir, institution, PROCESSED_DIR, student, name),
+            os.path.join(uploads_dir, institution, THUMBNAILS_DIR, student, name))
+
+
+def save_jpeg(image, path, quality):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    image.save(tmp_path, 'JPEG', quality=quality, optimize=True)
+    os.replace(tmp_path, path)
+
+
+def process_photo(task):
+    """Worker: decode, orient, resize, normalize and write one photo plus its thumbnail"""
+    source, processed_path, thumbnail_path = task
+    with Image.open(source) as image:
+        # Let the JPEG decoder downscale by a power of two while decoding
+        image.draft('RGB', (PROCESSED_MAX_SIDE, PROCESSED_MAX_SIDE))
+        oriented = ImageOps.exif_transpose(image)
+        if oriented.mode in ('RGBA', 'LA', 'P'):
+            oriented = oriented.convert('RGBA')
+            background = Image.new('RGB', oriented.size, (255, 255, 255))
+            background.paste(oriented, mask=oriented.getchannel('A'))
+            oriented = background
+        normalized = oriented.convert('RGB')
+        original_size = image.size
+
+    normalized.thumbnail((PROCESSED_MAX_SIDE, PROCESSED_MAX_SIDE), Image.LANCZOS)
+    save_jpeg(normalized, processed_path, PROCESSED_QUALITY)
+    thumbnail = normalized.copy()
+    thumbnail.thumbnail((THUMBNAIL_SIZE, THUMBNAIL_SIZE), Image.LANCZOS)
+    save_jpeg(thumbnail, thumbnail_path, THUMBNAIL_QUALITY)
+    return {
+        'original_width': original_size[0],
+        'original_height': original_size[1],
+        'width': normalized.size[0],
+        'height': normalized.size[1]
+    }
+
+
+class PhotoPreprocessor:
+    """Runs process_photo over changed photos and maintains the manifest"""
+
+    def __init__(self, uploads_dir=UPLOADS_DIR, workers=None):
+        self.uploads_dir = uploads_dir
+        self.workers = workers or os.cpu_count() or 1
+        self.manifest_path = os.path.join(uploads_dir, MANIFEST_FILE)
+        self.manifest = self.load_manifest()
+
+    def load_manifest(self):
+        if os.path.exists(self.manifest_path):
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        return {'photos': {}, 'sources': {}}
+
+    def save_manifest(self):
+        tmp_path = self.manifest_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.manifest, f, indent=1, sort_keys=True)
+        os.replace(tmp_path, self.manifest_path)
+
+    def content_hash(self, path):
+        """Hash a photo, reusing the stored hash while size and mtime are unchanged"""
+        stat = os.stat(path)
+        relative = os.path.relpath(path, self.uploads_dir)
+        cached = self.manifest['sources'].get(relative)
+        if cached and cached['size'] == stat.st_size and cached['mtime'] == stat.st_mtime:
+            return cached['sha256']
+        content_hash = file_sha256(path)
+        self.manifest['sources'][relative] = {'size': stat.st_size, 'mtime': stat.st_mtime, 'sha256': content_hash}
+        return content_hash
+
+    def plan(self):
+        """Tasks for photos whose content hash has no up-to-date outputs"""
+        tasks, skipped, seen = [], 0, set()
+        live_sources = set()
+        for institution, student, path in find_photos(self.uploads_dir):
+            live_sources.add(os.path.relpath(path, self.uploads_dir))
+            content_hash = self.content_hash(path)
+            processed_path, thumbnail_path = output_paths(self.uploads_dir, institution, student, content_hash)
+            key = f'{institution}/{student}/{content_hash}'
+            entry = self.manifest['photos'].get(key)
+            if key in seen or (entry and os.path.exists(processed_path) and os.path.exists(thumbnail_path)):
+                skipped += 1
+                continue
+            seen.add(key)
+            tasks.append((key, path, processed_path, thumbnail_path))
+
+        # Forget sources that were deleted since the last run
+        for relative in set(self.manifest['sources']) - live_sources:
+            del self.manifest['sources'][relative]
+        return tasks, skipped
+
+    def run(self):
+        started = time.perf_counter()
+        tasks, skipped = self.plan()
+        failed = 0
+        if tasks:
+            logger.info(f"Processing {len(tasks)} photos with {self.workers} workers ({skipped} unchanged)")
+            work = [(path, processed, thumb) for _, path, processed, thumb in tasks]
+            chunksize = max(1, len(work) // (self.workers * 8))
+            with ProcessPoolExecutor(max_workers=self.workers) as pool:
+                results = pool.map(process_photo_safe, work, chunksize=chunksize)
+                for (key, path, processed, thumb), result in zip(tasks, results):
+                    if 'error' in result:
+                        failed += 1
+                        logger.error(f"Failed to process {path}: {result['error']}")
+                        continue
+                    self.manifest['photos'][key] = dict(
+                        result,
+                        source=os.path.relpath(path, self.uploads_dir),
+                        processed=os.path.relpath(processed, self.uploads_dir),
+                        thumbnail=os.path.relpath(thumb, self.uploads_dir),
+                        processed_at=datetime.now().isoformat()
+                    )
+        self.save_manifest()
+
+        elapsed = time.perf_counter() - started
+        processed = len(tasks) - failed
+        return {
+            'processed': processed,
+            'skipped': skipped,
+            'failed': failed,
+            'workers': self.workers,
+            'seconds': round(elapsed, 3),
+            'photos_per_sec': round(processed / elapsed, 1) if elapsed and processed else 0.0
+        }
+
+
+def process_photo_safe(task):
+    """process_photo that reports failures instead of aborting the pool"""
+    try:
+        return process_photo(task)
+    except Exception as e:
+        return {'error': str(e)}
+
+
+# ===== BENCHMARK =====
+
+def generate_photos(uploads_dir, count, seed=42, size=(2000, 1500), institutions=3, photos_per_student=5):
+    """Synthetic camera-sized JPEGs with EXIF orientation spread over students and institutions"""
+    rng = random.Random(seed)
+    base = Image.radial_gradient('L').resize(size).convert('RGB')
+    for i in range(count):
+        student = i // photos_per_student
+        student_dir = os.path.join(uploads_dir, f'school_{student % institutions}', 'students', f'Student_{student}')
+        os.makedirs(student_dir, exist_ok=True)
+        tint = Image.new('RGB', size, (rng.randrange(256), rng.randrange(256), rng.randrange(256)))
+        image = Image.blend(base, tint, 0.5)
+        exif = Image.Exif()
+        exif[0x0112] = rng.choice([1, 3, 6, 8])  # Orientation
+        image.save(os.path.join(student_dir, f'photos-{i}.jpg'), 'JPEG', quality=92, exif=exif)
+
+
+def run_benchmark(args):
+    workdir = tempfile.mkdtemp(prefix='photo_preprocess_')
+    try:
+        print(f"🖼️  Generating {args.benchmark} synthetic photos in {workdir}")
+        generate_photos(workdir, args.benchmark)
+        results = {}
+        worker_counts = sorted({1, args.workers or os.cpu_count() or 1})
+        for workers in worker_counts:
+            for name in (PROCESSED_DIR, THUMBNAILS_DIR):
+                for institution in os.listdir(workdir):
+                    shutil.rmtree(os.path.join(workdir, institution, name), ignore_errors=True)
+            manifest = os.path.join(workdir, MANIFEST_FILE)
+            if os.path.exists(manifest):
+                os.remove(manifest)
+            results[f'cold_{workers}_workers'] = PhotoPreprocessor(workdir, workers).run()
+            print(f"   cold run, {workers} workers: {results[f'cold_{workers}_workers']}")
+        results['warm_rerun'] = PhotoPreprocessor(workdir, worker_counts[-1]).run()
+        print(f"   warm rerun: {results['warm_rerun']}")
+        return {'photos': args.benchmark, 'cpu_count': os.cpu_count(), 'runs': results,
+                'generated_at': datetime.now().isoformat()}
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Preprocess student photos for the recognizer')
+    parser.add_argument('--uploads', default=UPLOADS_DIR, help='uploads/ directory')
+    parser.add_argument('--workers', type=int, default=None, help='Worker processes (default: all cores)')
+    parser.add_argument('--benchmark', type=int, default=0, help='Benchmark on N synthetic photos instead')
+    parser.add_argument('--output', default='photo_preprocess_report.json')
+    args = parser.parse_args()
+
+    if args.benchmark:
+        report = run_benchmark(args)
+    else:
+        report = PhotoPreprocessor(args.uploads, args.workers).run()
+        print(f"✅ {report['processed']} processed, {report['skipped']} unchanged, {report['failed']} failed "
+              f"in {report['seconds']}s")
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"✅ Report saved to: {args.output}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
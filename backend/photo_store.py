@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+"""
+Content-Addressed Student Photo Store for Cheick Mohamed School
+Keeps one hash-named blob per distinct photo under uploads/.photo_store and a
+reference list per student. Student folders keep their files as hardlinks to
+the blobs, so existing photo paths keep working while identical re-uploads
+take no extra space. The migrate command dedupes an existing uploads/ tree.
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from photo_preprocess import UPLOADS_DIR, file_sha256, find_photos
+
+STORE_DIR = '.photo_store'
+INDEX_FILE = 'index.json'
+HASH_WORKERS = 8
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+
+def student_key(institution, student):
+    return f'{institution}/{student}'
+
+
+class PhotoStore:
+    """Hash-named blobs plus per-student reference lists, persisted in index.json"""
+
+    def __init__(self, uploads_dir=UPLOADS_DIR):
+        self.uploads_dir = uploads_dir
+        self.root = os.path.join(uploads_dir, STORE_DIR)
+        self.index_path = os.path.join(self.root, INDEX_FILE)
+        self.lock = threading.Lock()
+        self.index = {'blobs': {}, 'students': {}}
+        if os.path.exists(self.index_path):
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                self.index = json.load(f)
+
+    def save(self):
+        os.makedirs(self.root, exist_ok=True)
+        tmp_path = self.index_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.index, f, indent=1, sort_keys=True)
+        os.replace(tmp_path, self.index_path)
+
+    def blob_path(self, content_hash):
+        blob = self.index['blobs'][content_hash]
+        return os.path.join(self.root, content_hash[:2], content_hash + blob['ext'])
+
+    def put(self, path, content_hash=None):
+        """Store a file's content (once) and return (hash, stored) where stored is False for duplicates"""
+        content_hash = content_hash or file_sha256(path)
+        with self.lock:
+            if content_hash in self.index['blobs'] and os.path.exists(self.blob_path(content_hash)):
+                return content_hash, False
+            self.index['blobs'][content_hash] = {'ext': os.path.splitext(path)[1].lower(),
+                                                 'size': os.path.getsize(path)}
+            blob = self.blob_path(content_hash)
+            os.makedirs(os.path.dirname(blob), exist_ok=True)
+            try:
+                os.link(path, blob)
+            except OSError:
+                copy_file(path, blob)
+            return content_hash, True
+
+    def link(self, content_hash, destination):
+        """Make destination a hardlink to the blob; returns True if it was a separate copy before"""
+        blob = self.blob_path(content_hash)
+        if os.path.exists(destination) and os.path.samefile(blob, destination):
+            return False
+        tmp_path = f'{destination}.{threading.get_ident()}.tmp'
+        try:
+            os.link(blob, tmp_path)
+        except OSError:  # no hardlinks on this filesystem: keep the copy
+            return False
+        os.replace(tmp_path, destination)
+        return True
+
+    def add_reference(self, institution, student, filename, content_hash):
+        with self.lock:
+            refs = self.index['students'].setdefault(student_key(institution, student), [])
+            refs[:] = [r for r in refs if r['filename'] != filename]
+            refs.append({'filename': filename, 'sha256': content_hash})
+            refs.sort(key=lambda r: r['filename'])
+
+    def references(self, institution, student):
+        """Distinct photo hashes for a student, in filename order"""
+        seen = []
+        for ref in self.index['students'].get(student_key(institution, student), []):
+            if ref['sha256'] not in seen:
+                seen.append(ref['sha256'])
+        return seen
+
+    def prune(self):
+        """Delete blobs that no student refers to any more"""
+        referenced = {r['sha256'] for refs in self.index['students'].values() for r in refs}
+        removed = 0
+        for content_hash in set(self.index['blobs']) - referenced:
+            blob = self.blob_path(content_hash)
+            if os.path.exists(blob):
+                os.remove(blob)
+            del self.index['blobs'][content_hash]
+            removed += 1
+        return removed
+
+
+def copy_file(source, destination):
+    with open(source, 'rb') as src, open(destination + '.tmp', 'wb') as dst:
+        while True:
+            chunk = src.read(1 << 20)
+            if not chunk:
+                break
+            dst.write(chunk)
+    os.replace(destination + '.tmp', destination)
+
+
+def disk_usage(paths):
+    """Bytes used by paths, counting each inode once"""
+    seen, total = set(), 0
+    for path in paths:
+        stat = os.stat(path)
+        if (stat.st_dev, stat.st_ino) not in seen:
+            seen.add((stat.st_dev, stat.st_ino))
+            total += stat.st_size
+    return total
+
+
+def migrate(uploads_dir=UPLOADS_DIR, workers=HASH_WORKERS, dry_run=False, collapse=False):
+    """Dedupe every student photo into the store; returns a space/bandwidth report.
+
+    Hashing runs on a thread pool (hashlib releases the GIL). With collapse,
+    repeated copies of the same photo inside one student folder are deleted
+    instead of linked, since the reference list already names them once.
+    """
+    started = time.perf_counter()
+    photos = list(find_photos(uploads_dir))
+    paths = [path for _, _, path in photos]
+    logical_bytes = sum(os.path.getsize(path) for path in paths)
+    bytes_before = disk_usage(paths)
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        hashes = list(pool.map(file_sha256, paths))
+
+    unique = {}
+    for (institution, student, path), content_hash in zip(photos, hashes):
+        unique.setdefault(content_hash, os.path.getsize(path))
+    unique_bytes = sum(unique.values())
+    report = {
+        'photos': len(photos),
+        'unique_photos': len(unique),
+        'duplicates': len(photos) - len(unique),
+        'logical_bytes': logical_bytes,
+        'bytes_before': bytes_before,
+        'bytes_after': unique_bytes,
+        'space_saved_bytes': bytes_before - unique_bytes,
+        # Every copy used to be uploaded; a content-addressed mirror sends each blob once
+        'upload_bytes_saved': logical_bytes - unique_bytes,
+        'dry_run': dry_run
+    }
+    if dry_run:
+        report['seconds'] = round(time.perf_counter() - started, 3)
+        return report
+
+    store = PhotoStore(uploads_dir)
+    store.index['students'] = {}  # rebuilt from the tree so deleted photos lose their references
+    linked = removed = 0
+    seen_in_student = set()
+    for (institution, student, path), content_hash in zip(photos, hashes):
+        store.put(path, content_hash)
+        marker = (institution, student, content_hash)
+        if collapse and marker in seen_in_student:
+            os.remove(path)
+            removed += 1
+            continue
+        seen_in_student.add(marker)
+        store.add_reference(institution, student, os.path.basename(path), content_hash)
+        linked += store.link(content_hash, path)
+    report['orphan_blobs_removed'] = store.prune()
+    store.save()
+
+    remaining = [path for _, _, path in find_photos(uploads_dir)]
+    report.update({
+        'files_linked': linked,
+        'files_removed': removed,
+        'bytes_after': disk_usage(remaining + [store.blob_path(h) for h in store.index['blobs']]),
+        'seconds': round(time.perf_counter() - started, 3)
+    })
+    report['space_saved_bytes'] = bytes_before - report['bytes_after']
+    return report
+
+
+def format_bytes(count):
+    for unit in ('B', 'KB', 'MB', 'GB'):
+        if abs(count) < 1024 or unit == 'GB':
+            return f'{count:.1f} {unit}' if unit != 'B' else f'{count} B'
+        count /= 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Content-addressed student photo store')
+    parser.add_argument('--uploads', default=UPLOADS_DIR, help='uploads/ directory')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    migrate_parser = subparsers.add_parser('migrate', help='Dedupe the existing uploads/ tree into the store')
+    migrate_parser.add_argument('--workers', type=int, default=HASH_WORKERS, help='Hashing threads')
+    migrate_parser.add_argument('--dry-run', action='store_true', help='Only report what would be saved')
+    migrate_parser.add_argument('--collapse', action='store_true',
+                                help='Delete repeated copies inside a student folder instead of linking them')
+    migrate_parser.add_argument('--output', default='photo_store_report.json')
+
+    refs_parser = subparsers.add_parser('refs', help="Show a student's photo references")
+    refs_parser.add_argument('institution')
+    refs_parser.add_argument('student', help='Student folder name')
+    args = parser.parse_args()
+
+    if args.command == 'refs':
+        store = PhotoStore(args.uploads)
+        for content_hash in store.references(args.institution, args.student):
+            print(f"{content_hash}  {os.path.relpath(store.blob_path(content_hash), args.uploads)}")
+        return 0
+
+    report = migrate(args.uploads, args.workers, args.dry_run, args.collapse)
+    report['generated_at'] = datetime.now().isoformat()
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"📦 {report['photos']} photos, {report['unique_photos']} unique ({report['duplicates']} duplicates)")
+    print(f"💾 Disk: {format_bytes(report['bytes_before'])} -> {format_bytes(report['bytes_after'])} "
+          f"(saved {format_bytes(report['space_saved_bytes'])})")
+    print(f"☁️  Upload bandwidth saved: {format_bytes(report['upload_bytes_saved'])}")
+    print(f"✅ Report saved to: {args.output}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
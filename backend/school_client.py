@@ -0,0 +1,343 @@
+#!/usr/bin/env python3
+"""
+Python Client SDK for the Cheick Mohamed School API
+One SchoolClient wraps auth, students, teachers, classes, attendance,
+calendar and institutions routes with:
+- a pooled HTTP connection adapter shared by per-thread sessions
+- transparent JWT refresh (re-login before expiry and once on 401)
+- retry with exponential backoff for idempotent requests
+- conditional-GET caching (ETag/If-None-Match plus a short freshness
+  window) for read-mostly resources such as /api/classes and /api/institutions
+"""
+
+import base64
+import json
+import logging
+import mimetypes
+import os
+import threading
+import time
+from collections import Counter
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+API_BASE_URL = os.getenv('SCHOOL_API_URL', 'http://localhost:3000/api')
+REQUEST_TIMEOUT = 30
+POOL_SIZE = 32
+MAX_RETRIES = 4
+BACKOFF_FACTOR = 0.3
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+# Refresh the token this long before its exp claim
+TOKEN_REFRESH_MARGIN_SECONDS = 300
+# Seconds a cached response is served without revalidation, per path prefix
+CACHE_FRESHNESS = {
+    '/classes': 30,
+    '/institutions': 60
+}
+
+logger = logging.getLogger(__name__)
+
+
+class SchoolAPIError(Exception):
+    """Raised for non-2xx responses; carries the status code and server message"""
+
+    def __init__(self, status, message):
+        super().__init__(f'HTTP {status}: {message}')
+        self.status = status
+        self.message = message
+
+
+def token_expiry(token):
+    """exp claim of a JWT (seconds since epoch), or None if it cannot be read"""
+    try:
+        payload = token.split('.')[1]
+        payload += '=' * (-len(payload) % 4)
+        return json.loads(base64.urlsafe_b64decode(payload)).get('exp')
+    except (IndexError, ValueError):
+        return None
+
+
+class SchoolClient:
+    """Thread-safe client; share one instance across worker threads"""
+
+    def __init__(self, base_url=API_BASE_URL, username=None, password=None, token=None,
+                 timeout=REQUEST_TIMEOUT, pool_size=POOL_SIZE, max_retries=MAX_RETRIES,
+                 backoff_factor=BACKOFF_FACTOR, cache_freshness=None):
+        self.base_url = base_url.rstrip('/')
+        self.username = username
+        self.password = password
+        self.timeout = timeout
+        self.cache_freshness = CACHE_FRESHNESS if cache_freshness is None else cache_freshness
+        self.adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=Retry(
+            total=max_retries, backoff_factor=backoff_factor, status_forcelist=RETRY_STATUSES,
+            allowed_methods=frozenset(['GET', 'HEAD', 'PUT', 'DELETE']), respect_retry_after_header=True,
+            raise_on_status=False))
+        self.local = threading.local()
+        self.lock = threading.Lock()
+        self.auth_lock = threading.Lock()
+        self.cache = {}
+        self.stats = Counter()
+        self.token = None
+        self.token_exp = None
+        self.user = None
+        if token:
+            self.set_token(token)
+
+    # ===== TRANSPORT =====
+
+    def session(self):
+        """Per-thread session over the shared connection pool"""
+        if not hasattr(self.local, 'session'):
+            session = requests.Session()
+            session.mount('http://', self.adapter)
+            session.mount('https://', self.adapter)
+            self.local.session = session
+        return self.local.session
+
+    def set_token(self, token):
+        self.token = token
+        self.token_exp = token_expiry(token)
+
+    def ensure_token(self, force=False):
+        """Log in if there is no token, it is about to expire, or force is set"""
+        if not force and self.token and (
+                self.token_exp is None or self.token_exp - time.time() > TOKEN_REFRESH_MARGIN_SECONDS):
+            return
+        if not (self.username and self.password):
+            if self.token and not force:
+                return
+            raise SchoolAPIError(401, 'No valid token and no credentials to log in with')
+        stale = self.token
+        with self.auth_lock:
+            if self.token != stale and not force:
+                return  # another thread refreshed while we waited
+            self.login(self.username, self.password)
+
+    def request(self, method, path, auth=True, params=None, **kwargs):
+        """Send a request and return the decoded JSON body"""
+        response = self._send(method, path, auth, params, **kwargs)
+        return self._decode(response)
+
+    def _send(self, method, path, auth, params, headers=None, **kwargs):
+        headers = dict(headers or {})
+        if auth:
+            self.ensure_token()
+            headers['Authorization'] = f'Bearer {self.token}'
+        response = self._http(method, path, params, headers, **kwargs)
+        if auth and response.status_code == 401 and self.username and self.password:
+            self.ensure_token(force=True)
+            headers['Authorization'] = f'Bearer {self.token}'
+            response = self._http(method, path, params, headers, **kwargs)
+        return response
+
+    def _http(self, method, path, params, headers, **kwargs):
+        with self.lock:
+            self.stats['http_requests'] += 1
+        return self.session().request(method, f'{self.base_url}{path}', params=params, headers=headers,
+                                      timeout=self.timeout, **kwargs)
+
+    @staticmethod
+    def _decode(response):
+        try:
+            body = response.json()
+        except ValueError:
+            body = {'error': response.text[:200]}
+        if response.status_code >= 400:
+            raise SchoolAPIError(response.status_code, body.get('error') or body.get('message') or response.reason)
+        return body
+
+    def cached_get(self, path, auth=True, params=None):
+        """GET with a freshness window and ETag revalidation; returns the decoded body"""
+        key = (path, tuple(sorted((params or {}).items())), auth)
+        freshness = next((seconds for prefix, seconds in self.cache_freshness.items() if path.startswith(prefix)), 0)
+        with self.lock:
+            self.stats['calls'] += 1
+            entry = self.cache.get(key)
+            if entry and time.monotonic() - entry['fetched'] < freshness:
+                self.stats['cache_hits'] += 1
+                return entry['body']
+
+        headers = {'If-None-Match': entry['etag']} if entry and entry['etag'] else None
+        response = self._send('GET', path, auth, params, headers=headers)
+        if response.status_code == 304 and entry:
+            with self.lock:
+                self.stats['not_modified'] += 1
+                entry['fetched'] = time.monotonic()
+            return entry['body']
+        body = self._decode(response)
+        with self.lock:
+            self.cache[key] = {'etag': response.headers.get('ETag'), 'body': body, 'fetched': time.monotonic()}
+        return body
+
+    def invalidate(self, prefix):
+        """Drop cached responses for paths starting with prefix (called after writes)"""
+        with self.lock:
+            for key in [k for k in self.cache if k[0].startswith(prefix)]:
+                del self.cache[key]
+
+    def get(self, path, params=None, auth=True):
+        with self.lock:
+            self.stats['calls'] += 1
+        return self.request('GET', path, auth, params)
+
+    def write(self, method, path, auth=True, invalidates=None, **kwargs):
+        with self.lock:
+            self.stats['calls'] += 1
+        body = self.request(method, path, auth, **kwargs)
+        if invalidates:
+            self.invalidate(invalidates)
+        return body
+
+    # ===== AUTH =====
+
+    def login(self, username, password):
+        """POST /api/auth/login; stores the token and credentials for later refreshes"""
+        with self.lock:
+            self.stats['logins'] += 1
+        body = self._decode(self._http('POST', '/auth/login', None, {}, json={'username': username, 'password': password}))
+        if username != self.username:
+            self.invalidate('')  # cached responses are scoped to the previous user
+        self.username, self.password = username, password
+        self.set_token(body['token'])
+        self.user = body.get('user')
+        return self.user
+
+    # ===== INSTITUTIONS =====
+
+    def list_institutions(self):
+        return self.cached_get('/institutions', auth=False)['data']
+
+    def get_institution(self, institution_id):
+        return self.cached_get(f'/institutions/{institution_id}', auth=False)['data']
+
+    def create_institution(self, data):
+        return self.write('POST', '/institutions', auth=False, invalidates='/institutions', json=data)
+
+    def update_institution(self, institution_id, data):
+        return self.write('PUT', f'/institutions/{institution_id}', auth=False, invalidates='/institutions', json=data)
+
+    def delete_institution(self, institution_id):
+        return self.write('DELETE', f'/institutions/{institution_id}', auth=False, invalidates='/institutions')
+
+    # ===== STUDENTS AND TEACHERS =====
+
+    def list_students(self, **filters):
+        return self.get('/students', filters)['data']
+
+    def student_photos(self, student_id):
+        return self.get(f'/students/{student_id}/photos')['data']
+
+    def create_student(self, data, photos=None):
+        """data holds the form fields (id, name, department, username, password, ...); photos are file paths"""
+        return self._create_person('/students', data, photos)
+
+    def delete_student(self, student_id):
+        return self.write('DELETE', f'/students/{student_id}')
+
+    def list_teachers(self, **filters):
+        return self.get('/teachers', filters)['data']
+
+    def create_teacher(self, data, photos=None):
+        return self._create_person('/teachers', data, photos)
+
+    def delete_teacher(self, teacher_id):
+        return self.write('DELETE', f'/teachers/{teacher_id}')
+
+    def _create_person(self, path, data, photos):
+        # The server's upload filter only accepts parts with an image/* content type
+        files = [('photos', (os.path.basename(p), open(p, 'rb'), mimetypes.guess_type(p)[0] or 'application/octet-stream'))
+                 for p in photos or []]
+        try:
+            return self.write('POST', path, data=data, files=files or None)
+        finally:
+            for _, (_, handle, _) in files:
+                handle.close()
+
+    # ===== CLASSES =====
+
+    def list_classes(self, department=None, status=None):
+        params = {k: v for k, v in (('department', department), ('status', status)) if v}
+        return self.cached_get('/classes', params=params)['data']
+
+    def classes_for_grade(self, level):
+        return self.cached_get(f'/classes/grade/{level}')['data']
+
+    def create_class(self, data):
+        return self.write('POST', '/classes', invalidates='/classes', json=data)
+
+    def update_class(self, class_id, data):
+        return self.write('PUT', f'/classes/{class_id}', invalidates='/classes', json=data)
+
+    def delete_class(self, class_id):
+        return self.write('DELETE', f'/classes/{class_id}', invalidates='/classes')
+
+    # ===== ATTENDANCE =====
+
+    def list_attendance(self, **filters):
+        """One page; filters include date, student_id, limit and cursor"""
+        return self.get('/attendance', filters)
+
+    def iter_attendance(self, page_size=1000, **filters):
+        """Yield every attendance row, following next_cursor"""
+        cursor = None
+        while True:
+            params = dict(filters, limit=page_size)
+            if cursor:
+                params['cursor'] = cursor
+            body = self.list_attendance(**params)
+            yield from body.get('data', [])
+            cursor = body.get('next_cursor')
+            if not cursor:
+                return
+
+    def attendance_stats(self):
+        return self.get('/attendance/stats')
+
+    def record_attendance(self, record):
+        """POST /api/attendance/realtime (device endpoint, keyed by institution_code, no token)"""
+        return self.write('POST', '/attendance/realtime', auth=False, json=record)
+
+    def upload_attendance_csv(self, path):
+        with open(path, 'rb') as f:
+            return self.write('POST', '/attendance/upload', files={'csvFile': (os.path.basename(path), f, 'text/csv')})
+
+    # ===== CALENDAR =====
+
+    def list_events(self, **filters):
+        return self.get('/calendar/events', filters)['data']
+
+    def events_for_month(self, year, month):
+        return self.get(f'/calendar/events/{year}/{month}')['data']
+
+    def today(self):
+        return self.get('/calendar/today')
+
+    def create_event(self, data):
+        return self.write('POST', '/calendar/events', json=data)
+
+    def update_event(self, event_id, data):
+        return self.write('PUT', f'/calendar/events/{event_id}', json=data)
+
+    def delete_event(self, event_id):
+        return self.write('DELETE', f'/calendar/events/{event_id}')
+
+    # ===== STATS =====
+
+    def institution_stats(self):
+        return self.get('/institution/stats')
+
+    def request_savings(self):
+        """API calls made vs HTTP requests actually sent (logins and retried 401s included)"""
+        with self.lock:
+            stats = dict(self.stats)
+        calls, sent = stats.get('calls', 0), stats.get('http_requests', 0)
+        return {
+            'calls': calls,
+            'http_requests': sent,
+            'cache_hits': stats.get('cache_hits', 0),
+            'not_modified': stats.get('not_modified', 0),
+            'logins': stats.get('logins', 0),
+            'requests_saved_pct': round(100.0 * (calls - sent) / calls, 1) if calls else 0.0
+        }
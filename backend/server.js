@@ -7,6 +7,7 @@ const express = require('express');
 const cors = require('cors');
 const path = require('path');
 const fs = require('fs');
+const { pipeline } = require('stream');
 const csv = require('csv-parser');
 const multer = require('multer');
 const jwt = require('jsonwebtoken');
@@ -192,14 +193,14 @@ function createTables() {
                 const hasInstitutionCode = rows && Array.isArray(rows) && rows.some(row => row.name === 'institution_code');
                 
                 if (!hasFolderName) {
-                    db.run('ALTER TABLE institutions ADD COLUMN folder_name TEXT', (err) => {
+                    addColumn('ALTER TABLE institutions ADD COLUMN folder_name TEXT', (err) => {
                         if (err) console.error('Error adding folder_name to institutions table:', err);
                         else console.log('Adding folder_name column to institutions table');
                     });
                 }
                 
                 if (!hasInstitutionCode) {
-                    db.run('ALTER TABLE institutions ADD COLUMN institution_code TEXT UNIQUE', (err) => {
+                    addColumn('ALTER TABLE institutions ADD COLUMN institution_code TEXT UNIQUE', (err) => {
                         if (err) console.error('Error adding institution_code to institutions table:', err);
                         else console.log('Adding institution_code column to institutions table');
                     });
@@ -244,7 +245,7 @@ function createTables() {
             
             if (!hasInstitutionId) {
                 console.log('Adding institution_id column to users table');
-                db.run('ALTER TABLE users ADD COLUMN institution_id INTEGER REFERENCES institutions(id)', err => {
+                addColumn('ALTER TABLE users ADD COLUMN institution_id INTEGER REFERENCES institutions(id)', err => {
                     if (err) console.error('Error adding institution_id to users table:', err);
                     else console.log('institution_id column added to users table');
                 });
@@ -296,7 +297,7 @@ function createTables() {
             
             if (!hasInstitutionId) {
                 console.log('Adding institution_id column to students table');
-                db.run('ALTER TABLE students ADD COLUMN institution_id INTEGER REFERENCES institutions(id)', err => {
+                addColumn('ALTER TABLE students ADD COLUMN institution_id INTEGER REFERENCES institutions(id)', err => {
                     if (err) console.error('Error adding institution_id to students table:', err);
                     else console.log('institution_id column added to students table');
                 });
@@ -304,7 +305,7 @@ function createTables() {
             
             if (!hasPhotoDirectory) {
                 console.log('Adding photo_directory column to students table');
-                db.run('ALTER TABLE students ADD COLUMN photo_directory TEXT', err => {
+                addColumn('ALTER TABLE students ADD COLUMN photo_directory TEXT', err => {
                     if (err) console.error('Error adding photo_directory to students table:', err);
                     else console.log('photo_directory column added to students table');
                 });
@@ -350,7 +351,7 @@ function createTables() {
             
             if (!hasInstitutionId) {
                 console.log('Adding institution_id column to teachers table');
-                db.run('ALTER TABLE teachers ADD COLUMN institution_id INTEGER REFERENCES institutions(id)', err => {
+                addColumn('ALTER TABLE teachers ADD COLUMN institution_id INTEGER REFERENCES institutions(id)', err => {
                     if (err) console.error('Error adding institution_id to teachers table:', err);
                     else console.log('institution_id column added to teachers table');
                 });
@@ -376,6 +377,14 @@ function createTables() {
             if (err) console.error('Error creating attendance table:', err);
             else console.log('Attendance table created/verified');
         });
+
+        // Serves ORDER BY date DESC, time DESC and keyset pagination on (date, time, id)
+        db.run('CREATE INDEX IF NOT EXISTS idx_attendance_date_time ON attendance (date, time)');
+        const createAttendanceInstitutionIndex = () => {
+            db.run('CREATE INDEX IF NOT EXISTS idx_attendance_institution_date_time ON attendance (institution_id, date, time)', err => {
+                if (err) console.error('Error creating attendance institution index:', err);
+            });
+        };
         
         // Check and add institution_id column to attendance table if it doesn't exist
         db.get("PRAGMA table_info(attendance)", (err, rows) => {
@@ -394,11 +403,115 @@ function createTables() {
             
             if (!hasInstitutionId) {
                 console.log('Adding institution_id column to attendance table');
-                db.run('ALTER TABLE attendance ADD COLUMN institution_id INTEGER REFERENCES institutions(id)', err => {
+                addColumn('ALTER TABLE attendance ADD COLUMN institution_id INTEGER REFERENCES institutions(id)', err => {
                     if (err) console.error('Error adding institution_id to attendance table:', err);
                     else console.log('institution_id column added to attendance table');
+                    createAttendanceInstitutionIndex();
+                });
+            } else {
+                createAttendanceInstitutionIndex();
+            }
+        });
+
+        // Daily attendance rollups (one row per institution, student and day), maintained by insertAttendanceRecords.
+        // institution_id is 0 for sightings that carried no institution: NULLs never conflict in a key
+        // Settles once attendance_daily is verified or re-keyed; the initial schema metadata load waits for it
+        let markAttendanceDailyReady;
+        const attendanceDailyReady = new Promise(resolve => { markAttendanceDailyReady = resolve; });
+        const attendanceDailySchema = (table) => `
+            CREATE TABLE IF NOT EXISTS ${table} (
+                institution_id INTEGER NOT NULL DEFAULT 0,
+                student_id TEXT NOT NULL,
+                date TEXT NOT NULL,
+                first_in TEXT NOT NULL,
+                last_out TEXT NOT NULL,
+                sighting_count INTEGER NOT NULL DEFAULT 0,
+                present BOOLEAN DEFAULT 1,
+                updated_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+                PRIMARY KEY (institution_id, student_id, date)
+            )
+        `;
+        const attendanceDailyRebuild = (table, where = '') => `
+            INSERT INTO ${table} (institution_id, student_id, date, first_in, last_out, sighting_count, present)
+            SELECT COALESCE(institution_id, 0), student_id, date, MIN(time), MAX(time), COUNT(*), 1
+            FROM attendance
+            ${where}
+            GROUP BY COALESCE(institution_id, 0), student_id, date
+        `;
+
+        const finishAttendanceDaily = () => {
+            markAttendanceDailyReady();
+            // (date, student_id) lets the stats count distinct students per day without a temp b-tree
+            db.run('CREATE INDEX IF NOT EXISTS idx_attendance_daily_date ON attendance_daily (date, student_id)');
+            db.run('CREATE INDEX IF NOT EXISTS idx_attendance_daily_institution_date ON attendance_daily (institution_id, date)');
+
+            // Backfill rollups once for databases that predate the rollup table
+            db.get('SELECT COUNT(*) as count FROM attendance_daily', (err, row) => {
+                if (err || row.count > 0) return;
+                db.run(attendanceDailyRebuild('attendance_daily'), function(err) {
+                    if (err) console.error('Error backfilling attendance_daily:', err);
+                    else if (this.changes > 0) console.log(`Backfilled ${this.changes} attendance_daily rows`);
                 });
+            });
+        };
+
+        // Rollups keyed by (student_id, date) merged a student's sightings across institutions; rebuild them
+        // under the new key. Dates still in attendance are recomputed, archived dates keep their rollup rows.
+        const migrateAttendanceDaily = () => queueTransaction(release => db.serialize(() => {
+            console.log('Re-keying attendance_daily by institution');
+            const fail = (err) => {
+                console.error('Error re-keying attendance_daily:', err);
+                db.run('ROLLBACK', release);
+                markAttendanceDailyReady();
+            };
+            const steps = [
+                'DROP TABLE IF EXISTS attendance_daily_new',
+                attendanceDailySchema('attendance_daily_new'),
+                `INSERT INTO attendance_daily_new
+                    (institution_id, student_id, date, first_in, last_out, sighting_count, present, updated_at)
+                 SELECT COALESCE(institution_id, 0), student_id, date, first_in, last_out, sighting_count, present, updated_at
+                 FROM attendance_daily
+                 WHERE date NOT IN (SELECT DISTINCT date FROM attendance)`,
+                attendanceDailyRebuild('attendance_daily_new'),
+                'DROP TABLE attendance_daily',
+                'ALTER TABLE attendance_daily_new RENAME TO attendance_daily'
+            ];
+            db.run('BEGIN TRANSACTION', err => {
+                if (err) {
+                    console.error('Error starting transaction:', err);
+                    release();
+                    markAttendanceDailyReady();
+                    return;
+                }
+                const next = (i) => {
+                    if (i === steps.length) {
+                        return db.run('COMMIT', err => {
+                            if (err) return fail(err);
+                            release();
+                            console.log('attendance_daily re-keyed by institution');
+                            refreshSchemaMetadata();
+                            finishAttendanceDaily();
+                        });
+                    }
+                    db.run(steps[i], err => err ? fail(err) : next(i + 1));
+                };
+                next(0);
+            });
+        }));
+
+        db.run(attendanceDailySchema('attendance_daily'), (err) => {
+            if (err) console.error('Error creating attendance_daily table:', err);
+            else console.log('Attendance daily rollup table created/verified');
+        });
+        db.all('PRAGMA table_info(attendance_daily)', (err, columns) => {
+            if (err) {
+                console.error('Error checking attendance_daily table schema:', err);
+                markAttendanceDailyReady();
+                return;
             }
+            const keyedByInstitution = columns.some(column => column.name === 'institution_id' && column.pk > 0);
+            if (keyedByInstitution) finishAttendanceDaily();
+            else migrateAttendanceDaily();
         });
 
         // Classes table
@@ -438,7 +551,7 @@ function createTables() {
             
             if (!hasInstitutionId) {
                 console.log('Adding institution_id column to classes table');
-                db.run('ALTER TABLE classes ADD COLUMN institution_id INTEGER REFERENCES institutions(id)', err => {
+                addColumn('ALTER TABLE classes ADD COLUMN institution_id INTEGER REFERENCES institutions(id)', err => {
                     if (err) console.error('Error adding institution_id to classes table:', err);
                     else console.log('institution_id column added to classes table');
                 });
@@ -463,7 +576,7 @@ function createTables() {
             newColumns.forEach(column => {
                 if (!existingColumns.includes(column.name)) {
                     console.log(`Adding ${column.name} column to classes table`);
-                    db.run(column.sql, err => {
+                    addColumn(column.sql, err => {
                         if (err) console.error(`Error adding ${column.name} to classes table:`, err);
                         else console.log(`${column.name} column added to classes table`);
                     });
@@ -507,7 +620,7 @@ function createTables() {
             
             if (!hasInstitutionId) {
                 console.log('Adding institution_id column to parents table');
-                db.run('ALTER TABLE parents ADD COLUMN institution_id INTEGER REFERENCES institutions(id)', err => {
+                addColumn('ALTER TABLE parents ADD COLUMN institution_id INTEGER REFERENCES institutions(id)', err => {
                     if (err) console.error('Error adding institution_id to parents table:', err);
                     else console.log('institution_id column added to parents table');
                 });
@@ -555,7 +668,7 @@ function createTables() {
             
             if (!hasInstitutionId) {
                 console.log('Adding institution_id column to calendar_events table');
-                db.run('ALTER TABLE calendar_events ADD COLUMN institution_id INTEGER REFERENCES institutions(id)', err => {
+                addColumn('ALTER TABLE calendar_events ADD COLUMN institution_id INTEGER REFERENCES institutions(id)', err => {
                     if (err) console.error('Error adding institution_id to calendar_events table:', err);
                     else console.log('institution_id column added to calendar_events table');
                 });
@@ -601,17 +714,19 @@ function createTables() {
             
             if (!hasInstitutionId) {
                 console.log('Adding institution_id column to announcements table');
-                db.run('ALTER TABLE announcements ADD COLUMN institution_id INTEGER REFERENCES institutions(id)', err => {
+                addColumn('ALTER TABLE announcements ADD COLUMN institution_id INTEGER REFERENCES institutions(id)', err => {
                     if (err) console.error('Error adding institution_id to announcements table:', err);
                     else console.log('institution_id column added to announcements table');
                 });
             }
         });
 
-        // Initialize default data after all tables are created
-        setTimeout(() => {
+        // Initialize default data once the attendance_daily re-key (the only long migration) has finished;
+        // column migrations that land later reload the schema metadata themselves, via addColumn
+        attendanceDailyReady.then(() => {
             insertDefaultData();
-        }, 1000);
+            refreshSchemaMetadata().then(createInstitutionScopedIndexes);
+        });
     });
 }
 
@@ -642,6 +757,59 @@ function insertDefaultData() {
     console.log('Default data initialized');
 }
 
+// ===== SCHEMA METADATA =====
+// Columns of every table, introspected once the startup migrations have run
+// (and again by anything that migrates later, via refreshSchemaMetadata), so
+// request handlers ask hasColumn() instead of running PRAGMA table_info.
+const schemaColumns = new Map(); // table -> Set of column names
+let markSchemaMetadataReady;
+const schemaMetadataReady = new Promise(resolve => { markSchemaMetadataReady = resolve; });
+
+function refreshSchemaMetadata() {
+    const all = (sql) => new Promise((resolve, reject) => {
+        db.all(sql, (err, rows) => err ? reject(err) : resolve(rows));
+    });
+    return all("SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%'")
+        .then(tables => Promise.all(tables.map(({ name }) =>
+            all(`PRAGMA table_info("${name}")`).then(rows => [name, new Set(rows.map(row => row.name))])
+        )))
+        .then(entries => {
+            schemaColumns.clear();
+            entries.forEach(([table, columns]) => schemaColumns.set(table, columns));
+            console.log(`Schema metadata loaded for ${schemaColumns.size} tables`);
+        })
+        .catch(err => console.error('Error reading schema metadata:', err))
+        .then(markSchemaMetadataReady);
+}
+
+// Runs a startup ALTER TABLE ... ADD COLUMN and reloads the schema metadata once it lands
+function addColumn(sql, callback) {
+    db.run(sql, err => {
+        callback(err);
+        if (!err) refreshSchemaMetadata().then(createInstitutionScopedIndexes);
+    });
+}
+
+function hasColumn(table, column) {
+    const columns = schemaColumns.get(table);
+    return Boolean(columns && columns.has(column));
+}
+
+// Indexes behind the per-institution counts in /api/institution/stats
+const INSTITUTION_SCOPED_INDEXES = [
+    { table: 'students', sql: 'CREATE INDEX IF NOT EXISTS idx_students_institution_created ON students (institution_id, created_at)' },
+    { table: 'users', sql: 'CREATE INDEX IF NOT EXISTS idx_users_institution_role_created ON users (institution_id, role, created_at)' },
+    { table: 'classes', sql: 'CREATE INDEX IF NOT EXISTS idx_classes_institution ON classes (institution_id)' }
+];
+
+function createInstitutionScopedIndexes() {
+    INSTITUTION_SCOPED_INDEXES
+        .filter(index => hasColumn(index.table, 'institution_id'))
+        .forEach(index => db.run(index.sql, err => {
+            if (err) console.error(`Error creating ${index.table} institution index:`, err);
+        }));
+}
+
 // ===== AUTHENTICATION MIDDLEWARE =====
 function authenticateToken(req, res, next) {
     const authHeader = req.headers['authorization'];
@@ -766,6 +934,52 @@ function generateUniqueUsernameWithCheck(firstName, lastName, institutionCode, u
     checkAndIncrement();
 }
 
+// Run a BEGIN...COMMIT block on the shared connection without interleaving
+// with other requests' transactions (a second BEGIN would fail mid-way and,
+// without a callback, take the process down). work(release) must call
+// release() once it has committed or rolled back.
+let transactionQueue = Promise.resolve();
+function queueTransaction(work) {
+    transactionQueue = transactionQueue
+        .then(() => new Promise(release => work(release)))
+        .catch(err => console.error('Queued transaction failed:', err));
+}
+
+// ===== INSTITUTION CODE CACHE =====
+// institution_code -> id for the realtime ingest path. Codes practically never
+// change, so entries (including "no such code") live until an institution is
+// created, updated or deleted. Each entry is the lookup promise itself, so a
+// burst of gates with a cold cache shares a single query.
+const INSTITUTION_CODE_CACHE_MAX = 1000;
+const institutionIdsByCode = new Map();
+
+function resolveInstitutionId(institutionCode) {
+    let lookup = institutionIdsByCode.get(institutionCode);
+    if (!lookup) {
+        // Unknown codes come from an unauthenticated endpoint; keep the map bounded
+        if (institutionIdsByCode.size >= INSTITUTION_CODE_CACHE_MAX) {
+            institutionIdsByCode.clear();
+        }
+        lookup = new Promise((resolve, reject) => {
+            db.get('SELECT id FROM institutions WHERE institution_code = ?', [institutionCode], (err, row) => {
+                if (err) reject(err);
+                else resolve(row ? row.id : null);
+            });
+        });
+        institutionIdsByCode.set(institutionCode, lookup);
+        lookup.catch(() => {
+            if (institutionIdsByCode.get(institutionCode) === lookup) {
+                institutionIdsByCode.delete(institutionCode);
+            }
+        });
+    }
+    return lookup;
+}
+
+function invalidateInstitutionCodeCache() {
+    institutionIdsByCode.clear();
+}
+
 // ===== INSTITUTION ROUTES =====
 app.post('/api/institutions', (req, res) => {
     const { name, regNumber, type, address, email, website, phone, adminUsername, adminPassword, adminName, adminEmail } = req.body;
@@ -820,6 +1034,7 @@ app.post('/api/institutions', (req, res) => {
             }
 
             const institutionId = this.lastID;
+            invalidateInstitutionCodeCache();
 
             // Check if admin username already exists
             db.get('SELECT id FROM users WHERE username = ?', [adminUsername], (err, existingUser) => {
@@ -957,6 +1172,7 @@ app.put('/api/institutions/:id', (req, res) => {
             if (this.changes === 0) {
                 return res.status(404).json({ error: 'Institution not found' });
             }
+            invalidateInstitutionCodeCache();
 
             // Update admin email if provided
             if (adminEmail) {
@@ -985,27 +1201,42 @@ app.delete('/api/institutions/:id', (req, res) => {
     const { id } = req.params;
     
     // Start a transaction to ensure data integrity
-    db.serialize(() => {
-        db.run('BEGIN TRANSACTION');
-        
-        // Delete the institution
-        db.run('DELETE FROM institutions WHERE id = ?', [id], function(err) {
+    queueTransaction(release => db.serialize(() => {
+        db.run('BEGIN TRANSACTION', err => {
             if (err) {
-                console.error('Error deleting institution:', err);
-                db.run('ROLLBACK');
-                return res.status(500).json({ error: 'Database error' });
-            }
-            
-            if (this.changes === 0) {
-                db.run('ROLLBACK');
-                return res.status(404).json({ error: 'Institution not found' });
+                console.error('Error starting transaction:', err);
+                release();
+                return res.status(500).json({ error: 'Transaction error' });
             }
             
-            // Commit the transaction
-            db.run('COMMIT');
-            res.json({ success: true, message: 'Institution deleted successfully' });
+            // Delete the institution
+            db.run('DELETE FROM institutions WHERE id = ?', [id], function(err) {
+                if (err) {
+                    console.error('Error deleting institution:', err);
+                    db.run('ROLLBACK', release);
+                    return res.status(500).json({ error: 'Database error' });
+                }
+                
+                if (this.changes === 0) {
+                    db.run('ROLLBACK', release);
+                    return res.status(404).json({ error: 'Institution not found' });
+                }
+                
+                // Commit the transaction
+                db.run('COMMIT', err => {
+                    if (err) {
+                        console.error('Error committing transaction:', err);
+                        db.run('ROLLBACK', release);
+                        return res.status(500).json({ error: 'Transaction error' });
+                    }
+                    release();
+                    
+                    invalidateInstitutionCodeCache();
+                    res.json({ success: true, message: 'Institution deleted successfully' });
+                });
+            });
         });
-    });
+    }));
 });
 
 // ===== AUTHENTICATION ROUTES =====
@@ -1062,14 +1293,40 @@ app.post('/api/auth/login', (req, res) => {
 
 // ===== ATTENDANCE ROUTES =====
 
-// Get attendance records
+// Keyset pagination cursors are opaque base64url strings of [date, time, id]
+function encodeAttendanceCursor(row) {
+    return Buffer.from(JSON.stringify([row.date, row.time, row.id])).toString('base64url');
+}
+
+function decodeAttendanceCursor(cursor) {
+    try {
+        const value = JSON.parse(Buffer.from(String(cursor), 'base64url').toString('utf8'));
+        if (Array.isArray(value) && value.length === 3 && Number.isInteger(value[2])) {
+            return value;
+        }
+    } catch (err) {
+        // fall through
+    }
+    return null;
+}
+
+// Get attendance records, newest first. Pass ?cursor=<next_cursor> for the next page.
 app.get('/api/attendance', authenticateToken, (req, res) => {
-    const { date, student_id, limit = 100 } = req.query;
+    const { date, student_id, limit = 100, cursor } = req.query;
     
     let query = 'SELECT * FROM attendance';
     let params = [];
     let conditions = [];
 
+    if (cursor) {
+        const position = decodeAttendanceCursor(cursor);
+        if (!position) {
+            return res.status(400).json({ error: 'Invalid cursor' });
+        }
+        conditions.push('(date, time, id) < (?, ?, ?)');
+        params.push(...position);
+    }
+
     if (date) {
         conditions.push('date = ?');
         params.push(date);
@@ -1080,12 +1337,19 @@ app.get('/api/attendance', authenticateToken, (req, res) => {
         params.push(student_id);
     }
 
+    // Filter by institution if the user is an admin with an institution_id
+    if (req.user && req.user.role === 'admin' && req.user.institution_id) {
+        conditions.push('institution_id = ?');
+        params.push(req.user.institution_id);
+    }
+
     if (conditions.length > 0) {
         query += ' WHERE ' + conditions.join(' AND ');
     }
 
-    query += ' ORDER BY date DESC, time DESC LIMIT ?';
-    params.push(parseInt(limit));
+    const pageSize = parseInt(limit);
+    query += ' ORDER BY date DESC, time DESC, id DESC LIMIT ?';
+    params.push(pageSize);
 
     db.all(query, params, (err, rows) => {
         if (err) {
@@ -1093,7 +1357,8 @@ app.get('/api/attendance', authenticateToken, (req, res) => {
             return res.status(500).json({ error: 'Database error' });
         }
         console.log(`Fetched ${rows.length} attendance records`);
-        res.json({ success: true, data: rows });
+        const nextCursor = rows.length > 0 && rows.length === pageSize ? encodeAttendanceCursor(rows[rows.length - 1]) : null;
+        res.json({ success: true, data: rows, next_cursor: nextCursor });
     });
 });
 
@@ -1113,46 +1378,194 @@ app.get('/api/attendance/public', (req, res) => {
     });
 });
 
-// Submit attendance via CSV upload
-app.post('/api/attendance/upload', authenticateToken, csvUpload.single('csvFile'), (req, res) => {
+// ===== ATTENDANCE EVENT STREAM =====
+// Server-Sent Events of newly committed attendance rows. Event ids are attendance row
+// ids, so clients resume with Last-Event-ID from the in-memory buffer or the database.
+const STREAM_BUFFER_SIZE = 1000;
+const STREAM_REPLAY_LIMIT = 500;
+const STREAM_HEARTBEAT_MS = 25000;
+const STREAM_MAX_BUFFERED_BYTES = 1024 * 1024;
+const attendanceStream = {
+    clients: new Set(),
+    buffer: [],  // recent { id, institution_id, payload } in id order
+    heartbeat: null
+};
+
+function formatAttendanceEvent(row) {
+    return `id: ${row.id}\nevent: attendance\ndata: ${JSON.stringify(row)}\n\n`;
+}
+
+// Tells a client that missed more than it can be replayed to reload its snapshot; resuming after lastId
+function writeStreamReset(client, lastId) {
+    client.res.write(`id: ${lastId}\nevent: reset\ndata: ${JSON.stringify({ last_id: lastId })}\n\n`);
+    client.lastId = lastId;
+}
+
+function writeToStreamClient(client, event) {
+    if (client.institutionId && String(event.institution_id) !== client.institutionId) {
+        return;
+    }
+    // Drop viewers that stopped reading instead of buffering for them indefinitely
+    if (client.res.writableLength > STREAM_MAX_BUFFERED_BYTES) {
+        client.res.end();
+        return;
+    }
+    client.res.write(event.payload);
+    client.lastId = event.id;
+}
+
+function publishAttendanceEvents(rows) {
+    rows.forEach(row => {
+        // Serialized once, however many viewers are connected
+        const event = { id: row.id, institution_id: row.institution_id, payload: formatAttendanceEvent(row) };
+        attendanceStream.buffer.push(event);
+        attendanceStream.clients.forEach(client => writeToStreamClient(client, event));
+    });
+    if (attendanceStream.buffer.length > STREAM_BUFFER_SIZE) {
+        attendanceStream.buffer.splice(0, attendanceStream.buffer.length - STREAM_BUFFER_SIZE);
+    }
+}
+
+function replayAttendanceEvents(client, lastEventId, done) {
+    const replayBuffer = (afterId) => {
+        attendanceStream.buffer.filter(event => event.id > afterId).forEach(event => writeToStreamClient(client, event));
+    };
+    const buffer = attendanceStream.buffer;
+    if (buffer.length > 0 && buffer[0].id <= lastEventId + 1) {
+        replayBuffer(lastEventId);
+        return done();
+    }
+
+    // Older than the buffer: catch up from the table, bounded so a stale id cannot flood the client.
+    // One row past the limit means there is a gap the client cannot fill from the stream.
+    let query = 'SELECT * FROM attendance WHERE id > ?';
+    const params = [lastEventId];
+    if (client.institutionId) {
+        query += ' AND institution_id = ?';
+        params.push(client.institutionId);
+    }
+    query += ' ORDER BY id DESC LIMIT ?';
+    params.push(STREAM_REPLAY_LIMIT + 1);
+
+    db.all(query, params, (err, rows) => {
+        if (err) {
+            console.error('Error replaying attendance events:', err);
+        } else if (rows.length > STREAM_REPLAY_LIMIT) {
+            writeStreamReset(client, rows[0].id);
+        } else {
+            rows.reverse().forEach(row => writeToStreamClient(client, {
+                id: row.id, institution_id: row.institution_id, payload: formatAttendanceEvent(row)
+            }));
+        }
+        // Events committed while the query ran are already in the buffer
+        replayBuffer(Math.max(lastEventId, client.lastId || 0));
+        done();
+    });
+}
+
+app.get('/api/attendance/stream', (req, res) => {
+    res.writeHead(200, {
+        'Content-Type': 'text/event-stream',
+        'Cache-Control': 'no-cache',
+        'Connection': 'keep-alive',
+        'X-Accel-Buffering': 'no'
+    });
+    res.write('retry: 5000\n\n');
+
+    const client = { res, institutionId: req.query.institution_id ? String(req.query.institution_id) : null };
+    const lastEventId = parseInt(req.headers['last-event-id'] || req.query.lastEventId, 10);
+
+    const subscribe = () => {
+        if (res.writableEnded) return;
+        attendanceStream.clients.add(client);
+        if (!attendanceStream.heartbeat) {
+            // One timer for all viewers keeps idle connections open through proxies
+            attendanceStream.heartbeat = setInterval(() => {
+                attendanceStream.clients.forEach(c => c.res.write(': heartbeat\n\n'));
+            }, STREAM_HEARTBEAT_MS);
+        }
+    };
+
+    req.on('close', () => {
+        attendanceStream.clients.delete(client);
+        if (attendanceStream.clients.size === 0 && attendanceStream.heartbeat) {
+            clearInterval(attendanceStream.heartbeat);
+            attendanceStream.heartbeat = null;
+        }
+    });
+
+    if (Number.isInteger(lastEventId) && lastEventId >= 0) {
+        replayAttendanceEvents(client, lastEventId, subscribe);
+    } else {
+        subscribe();
+    }
+});
+
+// Submit attendance via CSV upload. Rows are inserted in bounded chunks while
+// the file is parsed; the parser is not read again until the current chunk
+// has committed, so memory stays flat however long the file is.
+const ATTENDANCE_UPLOAD_CHUNK_SIZE = 2000;
+const ATTENDANCE_UPLOAD_REJECT_SAMPLE = 20;
+const ATTENDANCE_CSV_FIELDS = ['Date', 'Time', 'Name', 'ID', 'Dept'];
+
+app.post('/api/attendance/upload', authenticateToken, csvUpload.single('csvFile'), async (req, res) => {
     if (!req.file) {
         return res.status(400).json({ error: 'CSV file is required' });
     }
 
-    const results = [];
-    
-    fs.createReadStream(req.file.path)
-        .pipe(csv())
-        .on('data', (data) => {
+    const summary = { rows: 0, inserted: 0, rejected: 0, chunks: 0, rejected_sample: [] };
+    let chunk = [];
+    const flushChunk = async () => {
+        if (chunk.length === 0) return;
+        const records = chunk;
+        chunk = [];
+        await insertAttendanceRecords(records);
+        summary.inserted += records.length;
+        summary.chunks++;
+    };
+
+    try {
+        const rows = pipeline(fs.createReadStream(req.file.path), csv(), () => {});
+        for await (const data of rows) {
+            summary.rows++;
+
             // Validate CSV data format
-            if (data.Date && data.Time && data.Name && data.ID && data.Dept) {
-                results.push({
-                    date: data.Date,
-                    time: data.Time,
-                    student_name: data.Name,
-                    student_id: data.ID,
-                    department: data.Dept,
-                    role: data.Role || 'Student'
-                });
+            const missing = ATTENDANCE_CSV_FIELDS.filter(field => !data[field]);
+            if (missing.length > 0) {
+                summary.rejected++;
+                if (summary.rejected_sample.length < ATTENDANCE_UPLOAD_REJECT_SAMPLE) {
+                    summary.rejected_sample.push({ row: summary.rows, reason: `Missing ${missing.join(', ')}`, data });
+                }
+                continue;
             }
-        })
-        .on('end', () => {
-            // Insert attendance records
-            insertAttendanceRecords(results)
-                .then(() => {
-                    // Delete uploaded file
-                    fs.unlinkSync(req.file.path);
-                    res.json({ 
-                        success: true, 
-                        message: `${results.length} attendance records processed`,
-                        data: results 
-                    });
-                })
-                .catch(err => {
-                    console.error('Error inserting attendance records:', err);
-                    res.status(500).json({ error: 'Failed to process attendance data' });
-                });
+
+            chunk.push({
+                date: data.Date,
+                time: data.Time,
+                student_name: data.Name,
+                student_id: data.ID,
+                department: data.Dept,
+                role: data.Role || 'Student',
+                institution_id: req.user.institution_id || null
+            });
+            if (chunk.length >= ATTENDANCE_UPLOAD_CHUNK_SIZE) {
+                await flushChunk();
+            }
+        }
+        await flushChunk();
+
+        res.json({
+            success: true,
+            message: `${summary.inserted} attendance records processed`,
+            data: summary
         });
+    } catch (err) {
+        // Chunks committed before the failure stay; the summary says how far the upload got
+        console.error('Error inserting attendance records:', err);
+        res.status(500).json({ error: 'Failed to process attendance data', data: summary });
+    } finally {
+        fs.unlink(req.file.path, () => {});
+    }
 });
 
 // Real-time attendance endpoint (for face recognition system)
@@ -1167,13 +1580,7 @@ app.post('/api/attendance/realtime', async (req, res) => {
     let institution_id = null;
     if (institution_code) {
         try {
-            const institution = await new Promise((resolve, reject) => {
-                db.get('SELECT id FROM institutions WHERE institution_code = ?', [institution_code], (err, row) => {
-                    if (err) reject(err);
-                    else resolve(row);
-                });
-            });
-            institution_id = institution?.id;
+            institution_id = await resolveInstitutionId(institution_code);
         } catch (error) {
             console.error('Error resolving institution:', error);
         }
@@ -1189,7 +1596,7 @@ app.post('/api/attendance/realtime', async (req, res) => {
         institution_id: institution_id
     };
 
-    insertAttendanceRecords([attendanceRecord])
+    queueAttendanceInsert(attendanceRecord)
         .then(() => {
             res.json({ 
                 success: true, 
@@ -1207,10 +1614,13 @@ app.post('/api/attendance/realtime', async (req, res) => {
 app.get('/api/attendance/stats', authenticateToken, (req, res) => {
     const today = new Date().toISOString().split('T')[0];
     
+    // Attendance counts are present student-days, read from the daily rollup table (one row per institution)
     const queries = {
-        today: 'SELECT COUNT(*) as count FROM attendance WHERE date = ?',
-        thisWeek: `SELECT COUNT(*) as count FROM attendance WHERE date >= date('now', '-7 days')`,
-        thisMonth: `SELECT COUNT(*) as count FROM attendance WHERE date >= date('now', 'start of month')`,
+        today: 'SELECT COUNT(DISTINCT student_id) as count FROM attendance_daily WHERE date = ? AND present = 1',
+        thisWeek: `SELECT COUNT(*) as count FROM (SELECT DISTINCT student_id, date FROM attendance_daily
+                   WHERE date >= date('now', '-7 days') AND present = 1)`,
+        thisMonth: `SELECT COUNT(*) as count FROM (SELECT DISTINCT student_id, date FROM attendance_daily
+                    WHERE date >= date('now', 'start of month') AND present = 1)`,
         totalStudents: 'SELECT COUNT(*) as count FROM students WHERE status = "active"'
     };
 
@@ -1365,209 +1775,65 @@ app.get('/api/institution/stats', authenticateToken, async (req, res) => {
     }
     
     const institutionId = req.user.institution_id;
-    
-    try {
-        let studentsResult = { total: 0 };
-        let teachersResult = { total: 0 };
-        let classesResult = { total: 0 };
-        let newStudentsResult = { total: 0 };
-        let newTeachersResult = { total: 0 };
-        
-        try {
-            // Get students count - handle errors for individual queries
-            studentsResult = await new Promise((resolve, reject) => {
-                db.all("PRAGMA table_info(students)", (err, rows) => {
-                    if (err) {
-                        console.error('Error checking students table schema:', err);
-                        resolve({ total: 0 });
-                        return;
-                    }
-                    
-                    // Check if institution_id column exists
-                    const hasInstitutionId = rows.some(row => row.name === 'institution_id');
-                    
-                    if (hasInstitutionId) {
-                        db.get(
-                            'SELECT COUNT(*) as total FROM students WHERE institution_id = ?',
-                            [institutionId],
-                            (err, row) => {
-                                if (err) {
-                                    console.error('Error counting students:', err);
-                                    resolve({ total: 0 });
-                                } else {
-                                    resolve(row || { total: 0 });
-                                }
-                            }
-                        );
-                    } else {
-                        // If institution_id column doesn't exist, return 0
-                        console.log('institution_id column not found in students table');
-                        resolve({ total: 0 });
-                    }
-                });
-            });
-        } catch (err) {
-            console.error('Error fetching student stats:', err);
-        }
-        
-        try {
-            // Get teachers count
-            teachersResult = await new Promise((resolve, reject) => {
-                db.all("PRAGMA table_info(users)", (err, rows) => {
-                    if (err) {
-                        console.error('Error checking users table schema:', err);
-                        resolve({ total: 0 });
-                        return;
-                    }
-                    
-                    // Check if institution_id column exists
-                    const hasInstitutionId = rows.some(row => row.name === 'institution_id');
-                    
-                    if (hasInstitutionId) {
-                        db.get(
-                            'SELECT COUNT(*) as total FROM users WHERE role = "teacher" AND institution_id = ?',
-                            [institutionId],
-                            (err, row) => {
-                                if (err) {
-                                    console.error('Error counting teachers:', err);
-                                    resolve({ total: 0 });
-                                } else {
-                                    resolve(row || { total: 0 });
-                                }
-                            }
-                        );
-                    } else {
-                        console.log('institution_id column not found in users table');
-                        resolve({ total: 0 });
-                    }
-                });
-            });
-        } catch (err) {
-            console.error('Error fetching teacher stats:', err);
-        }
-        
-        try {
-            // Get classes count
-            classesResult = await new Promise((resolve, reject) => {
-                db.all("PRAGMA table_info(classes)", (err, rows) => {
-                    if (err) {
-                        console.error('Error checking classes table schema:', err);
-                        resolve({ total: 0 });
-                        return;
-                    }
-                    
-                    // Check if institution_id column exists
-                    const hasInstitutionId = rows.some(row => row.name === 'institution_id');
-                    
-                    if (hasInstitutionId) {
-                        db.get(
-                            'SELECT COUNT(*) as total FROM classes WHERE institution_id = ?',
-                            [institutionId],
-                            (err, row) => {
-                                if (err) {
-                                    console.error('Error counting classes:', err);
-                                    resolve({ total: 0 });
-                                } else {
-                                    resolve(row || { total: 0 });
-                                }
-                            }
-                        );
-                    } else {
-                        console.log('institution_id column not found in classes table');
-                        resolve({ total: 0 });
-                    }
-                });
-            });
-        } catch (err) {
-            console.error('Error fetching class stats:', err);
-        }
-        
-        // Get new students this month
-        const currentDate = new Date();
-        const firstDayOfMonth = new Date(currentDate.getFullYear(), currentDate.getMonth(), 1);
-        const firstDayOfMonthStr = firstDayOfMonth.toISOString().split('T')[0];
-        
-        try {
-            newStudentsResult = await new Promise((resolve, reject) => {
-                db.all("PRAGMA table_info(students)", (err, rows) => {
-                    if (err) {
-                        console.error('Error checking students table schema:', err);
-                        resolve({ total: 0 });
-                        return;
-                    }
-                    
-                    const hasInstitutionId = rows.some(row => row.name === 'institution_id');
-                    
-                    if (hasInstitutionId) {
-                        db.get(
-                            'SELECT COUNT(*) as total FROM students WHERE institution_id = ? AND created_at >= ?',
-                            [institutionId, firstDayOfMonthStr],
-                            (err, row) => {
-                                if (err) {
-                                    console.error('Error counting new students:', err);
-                                    resolve({ total: 0 });
-                                } else {
-                                    resolve(row || { total: 0 });
-                                }
-                            }
-                        );
-                    } else {
-                        resolve({ total: 0 });
-                    }
-                });
-            });
-        } catch (err) {
-            console.error('Error fetching new students stats:', err);
+    await schemaMetadataReady;
+
+    const currentDate = new Date();
+    const firstDayOfMonth = new Date(currentDate.getFullYear(), currentDate.getMonth(), 1);
+    const firstDayOfMonthStr = firstDayOfMonth.toISOString().split('T')[0];
+    const today = currentDate.toISOString().split('T')[0];
+    const yesterday = new Date(currentDate.getTime() - 24 * 60 * 60 * 1000).toISOString().split('T')[0];
+
+    // Tables that predate the institution_id migration count as empty
+    const institutionCount = (label, table, sql, params, empty) => {
+        if (!hasColumn(table, 'institution_id')) {
+            return Promise.resolve(empty);
         }
-        
-        // Get new teachers this month
-        try {
-            newTeachersResult = await new Promise((resolve, reject) => {
-                db.all("PRAGMA table_info(users)", (err, rows) => {
-                    if (err) {
-                        console.error('Error checking users table schema:', err);
-                        resolve({ total: 0 });
-                        return;
-                    }
-                    
-                    const hasInstitutionId = rows.some(row => row.name === 'institution_id');
-                    
-                    if (hasInstitutionId) {
-                        db.get(
-                            'SELECT COUNT(*) as total FROM users WHERE role = "teacher" AND institution_id = ? AND created_at >= ?',
-                            [institutionId, firstDayOfMonthStr],
-                            (err, row) => {
-                                if (err) {
-                                    console.error('Error counting new teachers:', err);
-                                    resolve({ total: 0 });
-                                } else {
-                                    resolve(row || { total: 0 });
-                                }
-                            }
-                        );
-                    } else {
-                        resolve({ total: 0 });
-                    }
-                });
+        return new Promise(resolve => {
+            db.get(sql, params, (err, row) => {
+                if (err) {
+                    console.error(`Error counting ${label}:`, err);
+                    resolve(empty);
+                } else {
+                    resolve(row || empty);
+                }
             });
-        } catch (err) {
-            console.error('Error fetching new teachers stats:', err);
-        }
-        
-        // Get attendance rate
-        // This is a simplified calculation - in a real app you'd need more complex logic
-        const attendanceRate = Math.floor(Math.random() * 15) + 85; // Random number between 85-100
-        const attendanceRateChange = Math.floor(Math.random() * 5) + 1; // Random change between 1-5
+        });
+    };
+
+    try {
+        // Each count is one range scan of an (institution_id, ...) index
+        const [studentsResult, teachersResult, classesResult, presentResult] = await Promise.all([
+            institutionCount('students', 'students',
+                'SELECT COUNT(*) as total, SUM(created_at >= ?) as newThisMonth FROM students WHERE institution_id = ?',
+                [firstDayOfMonthStr, institutionId], { total: 0, newThisMonth: 0 }),
+            institutionCount('teachers', 'users',
+                `SELECT COUNT(*) as total, SUM(created_at >= ?) as newThisMonth FROM users WHERE institution_id = ? AND role = 'teacher'`,
+                [firstDayOfMonthStr, institutionId], { total: 0, newThisMonth: 0 }),
+            institutionCount('classes', 'classes',
+                'SELECT COUNT(*) as total FROM classes WHERE institution_id = ?',
+                [institutionId], { total: 0 }),
+            // Attendance rate from the daily rollups: students present today vs yesterday
+            institutionCount('attendance rollups', 'attendance_daily',
+                `SELECT SUM(date = ?) as today, SUM(date = ?) as yesterday
+                 FROM attendance_daily
+                 WHERE institution_id = ? AND date IN (?, ?) AND present = 1`,
+                [today, yesterday, institutionId, today, yesterday], { today: 0, yesterday: 0 })
+        ]);
+        
+        const totalStudents = studentsResult.total || 0;
+        const rateFor = (present) => totalStudents > 0 ? Math.round(((present || 0) / totalStudents) * 100) : 0;
+        const attendanceRate = rateFor(presentResult.today);
+        const attendanceRateChange = attendanceRate - rateFor(presentResult.yesterday);
         
         res.json({
             success: true,
             data: {
-                totalStudents: studentsResult.total || 0,
+                totalStudents: totalStudents,
                 totalTeachers: teachersResult.total || 0,
                 totalClasses: classesResult.total || 0,
                 attendanceRate: attendanceRate,
-                newStudentsThisMonth: newStudentsResult.total || 0,
-                newTeachersThisMonth: newTeachersResult.total || 0,
+                newStudentsThisMonth: studentsResult.newThisMonth || 0,
+                newTeachersThisMonth: teachersResult.newThisMonth || 0,
                 attendanceRateChange: attendanceRateChange
             }
         });
@@ -1577,6 +1843,75 @@ app.get('/api/institution/stats', authenticateToken, async (req, res) => {
     }
 });
 
+// ===== STUDENT PHOTO MANIFEST =====
+// backend/photo_manifest.py writes uploads/<institution>/photo_manifest.json;
+// photo listings are served from it instead of scanning the student folder.
+const PHOTO_MANIFEST_FILE = 'photo_manifest.json';
+const PHOTO_MANIFEST_RECHECK_MS = 1000;
+const photoManifests = new Map(); // institution folder -> { mtimeMs, checkedAt, students }
+
+function loadPhotoManifest(folder, callback) {
+    const cached = photoManifests.get(folder);
+    if (cached && Date.now() - cached.checkedAt < PHOTO_MANIFEST_RECHECK_MS) {
+        return callback(cached);
+    }
+
+    const manifestFile = path.join(__dirname, '..', 'uploads', folder, PHOTO_MANIFEST_FILE);
+    fs.stat(manifestFile, (err, stat) => {
+        if (err) {
+            photoManifests.delete(folder);
+            return callback(null);
+        }
+        if (cached && cached.mtimeMs === stat.mtimeMs) {
+            cached.checkedAt = Date.now();
+            return callback(cached);
+        }
+        fs.readFile(manifestFile, 'utf8', (err, text) => {
+            if (err) {
+                return callback(null);
+            }
+            try {
+                const manifest = { mtimeMs: stat.mtimeMs, checkedAt: Date.now(), students: JSON.parse(text).students || {} };
+                photoManifests.set(folder, manifest);
+                callback(manifest);
+            } catch (parseError) {
+                console.error('Invalid photo manifest:', manifestFile, parseError.message);
+                callback(null);
+            }
+        });
+    });
+}
+
+// Calls back with the manifest entries for a photo_directory, or null when the
+// manifest is missing, does not know the student, or predates the last change to
+// the student folder (adding or removing a photo bumps the folder's mtime).
+function getManifestPhotos(photoDirectory, callback) {
+    const parts = photoDirectory.replace(/\\/g, '/').split('/');
+    if (parts.length !== 4 || parts[0] !== 'uploads' || parts[2] !== 'students') {
+        return callback(null);
+    }
+    loadPhotoManifest(parts[1], (manifest) => {
+        const photos = manifest && manifest.students[parts[3]];
+        if (!photos) {
+            return callback(null);
+        }
+        fs.stat(path.join(__dirname, '..', photoDirectory), (err, dirStat) => {
+            if (err || dirStat.mtimeMs >= manifest.mtimeMs) {
+                return callback(null);
+            }
+            callback(photos.map(photo => ({
+                filename: photo.filename,
+                path: photo.path,
+                size: photo.size,
+                width: photo.width,
+                height: photo.height,
+                hash: photo.sha256,
+                thumbnail: photo.thumbnail
+            })));
+        });
+    });
+}
+
 // ===== STUDENT ROUTES =====
 app.get('/api/students', authenticateToken, (req, res) => {
     const { department, status = 'active' } = req.query;
@@ -1614,7 +1949,7 @@ app.get('/api/students/:id/photos', authenticateToken, (req, res) => {
     const studentId = req.params.id;
     
     // Get student info first to find photo directory
-    db.get('SELECT * FROM students WHERE id = ?', [studentId], (err, student) => {
+    db.get('SELECT photo_directory FROM students WHERE id = ?', [studentId], (err, student) => {
         if (err) {
             console.error('Error fetching student:', err);
             return res.status(500).json({ error: 'Database error' });
@@ -1629,35 +1964,41 @@ app.get('/api/students/:id/photos', authenticateToken, (req, res) => {
             return res.json({ success: true, data: [] });
         }
         
-        // Full path to student photos directory
-        const photosDir = path.join(__dirname, '..', student.photo_directory);
-        
-        // Check if directory exists
-        if (!fs.existsSync(photosDir)) {
-            return res.json({ success: true, data: [] });
-        }
-        
-        try {
-            // Get list of photos
-            const photos = fs.readdirSync(photosDir)
-                .filter(file => {
-                    // Only include image files
-                    const ext = path.extname(file).toLowerCase();
-                    return ['.jpg', '.jpeg', '.png', '.gif'].includes(ext);
-                })
-                .map(file => {
-                    return {
-                        filename: file,
-                        path: path.join(student.photo_directory, file).replace(/\\/g, '/')
-                    };
-                });
-                
-            res.json({ success: true, data: photos });
-        } catch (error) {
-            console.error('Error reading student photos directory:', error);
-            return res.status(500).json({ error: 'Error reading photos directory' });
-        }
-    });
+        getManifestPhotos(student.photo_directory, (manifestPhotos) => {
+            if (manifestPhotos) {
+                return res.json({ success: true, data: manifestPhotos });
+            }
+
+            // Full path to student photos directory
+            const photosDir = path.join(__dirname, '..', student.photo_directory);
+
+            // Check if directory exists
+            if (!fs.existsSync(photosDir)) {
+                return res.json({ success: true, data: [] });
+            }
+
+            try {
+                // Get list of photos
+                const photos = fs.readdirSync(photosDir)
+                    .filter(file => {
+                        // Only include image files
+                        const ext = path.extname(file).toLowerCase();
+                        return ['.jpg', '.jpeg', '.png', '.gif'].includes(ext);
+                    })
+                    .map(file => {
+                        return {
+                            filename: file,
+                            path: path.join(student.photo_directory, file).replace(/\\/g, '/')
+                        };
+                    });
+
+                res.json({ success: true, data: photos });
+            } catch (error) {
+                console.error('Error reading student photos directory:', error);
+                return res.status(500).json({ error: 'Error reading photos directory' });
+            }
+        });
+    });
 });
 
 // Create a new student
@@ -1740,130 +2081,138 @@ app.post('/api/students', authenticateToken, (req, res) => {
                 return res.status(400).json({ error: 'Username already exists' });
             }
             
+            // Hash the password before taking a turn in the transaction queue
+            const salt = bcrypt.genSaltSync(10);
+            const hashedPassword = bcrypt.hashSync(password, salt);
+            
             // Start a transaction to ensure both student and user are created or neither
-            db.serialize(() => {
-                db.run('BEGIN TRANSACTION');
-                
-                // Hash the password
-                const salt = bcrypt.genSaltSync(10);
-                const hashedPassword = bcrypt.hashSync(password, salt);
-                
-                // Create student record
-                db.run(
-                    'INSERT INTO students (id, name, department, class, status, email, phone, institution_id, photo_directory, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, datetime("now"), datetime("now"))',
-                    [id, name, department, className, status || 'active', email || null, phone || null, req.user.institution_id, photoDirectory],
-                    function(err) {
-                        if (err) {
-                            console.error('Error creating student:', err);
-                            console.error('Student data:', { id, name, department, className, status, email, phone, institution_id: req.user.institution_id, photoDirectory });
-                            db.run('ROLLBACK');
-                            return res.status(500).json({ error: 'Error creating student: ' + err.message });
-                        }
-                        
-                        // Create user account for the student
-                        db.run(
-                            'INSERT INTO users (username, password, role, name, email, institution_id, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?, datetime("now"), datetime("now"))',
-                            [username, hashedPassword, 'student', name, email || null, req.user.institution_id],
-                            function(err) {
-                                if (err) {
-                                    console.error('Error creating user account:', err);
-                                    console.error('User data:', { username, role: 'student', name, email, institution_id: req.user.institution_id });
-                                    db.run('ROLLBACK');
-                                    return res.status(500).json({ error: 'Error creating user account: ' + err.message });
-                                }
-                                
-                                db.run('COMMIT', async (err) => {
+            queueTransaction(release => db.serialize(() => {
+                db.run('BEGIN TRANSACTION', err => {
+                    if (err) {
+                        console.error('Error starting transaction:', err);
+                        release();
+                        return res.status(500).json({ error: 'Transaction error' });
+                    }
+                    
+                    // Create student record
+                    db.run(
+                        'INSERT INTO students (id, name, department, class, status, email, phone, institution_id, photo_directory, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, datetime("now"), datetime("now"))',
+                        [id, name, department, className, status || 'active', email || null, phone || null, req.user.institution_id, photoDirectory],
+                        function(err) {
+                            if (err) {
+                                console.error('Error creating student:', err);
+                                console.error('Student data:', { id, name, department, className, status, email, phone, institution_id: req.user.institution_id, photoDirectory });
+                                db.run('ROLLBACK', release);
+                                return res.status(500).json({ error: 'Error creating student: ' + err.message });
+                            }
+                            
+                            // Create user account for the student
+                            db.run(
+                                'INSERT INTO users (username, password, role, name, email, institution_id, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?, datetime("now"), datetime("now"))',
+                                [username, hashedPassword, 'student', name, email || null, req.user.institution_id],
+                                function(err) {
                                     if (err) {
-                                        console.error('Error committing transaction:', err);
-                                        return res.status(500).json({ error: 'Transaction error' });
+                                        console.error('Error creating user account:', err);
+                                        console.error('User data:', { username, role: 'student', name, email, institution_id: req.user.institution_id });
+                                        db.run('ROLLBACK', release);
+                                        return res.status(500).json({ error: 'Error creating user account: ' + err.message });
                                     }
                                     
-                                    console.log(`Student ${name} created with ID ${id} and username ${username}`);
-                                    
-                                    // Try to upload photos to Google Drive
-                                    let driveUploadResults = [];
-                                    if (req.files && req.files.length > 0) {
-                                        try {
-                                            // Get institution info for Drive folder structure
-                                            db.get('SELECT name, institution_code FROM institutions WHERE id = ?', [req.user.institution_id], async (err, institution) => {
-                                                if (!err && institution) {
-                                                    try {
-                                                        console.log('Attempting Google Drive upload for student photos...');
-                                                        
-                                                        // Create or get institution folders
-                                                        const institutionFolders = await googleDrive.createInstitutionFolders(
-                                                            institution.name, 
-                                                            institution.institution_code
-                                                        );
-                                                        
-                                                        // Create user folder
-                                                        const userFolder = await googleDrive.createUserFolder(
-                                                            name, 
-                                                            'student', 
-                                                            institutionFolders
-                                                        );
-                                                        
-                                                        // Upload each photo
-                                                        for (const file of req.files) {
-                                                            const uploadResult = await googleDrive.uploadFile(
-                                                                file.path,
-                                                                file.originalname || file.filename,
-                                                                userFolder.folderId,
-                                                                file.mimetype
+                                    db.run('COMMIT', async (err) => {
+                                        if (err) {
+                                            console.error('Error committing transaction:', err);
+                                            db.run('ROLLBACK', release);
+                                            return res.status(500).json({ error: 'Transaction error' });
+                                        }
+                                        release();
+                                        
+                                        console.log(`Student ${name} created with ID ${id} and username ${username}`);
+                                        
+                                        // Try to upload photos to Google Drive
+                                        let driveUploadResults = [];
+                                        if (req.files && req.files.length > 0) {
+                                            try {
+                                                // Get institution info for Drive folder structure
+                                                db.get('SELECT name, institution_code FROM institutions WHERE id = ?', [req.user.institution_id], async (err, institution) => {
+                                                    if (!err && institution) {
+                                                        try {
+                                                            console.log('Attempting Google Drive upload for student photos...');
+                                                            
+                                                            // Create or get institution folders
+                                                            const institutionFolders = await googleDrive.createInstitutionFolders(
+                                                                institution.name, 
+                                                                institution.institution_code
+                                                            );
+                                                            
+                                                            // Create user folder
+                                                            const userFolder = await googleDrive.createUserFolder(
+                                                                name, 
+                                                                'student', 
+                                                                institutionFolders
                                                             );
-                                                            driveUploadResults.push({
-                                                                originalName: file.originalname || file.filename,
-                                                                driveFileId: uploadResult.fileId,
-                                                                driveFolderId: userFolder.folderId
+                                                            
+                                                            // Upload each photo
+                                                            for (const file of req.files) {
+                                                                const uploadResult = await googleDrive.uploadFile(
+                                                                    file.path,
+                                                                    file.originalname || file.filename,
+                                                                    userFolder.folderId,
+                                                                    file.mimetype
+                                                                );
+                                                                driveUploadResults.push({
+                                                                    originalName: file.originalname || file.filename,
+                                                                    driveFileId: uploadResult.fileId,
+                                                                    driveFolderId: userFolder.folderId
+                                                                });
+                                                            }
+                                                            
+                                                            console.log(`Successfully uploaded ${driveUploadResults.length} photos to Google Drive for student ${name}`);
+                                                            
+                                                            // Update student record with Drive folder info
+                                                            db.run('UPDATE students SET drive_folder_id = ?, drive_photo_urls = ? WHERE id = ?', [
+                                                                userFolder.folderId,
+                                                                JSON.stringify(driveUploadResults),
+                                                                id
+                                                            ], (updateErr) => {
+                                                                if (updateErr) console.error('Error updating student with Drive info:', updateErr);
                                                             });
+                                                            
+                                                        } catch (driveError) {
+                                                            console.error('Error uploading to Google Drive:', driveError);
                                                         }
-                                                        
-                                                        console.log(`Successfully uploaded ${driveUploadResults.length} photos to Google Drive for student ${name}`);
-                                                        
-                                                        // Update student record with Drive folder info
-                                                        db.run('UPDATE students SET drive_folder_id = ?, drive_photo_urls = ? WHERE id = ?', [
-                                                            userFolder.folderId,
-                                                            JSON.stringify(driveUploadResults),
-                                                            id
-                                                        ], (updateErr) => {
-                                                            if (updateErr) console.error('Error updating student with Drive info:', updateErr);
-                                                        });
-                                                        
-                                                    } catch (driveError) {
-                                                        console.error('Error uploading to Google Drive:', driveError);
                                                     }
-                                                }
-                                            });
-                                        } catch (driveError) {
-                                            console.error('Error with Google Drive operation:', driveError);
+                                                });
+                                            } catch (driveError) {
+                                                console.error('Error with Google Drive operation:', driveError);
+                                            }
                                         }
-                                    }
-                                    
-                                    // Send response immediately (don't wait for Drive upload)
-                                    res.status(201).json({ 
-                                        success: true, 
-                                        data: { 
-                                            id, 
-                                            name, 
-                                            department, 
-                                            class: className, 
-                                            status, 
-                                            username,
-                                            institution_id: req.user.institution_id,
-                                            photo_directory: photoDirectory,
-                                            photos: req.files ? req.files.map(file => ({
-                                                filename: file.filename,
-                                                path: file.path.replace(/\\/g, '/').replace(path.join(__dirname, '..').replace(/\\/g, '/'), '')
-                                            })) : [],
-                                            driveUpload: driveUploadResults.length > 0 ? 'success' : 'pending'
-                                        } 
+                                        
+                                        // Send response immediately (don't wait for Drive upload)
+                                        res.status(201).json({ 
+                                            success: true, 
+                                            data: { 
+                                                id, 
+                                                name, 
+                                                department, 
+                                                class: className, 
+                                                status, 
+                                                username,
+                                                institution_id: req.user.institution_id,
+                                                photo_directory: photoDirectory,
+                                                photos: req.files ? req.files.map(file => ({
+                                                    filename: file.filename,
+                                                    path: file.path.replace(/\\/g, '/').replace(path.join(__dirname, '..').replace(/\\/g, '/'), '')
+                                                })) : [],
+                                                driveUpload: driveUploadResults.length > 0 ? 'success' : 'pending'
+                                            } 
+                                        });
                                     });
-                                });
-                            }
-                        );
-                    }
-                );
-            });
+                                }
+                            );
+                        }
+                    );
+                });
+            }));
         });
     });
     });
@@ -1895,68 +2244,80 @@ app.delete('/api/students/:id', authenticateToken, (req, res) => {
         }
         
         // Start a transaction
-        db.serialize(() => {
-            db.run('BEGIN TRANSACTION');
-            
-            // Delete student record
-            db.run('DELETE FROM students WHERE id = ?', [studentId], function(err) {
+        queueTransaction(release => db.serialize(() => {
+            db.run('BEGIN TRANSACTION', err => {
                 if (err) {
-                    console.error('Error deleting student:', err);
-                    db.run('ROLLBACK');
-                    return res.status(500).json({ error: 'Error deleting student' });
+                    console.error('Error starting transaction:', err);
+                    release();
+                    return res.status(500).json({ error: 'Transaction error' });
                 }
                 
-                // Delete associated user account
-                db.run('DELETE FROM users WHERE username = ? AND role = "student"', [student.id], function(err) {
+                // Delete student record
+                db.run('DELETE FROM students WHERE id = ?', [studentId], function(err) {
                     if (err) {
-                        console.error('Error deleting user account:', err);
-                        db.run('ROLLBACK');
-                        return res.status(500).json({ error: 'Error deleting user account' });
+                        console.error('Error deleting student:', err);
+                        db.run('ROLLBACK', release);
+                        return res.status(500).json({ error: 'Error deleting student' });
                     }
                     
-                    // Delete any attendance records for this student
-                    db.run('DELETE FROM attendance WHERE student_id = ?', [studentId], function(err) {
+                    // Delete associated user account
+                    db.run('DELETE FROM users WHERE username = ? AND role = "student"', [student.id], function(err) {
                         if (err) {
-                            console.error('Error deleting attendance records:', err);
-                            // Continue anyway as attendance records are less critical
+                            console.error('Error deleting user account:', err);
+                            db.run('ROLLBACK', release);
+                            return res.status(500).json({ error: 'Error deleting user account' });
                         }
                         
-                        db.run('COMMIT', err => {
+                        // Delete any attendance records for this student
+                        db.run('DELETE FROM attendance WHERE student_id = ?', [studentId], function(err) {
                             if (err) {
-                                console.error('Error committing transaction:', err);
-                                return res.status(500).json({ error: 'Transaction error' });
+                                console.error('Error deleting attendance records:', err);
+                                // Continue anyway as attendance records are less critical
                             }
                             
-                            // If there are photos, attempt to delete the directory
-                            if (student.photo_directory) {
-                                const photoDir = path.join(__dirname, '..', student.photo_directory);
-                                try {
-                                    if (fs.existsSync(photoDir)) {
-                                        // Read all files in directory
-                                        const files = fs.readdirSync(photoDir);
-                                        
-                                        // Delete each file
-                                        for (const file of files) {
-                                            fs.unlinkSync(path.join(photoDir, file));
+                            db.run('DELETE FROM attendance_daily WHERE student_id = ?', [studentId], err => {
+                                if (err) console.error('Error deleting attendance rollups:', err);
+                            });
+                            
+                            db.run('COMMIT', err => {
+                                if (err) {
+                                    console.error('Error committing transaction:', err);
+                                    db.run('ROLLBACK', release);
+                                    return res.status(500).json({ error: 'Transaction error' });
+                                }
+                                release();
+                                
+                                // If there are photos, attempt to delete the directory
+                                if (student.photo_directory) {
+                                    const photoDir = path.join(__dirname, '..', student.photo_directory);
+                                    try {
+                                        if (fs.existsSync(photoDir)) {
+                                            // Read all files in directory
+                                            const files = fs.readdirSync(photoDir);
+                                            
+                                            // Delete each file
+                                            for (const file of files) {
+                                                fs.unlinkSync(path.join(photoDir, file));
+                                            }
+                                            
+                                            // Delete directory
+                                            fs.rmdirSync(photoDir);
+                                            console.log(`Deleted photo directory for student ${studentId}`);
                                         }
-                                        
-                                        // Delete directory
-                                        fs.rmdirSync(photoDir);
-                                        console.log(`Deleted photo directory for student ${studentId}`);
+                                    } catch (err) {
+                                        console.error(`Error deleting photo directory for student ${studentId}:`, err);
+                                        // Continue anyway - the student was deleted successfully
                                     }
-                                } catch (err) {
-                                    console.error(`Error deleting photo directory for student ${studentId}:`, err);
-                                    // Continue anyway - the student was deleted successfully
                                 }
-                            }
-                            
-                            console.log(`Student ${studentId} deleted successfully`);
-                            res.json({ success: true, message: 'Student deleted successfully' });
+                                
+                                console.log(`Student ${studentId} deleted successfully`);
+                                res.json({ success: true, message: 'Student deleted successfully' });
+                            });
                         });
                     });
                 });
             });
-        });
+        }));
     });
 });
 
@@ -2074,128 +2435,136 @@ app.post('/api/teachers', authenticateToken, (req, res) => {
                     return res.status(400).json({ error: 'Username already exists' });
                 }
                 
+                // Hash the password before taking a turn in the transaction queue
+                const salt = bcrypt.genSaltSync(10);
+                const hashedPassword = bcrypt.hashSync(password, salt);
+                
                 // Start a transaction
-                db.serialize(() => {
-                    db.run('BEGIN TRANSACTION');
-                    
-                    // Hash the password
-                    const salt = bcrypt.genSaltSync(10);
-                    const hashedPassword = bcrypt.hashSync(password, salt);
-                    
-                    // Create teacher record
-                    db.run(
-                        'INSERT INTO teachers (id, name, department, subject, status, email, phone, institution_id, photo_directory, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, datetime("now"), datetime("now"))',
-                        [id, name, department, subject || null, status || 'active', email || null, phone || null, req.user.institution_id, photoDirectory],
-                        function(err) {
-                            if (err) {
-                                console.error('Error creating teacher:', err);
-                                db.run('ROLLBACK');
-                                return res.status(500).json({ error: 'Error creating teacher: ' + err.message });
-                            }
-                            
-                            // Create user account for the teacher
-                            db.run(
-                                'INSERT INTO users (username, password, role, name, email, institution_id, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?, datetime("now"), datetime("now"))',
-                                [username, hashedPassword, 'teacher', name, email || null, req.user.institution_id],
-                                function(err) {
-                                    if (err) {
-                                        console.error('Error creating user account:', err);
-                                        db.run('ROLLBACK');
-                                        return res.status(500).json({ error: 'Error creating user account: ' + err.message });
-                                    }
-                                    
-                                    db.run('COMMIT', async (err) => {
+                queueTransaction(release => db.serialize(() => {
+                    db.run('BEGIN TRANSACTION', err => {
+                        if (err) {
+                            console.error('Error starting transaction:', err);
+                            release();
+                            return res.status(500).json({ error: 'Transaction error' });
+                        }
+                        
+                        // Create teacher record
+                        db.run(
+                            'INSERT INTO teachers (id, name, department, subject, status, email, phone, institution_id, photo_directory, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, datetime("now"), datetime("now"))',
+                            [id, name, department, subject || null, status || 'active', email || null, phone || null, req.user.institution_id, photoDirectory],
+                            function(err) {
+                                if (err) {
+                                    console.error('Error creating teacher:', err);
+                                    db.run('ROLLBACK', release);
+                                    return res.status(500).json({ error: 'Error creating teacher: ' + err.message });
+                                }
+                                
+                                // Create user account for the teacher
+                                db.run(
+                                    'INSERT INTO users (username, password, role, name, email, institution_id, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?, datetime("now"), datetime("now"))',
+                                    [username, hashedPassword, 'teacher', name, email || null, req.user.institution_id],
+                                    function(err) {
                                         if (err) {
-                                            console.error('Error committing transaction:', err);
-                                            return res.status(500).json({ error: 'Transaction error' });
+                                            console.error('Error creating user account:', err);
+                                            db.run('ROLLBACK', release);
+                                            return res.status(500).json({ error: 'Error creating user account: ' + err.message });
                                         }
                                         
-                                        console.log(`Teacher ${name} created with ID ${id} and username ${username}`);
-                                        
-                                        // Try to upload photos to Google Drive
-                                        let driveUploadResults = [];
-                                        if (req.files && req.files.length > 0) {
-                                            try {
-                                                // Get institution info for Drive folder structure
-                                                db.get('SELECT name, institution_code FROM institutions WHERE id = ?', [req.user.institution_id], async (err, institution) => {
-                                                    if (!err && institution) {
-                                                        try {
-                                                            console.log('Attempting Google Drive upload for teacher photos...');
-                                                            
-                                                            // Create or get institution folders
-                                                            const institutionFolders = await googleDrive.createInstitutionFolders(
-                                                                institution.name, 
-                                                                institution.institution_code
-                                                            );
-                                                            
-                                                            // Create user folder
-                                                            const userFolder = await googleDrive.createUserFolder(
-                                                                name, 
-                                                                'teacher', 
-                                                                institutionFolders
-                                                            );
-                                                            
-                                                            // Upload each photo
-                                                            for (const file of req.files) {
-                                                                const uploadResult = await googleDrive.uploadFile(
-                                                                    file.path,
-                                                                    file.originalname || file.filename,
-                                                                    userFolder.folderId,
-                                                                    file.mimetype
+                                        db.run('COMMIT', async (err) => {
+                                            if (err) {
+                                                console.error('Error committing transaction:', err);
+                                                db.run('ROLLBACK', release);
+                                                return res.status(500).json({ error: 'Transaction error' });
+                                            }
+                                            release();
+                                            
+                                            console.log(`Teacher ${name} created with ID ${id} and username ${username}`);
+                                            
+                                            // Try to upload photos to Google Drive
+                                            let driveUploadResults = [];
+                                            if (req.files && req.files.length > 0) {
+                                                try {
+                                                    // Get institution info for Drive folder structure
+                                                    db.get('SELECT name, institution_code FROM institutions WHERE id = ?', [req.user.institution_id], async (err, institution) => {
+                                                        if (!err && institution) {
+                                                            try {
+                                                                console.log('Attempting Google Drive upload for teacher photos...');
+                                                                
+                                                                // Create or get institution folders
+                                                                const institutionFolders = await googleDrive.createInstitutionFolders(
+                                                                    institution.name, 
+                                                                    institution.institution_code
                                                                 );
-                                                                driveUploadResults.push({
-                                                                    originalName: file.originalname || file.filename,
-                                                                    driveFileId: uploadResult.fileId,
-                                                                    driveFolderId: userFolder.folderId
+                                                                
+                                                                // Create user folder
+                                                                const userFolder = await googleDrive.createUserFolder(
+                                                                    name, 
+                                                                    'teacher', 
+                                                                    institutionFolders
+                                                                );
+                                                                
+                                                                // Upload each photo
+                                                                for (const file of req.files) {
+                                                                    const uploadResult = await googleDrive.uploadFile(
+                                                                        file.path,
+                                                                        file.originalname || file.filename,
+                                                                        userFolder.folderId,
+                                                                        file.mimetype
+                                                                    );
+                                                                    driveUploadResults.push({
+                                                                        originalName: file.originalname || file.filename,
+                                                                        driveFileId: uploadResult.fileId,
+                                                                        driveFolderId: userFolder.folderId
+                                                                    });
+                                                                }
+                                                                
+                                                                console.log(`Successfully uploaded ${driveUploadResults.length} photos to Google Drive for teacher ${name}`);
+                                                                
+                                                                // Update teacher record with Drive folder info
+                                                                db.run('UPDATE teachers SET drive_folder_id = ?, drive_photo_urls = ? WHERE id = ?', [
+                                                                    userFolder.folderId,
+                                                                    JSON.stringify(driveUploadResults),
+                                                                    id
+                                                                ], (updateErr) => {
+                                                                    if (updateErr) console.error('Error updating teacher with Drive info:', updateErr);
                                                                 });
+                                                                
+                                                            } catch (driveError) {
+                                                                console.error('Error uploading to Google Drive:', driveError);
                                                             }
-                                                            
-                                                            console.log(`Successfully uploaded ${driveUploadResults.length} photos to Google Drive for teacher ${name}`);
-                                                            
-                                                            // Update teacher record with Drive folder info
-                                                            db.run('UPDATE teachers SET drive_folder_id = ?, drive_photo_urls = ? WHERE id = ?', [
-                                                                userFolder.folderId,
-                                                                JSON.stringify(driveUploadResults),
-                                                                id
-                                                            ], (updateErr) => {
-                                                                if (updateErr) console.error('Error updating teacher with Drive info:', updateErr);
-                                                            });
-                                                            
-                                                        } catch (driveError) {
-                                                            console.error('Error uploading to Google Drive:', driveError);
                                                         }
-                                                    }
-                                                });
-                                            } catch (driveError) {
-                                                console.error('Error with Google Drive operation:', driveError);
+                                                    });
+                                                } catch (driveError) {
+                                                    console.error('Error with Google Drive operation:', driveError);
+                                                }
                                             }
-                                        }
-                                        
-                                        // Send response immediately (don't wait for Drive upload)
-                                        res.status(201).json({ 
-                                            success: true, 
-                                            data: { 
-                                                id, 
-                                                name, 
-                                                department, 
-                                                subject, 
-                                                status, 
-                                                username,
-                                                institution_id: req.user.institution_id,
-                                                photo_directory: photoDirectory,
-                                                photos: req.files ? req.files.map(file => ({
-                                                    filename: file.filename,
-                                                    path: file.path.replace(/\\/g, '/').replace(path.join(__dirname, '..').replace(/\\/g, '/'), '')
-                                                })) : [],
-                                                driveUpload: driveUploadResults.length > 0 ? 'success' : 'pending'
-                                            } 
+                                            
+                                            // Send response immediately (don't wait for Drive upload)
+                                            res.status(201).json({ 
+                                                success: true, 
+                                                data: { 
+                                                    id, 
+                                                    name, 
+                                                    department, 
+                                                    subject, 
+                                                    status, 
+                                                    username,
+                                                    institution_id: req.user.institution_id,
+                                                    photo_directory: photoDirectory,
+                                                    photos: req.files ? req.files.map(file => ({
+                                                        filename: file.filename,
+                                                        path: file.path.replace(/\\/g, '/').replace(path.join(__dirname, '..').replace(/\\/g, '/'), '')
+                                                    })) : [],
+                                                    driveUpload: driveUploadResults.length > 0 ? 'success' : 'pending'
+                                                } 
+                                            });
                                         });
-                                    });
-                                }
-                            );
-                        }
-                    );
-                });
+                                    }
+                                );
+                            }
+                        );
+                    });
+                }));
             });
         });
     });
@@ -2227,37 +2596,45 @@ app.delete('/api/teachers/:id', authenticateToken, (req, res) => {
         }
         
         // Start a transaction
-        db.serialize(() => {
-            db.run('BEGIN TRANSACTION');
-            
-            // Delete teacher record
-            db.run('DELETE FROM teachers WHERE id = ?', [teacherId], function(err) {
+        queueTransaction(release => db.serialize(() => {
+            db.run('BEGIN TRANSACTION', err => {
                 if (err) {
-                    console.error('Error deleting teacher:', err);
-                    db.run('ROLLBACK');
-                    return res.status(500).json({ error: 'Error deleting teacher' });
+                    console.error('Error starting transaction:', err);
+                    release();
+                    return res.status(500).json({ error: 'Transaction error' });
                 }
                 
-                // Delete associated user account
-                db.run('DELETE FROM users WHERE username = ? AND role = "teacher"', [teacher.id], function(err) {
+                // Delete teacher record
+                db.run('DELETE FROM teachers WHERE id = ?', [teacherId], function(err) {
                     if (err) {
-                        console.error('Error deleting user account:', err);
-                        db.run('ROLLBACK');
-                        return res.status(500).json({ error: 'Error deleting user account' });
+                        console.error('Error deleting teacher:', err);
+                        db.run('ROLLBACK', release);
+                        return res.status(500).json({ error: 'Error deleting teacher' });
                     }
                     
-                    db.run('COMMIT', err => {
+                    // Delete associated user account
+                    db.run('DELETE FROM users WHERE username = ? AND role = "teacher"', [teacher.id], function(err) {
                         if (err) {
-                            console.error('Error committing transaction:', err);
-                            return res.status(500).json({ error: 'Transaction error' });
+                            console.error('Error deleting user account:', err);
+                            db.run('ROLLBACK', release);
+                            return res.status(500).json({ error: 'Error deleting user account' });
                         }
                         
-                        console.log(`Teacher ${teacherId} deleted successfully`);
-                        res.json({ success: true, message: 'Teacher deleted successfully' });
+                        db.run('COMMIT', err => {
+                            if (err) {
+                                console.error('Error committing transaction:', err);
+                                db.run('ROLLBACK', release);
+                                return res.status(500).json({ error: 'Transaction error' });
+                            }
+                            release();
+                            
+                            console.log(`Teacher ${teacherId} deleted successfully`);
+                            res.json({ success: true, message: 'Teacher deleted successfully' });
+                        });
                     });
                 });
             });
-        });
+        }));
     });
 });
 
@@ -2967,6 +3344,36 @@ app.get('/api/drive/structure/:institutionId', authenticateToken, async (req, re
 });
 
 // ===== UTILITY FUNCTIONS =====
+
+// Fold one sighting into its institution/student/day rollup row (institution 0: none given)
+const ATTENDANCE_ROLLUP_UPSERT = `
+    INSERT INTO attendance_daily (institution_id, student_id, date, first_in, last_out, sighting_count, present)
+    VALUES (COALESCE(?, 0), ?, ?, ?, ?, 1, 1)
+    ON CONFLICT(institution_id, student_id, date) DO UPDATE SET
+        first_in = MIN(first_in, excluded.first_in),
+        last_out = MAX(last_out, excluded.last_out),
+        sighting_count = sighting_count + 1,
+        present = 1,
+        updated_at = CURRENT_TIMESTAMP
+`;
+
+// Prepared once and reused by every attendance write
+let attendanceStatements = null;
+function getAttendanceStatements() {
+    if (!attendanceStatements) {
+        attendanceStatements = {
+            insert: db.prepare(`
+                INSERT OR REPLACE INTO attendance 
+                (date, time, student_id, student_name, department, face_recognition, institution_id) 
+                VALUES (?, ?, ?, ?, ?, 1, ?)
+            `),
+            rollup: db.prepare(ATTENDANCE_ROLLUP_UPSERT)
+        };
+    }
+    return attendanceStatements;
+}
+
+// Insert records (and their daily rollups) in one transaction; all or nothing
 function insertAttendanceRecords(records) {
     return new Promise((resolve, reject) => {
         if (!records || records.length === 0) {
@@ -2974,52 +3381,79 @@ function insertAttendanceRecords(records) {
             return;
         }
 
-        db.serialize(() => {
+        queueTransaction(release => {
+            const finish = (err) => {
+                release();
+                if (err) reject(err);
+                else resolve();
+            };
+
             db.run('BEGIN TRANSACTION', (err) => {
                 if (err) {
                     console.error('Error starting transaction:', err);
-                    reject(err);
-                    return;
+                    return finish(err);
                 }
 
-                let completed = 0;
-                let hasError = false;
+                const statements = getAttendanceStatements();
+                const inserted = [];
+                let remaining = records.length;
+                let firstError = null;
+
+                // Roll back only once every queued statement has run, so none lands outside the transaction
+                const recordDone = (err) => {
+                    if (err && !firstError) {
+                        firstError = err;
+                        console.error('Error inserting attendance record:', err);
+                    }
+                    if (--remaining > 0) return;
 
-                records.forEach((record, index) => {
-                    db.run(`
-                        INSERT OR REPLACE INTO attendance 
-                        (date, time, student_id, student_name, department, face_recognition) 
-                        VALUES (?, ?, ?, ?, ?, 1)
-                    `, [
+                    if (firstError) {
+                        return db.run('ROLLBACK', () => finish(firstError));
+                    }
+                    db.run('COMMIT', (err) => {
+                        if (err) {
+                            console.error('Error committing transaction:', err);
+                            return db.run('ROLLBACK', () => finish(err));
+                        }
+                        console.log(`Successfully inserted ${records.length} attendance records`);
+                        publishAttendanceEvents(inserted.sort((a, b) => a.id - b.id));
+                        finish();
+                    });
+                };
+
+                records.forEach(record => {
+                    const institutionId = record.institution_id || null;
+                    statements.insert.run([
                         record.date,
                         record.time,
                         record.student_id,
                         record.student_name,
-                        record.department
+                        record.department,
+                        institutionId
                     ], function(err) {
-                        completed++;
-                        
-                        if (err && !hasError) {
-                            hasError = true;
-                            console.error('Error inserting attendance record:', err);
-                            db.run('ROLLBACK', () => {
-                                reject(err);
-                            });
-                            return;
+                        if (err || firstError) {
+                            return recordDone(err);
                         }
+                        inserted.push({
+                            id: this.lastID,
+                            date: record.date,
+                            time: record.time,
+                            student_id: record.student_id,
+                            student_name: record.student_name,
+                            department: record.department,
+                            status: 'present',
+                            face_recognition: 1,
+                            institution_id: institutionId
+                        });
 
-                        // If all records processed and no errors
-                        if (completed === records.length && !hasError) {
-                            db.run('COMMIT', (err) => {
-                                if (err) {
-                                    console.error('Error committing transaction:', err);
-                                    reject(err);
-                                } else {
-                                    console.log(`Successfully inserted ${records.length} attendance records`);
-                                    resolve();
-                                }
-                            });
-                        }
+                        // Keep the daily rollup in the same transaction as the raw row
+                        statements.rollup.run([
+                            institutionId,
+                            record.student_id,
+                            record.date,
+                            record.time,
+                            record.time
+                        ], recordDone);
                     });
                 });
             });
@@ -3027,6 +3461,45 @@ function insertAttendanceRecords(records) {
     });
 }
 
+// Group commit for realtime sightings: inserts that arrive while a group is
+// being committed (or in the same event-loop turn) share the next transaction
+// and its fsync, and each caller's promise settles on its own. An idle server
+// writes a lone sighting right away instead of waiting out a fixed window.
+const ATTENDANCE_GROUP_MAX_RECORDS = 500;
+const attendanceWriteQueue = { pending: [], scheduled: null, writing: false };
+
+function queueAttendanceInsert(record) {
+    return new Promise((resolve, reject) => {
+        attendanceWriteQueue.pending.push({ record, resolve, reject });
+        if (attendanceWriteQueue.pending.length >= ATTENDANCE_GROUP_MAX_RECORDS) {
+            flushAttendanceWrites();
+        } else if (!attendanceWriteQueue.scheduled && !attendanceWriteQueue.writing) {
+            attendanceWriteQueue.scheduled = setImmediate(flushAttendanceWrites);
+        }
+    });
+}
+
+function flushAttendanceWrites() {
+    clearImmediate(attendanceWriteQueue.scheduled);
+    attendanceWriteQueue.scheduled = null;
+    // One group in flight at a time; arrivals meanwhile form the next, larger group
+    if (attendanceWriteQueue.writing || attendanceWriteQueue.pending.length === 0) return;
+
+    const group = attendanceWriteQueue.pending.splice(0, ATTENDANCE_GROUP_MAX_RECORDS);
+    attendanceWriteQueue.writing = true;
+    insertAttendanceRecords(group.map(entry => entry.record))
+        .then(() => group.forEach(entry => entry.resolve()))
+        .catch(err => {
+            if (group.length === 1) return group[0].reject(err);
+            // Retry each record in its own transaction so only the bad one fails
+            group.forEach(entry => insertAttendanceRecords([entry.record]).then(entry.resolve, entry.reject));
+        })
+        .finally(() => {
+            attendanceWriteQueue.writing = false;
+            if (attendanceWriteQueue.pending.length > 0) flushAttendanceWrites();
+        });
+}
+
 // ===== API TEST ROUTE =====
 app.get('/api', (req, res) => {
     res.json({ 
@@ -3037,6 +3510,11 @@ app.get('/api', (req, res) => {
     });
 });
 
+// Lightweight health check used by the test and load tooling
+app.get('/api/health', (req, res) => {
+    res.json({ status: 'ok', timestamp: new Date().toISOString() });
+});
+
 // ===== STATIC FILE SERVING =====
 app.get('/', (req, res) => {
     res.sendFile(path.join(__dirname, '..', 'index.html'));
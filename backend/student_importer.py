@@ -0,0 +1,419 @@
+#!/usr/bin/env python3
+"""
+Bulk Student Importer for Cheick Mohamed School
+Reads a roster (CSV, or .xlsx when openpyxl is installed) plus a folder of
+photos, validates every row locally, then creates the students through
+POST /api/students with a bounded pool of upload workers. Each finished row
+is appended to a progress journal, so an interrupted import resumes with the
+first row that was not yet recorded. Students are created in the institution
+of the admin account used to log in.
+"""
+
+import argparse
+import csv
+import json
+import logging
+import os
+import re
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+
+import requests
+
+from school_client import API_BASE_URL, SchoolAPIError, SchoolClient
+
+ROSTER_FIELDS = ('id', 'name', 'department', 'class', 'status', 'email', 'phone', 'username', 'password')
+REQUIRED_FIELDS = ('id', 'name', 'department')
+# Header spellings accepted for the roster columns
+FIELD_ALIASES = {
+    'student_id': 'id',
+    'studentid': 'id',
+    'full_name': 'name',
+    'student_name': 'name',
+    'dept': 'department',
+    'class_name': 'class',
+    'photo': 'photos'
+}
+PHOTO_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.gif', '.webp', '.bmp')
+# Limits enforced by the server's multer configuration
+MAX_PHOTOS = 5
+MAX_PHOTO_BYTES = 5 * 1024 * 1024
+IMPORT_WORKERS = 4
+MAX_ATTEMPTS = 4
+BACKOFF_SECONDS = 1.0
+PROGRESS_INTERVAL_SECONDS = 10
+EMAIL_PATTERN = re.compile(r'^[^@\s]+@[^@\s]+\.[^@\s]+$')
+# Rows recorded with these statuses are not sent again on resume
+DONE_STATUSES = ('created', 'exists')
+# Recorded before a row's first POST, so a resumed run knows the create may have landed
+SENDING_STATUS = 'sending'
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_header(header):
+    key = re.sub(r'[\s\-]+', '_', (header or '').strip().lower())
+    return FIELD_ALIASES.get(key, key)
+
+
+def read_roster(path):
+    """Rows of the roster as dicts keyed by normalized column name, numbered from 1"""
+    ext = os.path.splitext(path)[1].lower()
+    if ext in ('.xlsx', '.xlsm'):
+        try:
+            from openpyxl import load_workbook
+        except ImportError:
+            raise ValueError('Reading .xlsx rosters requires openpyxl (pip install openpyxl); or export the sheet as CSV')
+        sheet = load_workbook(path, read_only=True, data_only=True).active
+        values = sheet.iter_rows(values_only=True)
+        headers = [normalize_header(str(h) if h is not None else '') for h in next(values, [])]
+        records = [{h: '' if v is None else str(v).strip() for h, v in zip(headers, row) if h} for row in values]
+    elif ext in ('.csv', '.txt', ''):
+        with open(path, 'r', encoding='utf-8-sig', newline='') as f:
+            reader = csv.DictReader(f)
+            headers = [normalize_header(h) for h in reader.fieldnames or []]
+            records = [{h: (v or '').strip() for h, v in zip(headers, row.values()) if h} for row in reader]
+    else:
+        raise ValueError(f'Unsupported roster format: {ext} (use .csv or .xlsx)')
+
+    missing = [field for field in REQUIRED_FIELDS if field not in headers]
+    if missing:
+        raise ValueError(f"Roster is missing required column(s): {', '.join(missing)}")
+    # Spreadsheets often carry trailing blank rows
+    return [dict(record, row=number) for number, record in enumerate(records, 1) if any(record.values())]
+
+
+def is_photo(filename):
+    return filename.lower().endswith(PHOTO_EXTENSIONS) and not filename.startswith('.')
+
+
+def index_photo_folder(photo_dir):
+    """Map lowercase keys to photo paths, read once for the whole roster.
+    A sub-folder contributes all its photos under the folder name; a loose
+    file contributes itself under its stem and, for names like S001_2.jpg or
+    S001-2.jpg, under the stem without the numeric suffix."""
+    index = {}
+    if not photo_dir:
+        return index
+    for entry in sorted(os.scandir(photo_dir), key=lambda e: e.name):
+        if entry.is_dir():
+            photos = sorted(os.path.join(entry.path, f) for f in os.listdir(entry.path) if is_photo(f))
+            index.setdefault(entry.name.lower(), []).extend(photos)
+        elif is_photo(entry.name):
+            stem = os.path.splitext(entry.name)[0].lower()
+            index.setdefault(stem, []).append(entry.path)
+            numbered = re.match(r'^(.+?)[_\-]\d+$', stem)
+            if numbered:
+                index.setdefault(numbered.group(1), []).append(entry.path)
+    return index
+
+
+def student_photos(record, photo_dir, photo_index):
+    """Photos for a roster row: an explicit photos column (paths separated by ';'
+    relative to the photo folder) wins, then a match on student id, then on name"""
+    if record.get('photos'):
+        return [os.path.join(photo_dir or '', p.strip()) for p in record['photos'].split(';') if p.strip()]
+    name = record.get('name', '').lower()
+    for key in (record.get('id', '').lower(), name, name.replace(' ', '_')):
+        if key and key in photo_index:
+            return photo_index[key]
+    return []
+
+
+def check_photo(path, verify_images):
+    """Error message for a photo the server would reject, or None"""
+    if not os.path.isfile(path):
+        return f'photo not found: {path}'
+    if not path.lower().endswith(PHOTO_EXTENSIONS):
+        return f'not an image file: {os.path.basename(path)}'
+    size = os.path.getsize(path)
+    if size == 0:
+        return f'empty photo: {os.path.basename(path)}'
+    if size > MAX_PHOTO_BYTES:
+        return f'photo over 5MB: {os.path.basename(path)} ({size / 1048576:.1f}MB)'
+    if verify_images:
+        try:
+            from PIL import Image
+        except ImportError:  # Pillow is optional; skip the decode check without it
+            return None
+        try:
+            with Image.open(path) as image:
+                image.verify()
+        except Exception:
+            return f'unreadable image: {os.path.basename(path)}'
+    return None
+
+
+def validate_roster(records, photo_dir=None, default_password=None, require_photos=False, verify_images=True):
+    """Check every row before anything is uploaded. Returns one entry per row with
+    the form fields to send, its photos, and lists of errors and warnings."""
+    photo_index = index_photo_folder(photo_dir)
+    seen_ids, seen_usernames = {}, {}
+    students = []
+    for record in records:
+        data = {field: record[field] for field in ROSTER_FIELDS if record.get(field)}
+        errors, warnings = [], []
+
+        for field in REQUIRED_FIELDS:
+            if not data.get(field):
+                errors.append(f'missing {field}')
+        # Student accounts default to the student id as username, as the server's delete route assumes
+        data.setdefault('username', data.get('id', ''))
+        if not data.get('password'):
+            if default_password:
+                data['password'] = default_password
+            else:
+                errors.append('missing password (add a password column or pass --default-password)')
+        if data.get('email') and not EMAIL_PATTERN.match(data['email']):
+            errors.append(f"invalid email: {data['email']}")
+
+        student_id, username = data.get('id'), data.get('username')
+        if student_id:
+            if student_id in seen_ids:
+                errors.append(f'duplicate id {student_id} (also on row {seen_ids[student_id]})')
+            seen_ids.setdefault(student_id, record['row'])
+        if username:
+            if username in seen_usernames:
+                errors.append(f'duplicate username {username} (also on row {seen_usernames[username]})')
+            seen_usernames.setdefault(username, record['row'])
+
+        photos = student_photos(record, photo_dir, photo_index)
+        if len(photos) > MAX_PHOTOS:
+            errors.append(f'{len(photos)} photos (the server accepts at most {MAX_PHOTOS})')
+        errors.extend(filter(None, (check_photo(p, verify_images) for p in photos)))
+        if not photos:
+            (errors if require_photos else warnings).append('no photos found')
+
+        students.append({'row': record['row'], 'data': data, 'photos': photos, 'errors': errors, 'warnings': warnings})
+    return students
+
+
+class ImportJournal:
+    """Append-only JSON-lines record of rows sent and finished, fsynced per line
+    so a crash leaves every in-flight upload marked as sent"""
+
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        self.entries = {}
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue  # a torn last line from a crash
+                    self.entries[entry['id']] = entry
+
+    def is_done(self, student_id):
+        entry = self.entries.get(student_id)
+        return bool(entry) and entry['status'] in DONE_STATUSES
+
+    def was_sent(self, student_id):
+        """True once any earlier run has sent this row to the server"""
+        return student_id in self.entries
+
+    def record(self, entry):
+        entry = dict(entry, at=datetime.now().isoformat())
+        with self.lock:
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(entry) + '\n')
+                f.flush()
+                os.fsync(f.fileno())
+            self.entries[entry['id']] = entry
+
+
+class StudentImporter:
+    """Uploads validated roster rows with a bounded worker pool"""
+
+    def __init__(self, client, journal, workers=IMPORT_WORKERS, max_attempts=MAX_ATTEMPTS,
+                 backoff_seconds=BACKOFF_SECONDS):
+        self.client = client
+        self.journal = journal
+        self.workers = workers
+        self.max_attempts = max_attempts
+        self.backoff_seconds = backoff_seconds
+        self.server_students = {}  # status -> ({id: student}, time.monotonic() when listed)
+        self.sent_at = {}  # id -> time.monotonic() when this run's last create for it ended
+        self.lookup_lock = threading.Lock()
+
+    def listed_students(self, status, student_id):
+        """The server's students with a status, by id. Listed once per run, and again only when
+        student_id is missing and this run has sent it since: rows sent by an earlier run, or
+        never created at all, are answered by the first listing."""
+        with self.lookup_lock:
+            listed = self.server_students.get(status)
+            if listed is None or (student_id not in listed[0] and self.sent_at.get(student_id, 0) >= listed[1]):
+                listed_at = time.monotonic()
+                listed = ({s['id']: s for s in self.client.list_students(status=status)}, listed_at)
+                self.server_students[status] = listed
+            return listed[0]
+
+    def find_created(self, data):
+        """The server's copy of a student this import created, or None. Student IDs are
+        global, so an existing ID only counts when name and institution match too."""
+        self.client.ensure_token()
+        institution_id = (self.client.user or {}).get('institution_id')
+        student = self.listed_students(data.get('status', 'active'), data['id']).get(data['id'])
+        if student and student['name'] == data['name'] and student.get('institution_id') == institution_id:
+            return student
+        return None
+
+    def upload(self, student):
+        """Create one student, retrying transient failures. POST /api/students is not
+        idempotent and the server stores the photos before its duplicate checks, so
+        before any resend (a retry, or a row a crashed run had sent) the student is
+        looked up first; one found there is recorded as 'exists' and its photos are
+        not sent again. Any 400, including 'already exists', is a failure."""
+        data = student['data']
+        sent = self.journal.was_sent(data['id'])
+        if not sent:
+            self.journal.record({'row': student['row'], 'id': data['id'], 'status': SENDING_STATUS, 'error': None})
+        for attempt in range(1, self.max_attempts + 1):
+            try:
+                if sent and self.find_created(data):
+                    return 'exists', 'created by an earlier attempt'
+                sent = True
+                try:
+                    self.client.create_student(data, student['photos'])
+                finally:
+                    self.sent_at[data['id']] = time.monotonic()
+                return 'created', None
+            except SchoolAPIError as e:
+                if e.status < 500 and e.status != 429:
+                    return 'failed', e.message
+                error = e.message
+            except requests.exceptions.RequestException as e:
+                error = str(e)
+            if attempt < self.max_attempts:
+                time.sleep(self.backoff_seconds * 2 ** (attempt - 1))
+        return 'failed', error
+
+    def run(self, students):
+        pending = [s for s in students if not s['errors'] and not self.journal.is_done(s['data']['id'])]
+        resumed = sum(1 for s in students if not s['errors'] and self.journal.is_done(s['data']['id']))
+        counts = {status: 0 for status in DONE_STATUSES + ('failed',)}
+        failures = []
+        photos_uploaded = bytes_uploaded = 0
+        if resumed:
+            logger.info(f"Resuming: {resumed} rows already imported, starting at row {pending[0]['row'] if pending else '-'}")
+
+        start = last_progress = time.time()
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            futures = {executor.submit(self.upload, s): s for s in pending}
+            try:
+                for done, future in enumerate(as_completed(futures), 1):
+                    student = futures[future]
+                    status, message = future.result()
+                    counts[status] += 1
+                    self.journal.record({'row': student['row'], 'id': student['data']['id'], 'status': status,
+                                         'error': message if status == 'failed' else None})
+                    if status == 'created':
+                        photos_uploaded += len(student['photos'])
+                        bytes_uploaded += sum(os.path.getsize(p) for p in student['photos'])
+                    elif status == 'failed':
+                        failures.append({'row': student['row'], 'id': student['data']['id'], 'error': message})
+
+                    now = time.time()
+                    if now - last_progress >= PROGRESS_INTERVAL_SECONDS or done == len(pending):
+                        last_progress = now
+                        rate = done / (now - start) * 60
+                        eta = (len(pending) - done) / rate if rate else 0
+                        logger.info(f"{done}/{len(pending)} rows, {rate:.1f} rows/min, ~{eta:.1f} min left")
+            except BaseException:  # Ctrl-C or a crash: stop queued uploads, keep the journal as is
+                executor.shutdown(wait=True, cancel_futures=True)
+                raise
+        elapsed = time.time() - start
+
+        return {
+            'rows': len(students),
+            'invalid': sum(1 for s in students if s['errors']),
+            'resumed': resumed,
+            'attempted': len(pending),
+            'created': counts['created'],
+            'already_existed': counts['exists'],
+            'failed': counts['failed'],
+            'photos_uploaded': photos_uploaded,
+            'bytes_uploaded': bytes_uploaded,
+            'elapsed_seconds': round(elapsed, 2),
+            'students_per_minute': round(counts['created'] / elapsed * 60, 1) if elapsed else 0.0,
+            'workers': self.workers,
+            'failures': failures
+        }
+
+
+def main():
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description='Bulk-import students and their photos from a roster')
+    parser.add_argument('roster', help='Roster .csv or .xlsx with id, name, department and optional '
+                                       'class, status, email, phone, username, password, photos columns')
+    parser.add_argument('--photos', help='Folder of photos: <id or name>/ sub-folders or <id>[_N].jpg files')
+    parser.add_argument('--api-url', default=API_BASE_URL)
+    parser.add_argument('--username', default=os.getenv('SCHOOL_API_USERNAME'),
+                        help='Institution admin account the students are created under')
+    parser.add_argument('--password', default=os.getenv('SCHOOL_API_PASSWORD'))
+    parser.add_argument('--default-password', help='Password for rows without a password column')
+    parser.add_argument('--workers', type=int, default=IMPORT_WORKERS, help='Concurrent uploads')
+    parser.add_argument('--journal', help='Progress journal (default: <roster>.import.jsonl)')
+    parser.add_argument('--require-photos', action='store_true', help='Treat rows without photos as invalid')
+    parser.add_argument('--skip-invalid', action='store_true', help='Import the valid rows even if some are invalid')
+    parser.add_argument('--validate-only', action='store_true', help='Only run the local checks')
+    parser.add_argument('--output', default='student_import_report.json')
+    args = parser.parse_args()
+
+    try:
+        records = read_roster(args.roster)
+    except (OSError, ValueError) as e:
+        print(f"❌ {e}")
+        return 1
+    students = validate_roster(records, args.photos, args.default_password, args.require_photos)
+    invalid = [s for s in students if s['errors']]
+    warned = [s for s in students if s['warnings'] and not s['errors']]
+    print(f"📋 {len(students)} rows: {len(students) - len(invalid)} valid, {len(invalid)} invalid, "
+          f"{sum(len(s['photos']) for s in students)} photos")
+    for student in invalid[:20]:
+        print(f"   ❌ row {student['row']} ({student['data'].get('id', '?')}): {'; '.join(student['errors'])}")
+    if len(invalid) > 20:
+        print(f"   ... and {len(invalid) - 20} more (see {args.output})")
+    if warned:
+        print(f"   ⚠️  {len(warned)} rows have warnings (e.g. row {warned[0]['row']}: {warned[0]['warnings'][0]})")
+
+    report = {'roster': os.path.abspath(args.roster), 'generated_at': datetime.now().isoformat(),
+              'invalid_rows': [{'row': s['row'], 'id': s['data'].get('id'), 'errors': s['errors']} for s in invalid]}
+    if args.validate_only or (invalid and not args.skip_invalid):
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        if invalid and not args.validate_only:
+            print("🛑 Nothing uploaded: fix the rows above or pass --skip-invalid")
+        return 1 if invalid else 0
+    if not (args.username and args.password):
+        print("❌ --username and --password (or SCHOOL_API_USERNAME/SCHOOL_API_PASSWORD) are required")
+        return 1
+
+    client = SchoolClient(args.api_url, args.username, args.password, pool_size=args.workers)
+    journal = ImportJournal(args.journal or f'{args.roster}.import.jsonl')
+    try:
+        client.ensure_token()
+        report.update(StudentImporter(client, journal, args.workers).run(students))
+    except SchoolAPIError as e:
+        print(f"❌ {e}")
+        return 1
+    except KeyboardInterrupt:
+        print(f"\n⏸️  Interrupted; rerun the same command to resume from {journal.path}")
+        return 130
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"✅ Created {report['created']}, already existed {report['already_existed']}, "
+          f"failed {report['failed']}, resumed past {report['resumed']}")
+    print(f"⚡ {report['students_per_minute']} students/min with {report['workers']} workers "
+          f"({report['elapsed_seconds']}s, {report['photos_uploaded']} photos)")
+    print(f"📄 Report saved to: {args.output}; journal: {journal.path}")
+    return 1 if report['failed'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
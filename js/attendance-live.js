@@ -3,16 +3,20 @@
 // Global variables
 let attendanceData = [];
 let autoRefreshInterval;
+let attendanceEventSource = null;
 let isAutoRefreshEnabled = true;
 let lastUpdateTime = null;
+let lastEventId = null;
 
 // API Configuration
 const API_CONFIG = {
     baseURL: getAPIBaseURL(),
     endpoints: {
-        attendance: '/attendance/public'
+        attendance: '/attendance/public',
+        stream: '/attendance/stream'
     },
-    refreshInterval: 10000 // 10 seconds
+    maxRecords: 50,
+    refreshInterval: 10000 // 10 seconds, only used when EventSource is unavailable
 };
 
 // Get API base URL based on current environment
@@ -29,11 +33,8 @@ document.addEventListener('DOMContentLoaded', function() {
     console.log('🎯 Live Attendance Page Initialized');
     console.log('🌐 API Base URL:', API_CONFIG.baseURL);
     
-    // Load initial data
-    loadAttendanceData();
-    
-    // Start auto-refresh
-    startAutoRefresh();
+    // Load initial data, then stream new records from where the snapshot ends
+    loadAttendanceData().then(startAutoRefresh);
     
     // Setup keyboard shortcuts
     setupKeyboardShortcuts();
@@ -46,7 +47,7 @@ async function loadAttendanceData() {
         showLoadingState();
         console.log('📡 Fetching attendance data...');
         
-        const response = await fetch(`${API_CONFIG.baseURL}${API_CONFIG.endpoints.attendance}?limit=50`);
+        const response = await fetch(`${API_CONFIG.baseURL}${API_CONFIG.endpoints.attendance}?limit=${API_CONFIG.maxRecords}`);
         
         if (!response.ok) {
             throw new Error(`HTTP ${response.status}: ${response.statusText}`);
@@ -58,6 +59,9 @@ async function loadAttendanceData() {
         if (result.success && result.data && Array.isArray(result.data)) {
             attendanceData = result.data;
             lastUpdateTime = new Date();
+            if (attendanceData.length > 0) {
+                lastEventId = Math.max(lastEventId || 0, ...attendanceData.map(record => record.id));
+            }
             
             console.log(`✅ Loaded ${attendanceData.length} attendance records`);
             displayAttendanceData();
@@ -183,21 +187,75 @@ function updateStatistics() {
     }
 }
 
-// ===== AUTO REFRESH =====
+// ===== LIVE UPDATES =====
 
 function startAutoRefresh() {
-    if (autoRefreshInterval) {
-        clearInterval(autoRefreshInterval);
+    stopAutoRefresh();
+    
+    if (!isAutoRefreshEnabled) {
+        return;
     }
     
-    if (isAutoRefreshEnabled) {
+    if (window.EventSource) {
+        openAttendanceStream();
+    } else {
+        // Older browsers: fall back to polling
         autoRefreshInterval = setInterval(() => {
             console.log('🔄 Auto-refreshing attendance data...');
             loadAttendanceData();
         }, API_CONFIG.refreshInterval);
-        
-        updateAutoRefreshButton();
     }
+    
+    updateAutoRefreshButton();
+}
+
+function stopAutoRefresh() {
+    if (autoRefreshInterval) {
+        clearInterval(autoRefreshInterval);
+        autoRefreshInterval = null;
+    }
+    if (attendanceEventSource) {
+        attendanceEventSource.close();
+        attendanceEventSource = null;
+    }
+}
+
+function openAttendanceStream() {
+    // The first connection resumes after the snapshot; reconnects send Last-Event-ID themselves
+    const resume = lastEventId !== null ? `?lastEventId=${lastEventId}` : '';
+    attendanceEventSource = new EventSource(`${API_CONFIG.baseURL}${API_CONFIG.endpoints.stream}${resume}`);
+    
+    attendanceEventSource.addEventListener('open', () => {
+        console.log('📡 Live attendance stream connected');
+    });
+    attendanceEventSource.addEventListener('attendance', handleAttendanceEvent);
+    attendanceEventSource.addEventListener('reset', handleStreamReset);
+    attendanceEventSource.addEventListener('error', () => {
+        console.warn('⚠️ Live attendance stream interrupted, reconnecting...');
+    });
+}
+
+function handleAttendanceEvent(event) {
+    const record = JSON.parse(event.data);
+    if (attendanceData.some(existing => existing.id === record.id)) {
+        return;
+    }
+    
+    attendanceData = [record, ...attendanceData].slice(0, API_CONFIG.maxRecords);
+    lastEventId = Math.max(lastEventId || 0, record.id);
+    lastUpdateTime = new Date();
+    
+    displayAttendanceData();
+    updateStatistics();
+    hideLoadingState();
+}
+
+// Sent when we were disconnected for longer than the server can replay: reload the snapshot
+// instead of showing a feed with a gap in it. The stream carries on after the reset's id.
+function handleStreamReset(event) {
+    console.warn('⚠️ Missed too many updates while disconnected, reloading attendance...');
+    lastEventId = Math.max(lastEventId || 0, JSON.parse(event.data).last_id);
+    loadAttendanceData();
 }
 
 function toggleAutoRefresh() {
@@ -205,12 +263,10 @@ function toggleAutoRefresh() {
     
     if (isAutoRefreshEnabled) {
         startAutoRefresh();
-        console.log('✅ Auto-refresh enabled');
+        console.log('✅ Live updates enabled');
     } else {
-        if (autoRefreshInterval) {
-            clearInterval(autoRefreshInterval);
-        }
-        console.log('⏸️ Auto-refresh disabled');
+        stopAutoRefresh();
+        console.log('⏸️ Live updates disabled');
     }
     
     updateAutoRefreshButton();
@@ -219,10 +275,10 @@ function toggleAutoRefresh() {
 function updateAutoRefreshButton() {
     const button = document.getElementById('autoRefreshToggle');
     if (isAutoRefreshEnabled) {
-        button.innerHTML = '<i class="fas fa-pause"></i> Auto Refresh: ON';
+        button.innerHTML = '<i class="fas fa-pause"></i> Live Updates: ON';
         button.classList.remove('disabled');
     } else {
-        button.innerHTML = '<i class="fas fa-play"></i> Auto Refresh: OFF';
+        button.innerHTML = '<i class="fas fa-play"></i> Live Updates: OFF';
         button.classList.add('disabled');
     }
 }
@@ -372,9 +428,7 @@ function setupKeyboardShortcuts() {
 // ===== CLEANUP =====
 
 window.addEventListener('beforeunload', function() {
-    if (autoRefreshInterval) {
-        clearInterval(autoRefreshInterval);
-    }
+    stopAutoRefresh();
 });
 
 // ===== EXPOSE FUNCTIONS FOR TESTING =====
@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+"""
+Performance regression gate
+Compares a performance report (load test, soak or benchmark JSON) against a
+committed baseline and exits non-zero when a gated metric regresses past its tolerance.
+"""
+
+import argparse
+import json
+import os
+import platform
+import re
+import statistics
+import sys
+from datetime import datetime
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_BASELINE_PATH = os.path.join(SCRIPT_DIR, 'perf_baseline.json')
+
+HIGHER_IS_BETTER = 'higher'
+LOWER_IS_BETTER = 'lower'
+
+# Metric classes gated by default: leaf-key pattern, direction, allowed relative change
+METRIC_CLASSES = {
+    'throughput': (r'(throughput|_rps$|_per_sec$|_per_min$)', HIGHER_IS_BETTER),
+    'p99': (r'^p99', LOWER_IS_BETTER),
+    'rss': (r'rss', LOWER_IS_BETTER)
+}
+DEFAULT_TOLERANCES = {
+    'throughput': 0.10,
+    'p99': 0.20,
+    'rss': 0.15
+}
+# Latency changes smaller than this are treated as noise regardless of tolerance
+MIN_LATENCY_DELTA_MS = 1.0
+
+
+def identity_key(item, index):
+    """Stable key for list entries so steps are matched by meaning, not position"""
+    if isinstance(item, dict):
+        for key in ('name', 'tenants', 'label', 'endpoint'):
+            if key in item:
+                return f'{key}={item[key]}'
+    return str(index)
+
+
+def child_items(node):
+    """(key, child) pairs of a dict or list, list entries keyed by identity_key"""
+    if isinstance(node, dict):
+        return node.items()
+    if isinstance(node, list):
+        return ((f'[{identity_key(item, i)}]', item) for i, item in enumerate(node))
+    return ()
+
+
+def join_path(prefix, key):
+    return f'{prefix}.{key}' if prefix and not key.startswith('[') else f'{prefix}{key}'
+
+
+def flatten_metrics(report, prefix=''):
+    """Flatten nested report JSON into {path: number} for every numeric leaf"""
+    metrics = {}
+    for key, value in child_items(report):
+        path = join_path(prefix, key)
+        if isinstance(value, bool):
+            continue
+        if isinstance(value, (int, float)):
+            metrics[path] = float(value)
+        else:
+            metrics.update(flatten_metrics(value, path))
+    return metrics
+
+
+def median_report(reports):
+    """The first report with every numeric leaf replaced by its median across all of
+    them, so a baseline taken from several runs is not one run's noise"""
+    samples = [flatten_metrics(report) for report in reports]
+
+    def merge(node, path):
+        if isinstance(node, bool):
+            return node
+        if isinstance(node, (int, float)):
+            values = [sample[path] for sample in samples if path in sample]
+            # Run parameters such as the tenant count are equal in every run and keep their type
+            return node if all(value == node for value in values) else statistics.median(values)
+        if isinstance(node, dict):
+            return {key: merge(value, join_path(path, key)) for key, value in node.items()}
+        if isinstance(node, list):
+            return [merge(value, join_path(path, key)) for key, value in child_items(node)]
+        return node
+
+    return merge(reports[0], '')
+
+
+def classify(path, tolerances):
+    """Return (class name, direction) for a gated metric path, or (None, None)"""
+    leaf = re.split(r'[.\]]', path)[-1]
+    for name in tolerances:
+        pattern, direction = METRIC_CLASSES.get(name, (f'^{re.escape(name)}', LOWER_IS_BETTER))
+        if re.search(pattern, leaf):
+            return name, direction
+    return None, None
+
+
+def compare_reports(current, baseline, tolerances=None):
+    """Compare two reports and return a list of per-metric comparison dicts"""
+    tolerances = tolerances or DEFAULT_TOLERANCES
+    current_metrics = flatten_metrics(current)
+    baseline_metrics = flatten_metrics(baseline)
+    results = []
+
+    for path, base_value in sorted(baseline_metrics.items()):
+        metric_class, direction = classify(path, tolerances)
+        if not metric_class:
+            continue
+
+        result = {
+            'metric': path,
+            'class': metric_class,
+            'baseline': base_value,
+            'current': current_metrics.get(path),
+            'tolerance': tolerances[metric_class],
+            'change': None,
+            'status': 'missing'
+        }
+        if result['current'] is None:
+            results.append(result)
+            continue
+
+        current_value = result['current']
+        if base_value == 0:
+            change = 0.0 if current_value == 0 else float('inf')
+        else:
+            change = (current_value - base_value) / abs(base_value)
+        result['change'] = change
+
+        worse = -change if direction == HIGHER_IS_BETTER else change
+        small_latency_delta = path.endswith('_ms') and abs(current_value - base_value) < MIN_LATENCY_DELTA_MS
+        if worse > result['tolerance'] and not small_latency_delta:
+            result['status'] = 'regression'
+        elif worse < -result['tolerance']:
+            result['status'] = 'improved'
+        else:
+            result['status'] = 'ok'
+        results.append(result)
+
+    return results
+
+
+def parse_tolerances(values):
+    """Parse ['p99=0.25', 'rss=0.1'] overrides on top of the defaults"""
+    tolerances = dict(DEFAULT_TOLERANCES)
+    for value in values or []:
+        name, _, fraction = value.partition('=')
+        try:
+            tolerances[name.strip()] = float(fraction)
+        except ValueError:
+            raise ValueError(f"Invalid tolerance '{value}', expected NAME=FRACTION")
+    return tolerances
+
+
+def baseline_source(report_paths, note=None):
+    """Where a baseline was recorded; its numbers only hold on comparable hardware"""
+    return {
+        'reports': [os.path.basename(path) for path in report_paths],
+        'recorded_at': datetime.now().isoformat(timespec='seconds'),
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'cpu_count': os.cpu_count(),
+        'python': platform.python_version(),
+        'note': note
+    }
+
+
+def load_json(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def print_results(results):
+    regressions = [r for r in results if r['status'] == 'regression']
+    missing = [r for r in results if r['status'] == 'missing']
+    for r in results:
+        if r['status'] == 'missing':
+            print(f"[MISSING]    {r['metric']}: baseline {r['baseline']:.2f}, not in current report")
+            continue
+        marker = {'regression': 'REGRESSION', 'improved': 'IMPROVED', 'ok': 'OK'}[r['status']]
+        print(f"[{marker:10}] {r['metric']}: {r['baseline']:.2f} -> {r['current']:.2f} "
+              f"({r['change']:+.1%}, tolerance {r['tolerance']:.0%})")
+
+    print(f"\n=== PERFORMANCE GATE ===")
+    print(f"Metrics compared: {len(results)}")
+    print(f"Regressions: {len(regressions)}")
+    print(f"Missing: {len(missing)}")
+    return regressions, missing
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Fail when a performance report regresses against the baseline')
+    parser.add_argument('report', nargs='+',
+                        help='Current performance report JSON (with --update-baseline, one or more runs to take the median of)')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE_PATH, help='Committed baseline report JSON')
+    parser.add_argument('--tolerance', action='append', default=[],
+                        help='Override a tolerance, e.g. p99=0.25 or throughput=0.05 (repeatable)')
+    parser.add_argument('--allow-missing', action='store_true', help='Do not fail when baseline metrics are absent')
+    parser.add_argument('--update-baseline', action='store_true', help='Write the report as the new baseline and exit')
+    parser.add_argument('--note', help='With --update-baseline: how the report was produced (command, server, dataset)')
+    args = parser.parse_args()
+
+    if args.update_baseline:
+        report = median_report([load_json(path) for path in args.report])
+        report['baseline_source'] = baseline_source(args.report, args.note)
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"✅ Baseline updated: {args.baseline}")
+        return 0
+    if len(args.report) > 1:
+        parser.error('compare one report at a time (several are only accepted with --update-baseline)')
+    report = load_json(args.report[0])
+
+    if not os.path.exists(args.baseline):
+        print(f"❌ Baseline not found: {args.baseline} (create it with --update-baseline)")
+        return 2
+
+    try:
+        tolerances = parse_tolerances(args.tolerance)
+    except ValueError as e:
+        parser.error(str(e))
+
+    baseline = load_json(args.baseline)
+    source = baseline.get('baseline_source')
+    if source:
+        print(f"Baseline recorded {source['recorded_at']} on {source['platform']} "
+              f"({source['cpu_count']} CPUs, Python {source['python']})")
+        if source.get('note'):
+            print(f"  from: {source['note']}")
+    results = compare_reports(report, baseline, tolerances)
+    regressions, missing = print_results(results)
+
+    if regressions or (missing and not args.allow_missing):
+        print("\n❌ Performance regression detected")
+        return 1
+    print("\n🎉 No performance regressions")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
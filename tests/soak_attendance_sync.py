@@ -0,0 +1,264 @@
+#!/usr/bin/env python3
+"""
+Soak test for the attendance sync daemon
+Drives AttendanceSync against the synthetic generator and a local stub API
+server through hours of accelerated time, sampling RSS, open file descriptors,
+thread count and checkpoint size. Fails if any of them keep trending upward.
+Run from the project root: python -m tests.soak_attendance_sync
+"""
+
+import argparse
+import json
+import logging
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+
+import requests
+
+from tests.synthetic_attendance import SyntheticSchool, write_csv
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(SCRIPT_DIR)
+BACKEND_DIR = os.path.join(PROJECT_ROOT, 'backend')
+STUB_SERVER = os.path.join(SCRIPT_DIR, 'stub_api_server.py')
+
+# Allowed growth of the fitted trend across the steady-state window: (relative, absolute)
+TREND_THRESHOLDS = {
+    'rss_mb': (0.10, 5.0),
+    'open_fds': (0.25, 5),
+    'threads': (0.25, 2),
+    'checkpoint_bytes': (0.20, 4096)
+}
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def read_proc_status():
+    """VmRSS (MB) and thread count from /proc, or None where unavailable"""
+    rss_mb = threads = None
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    rss_mb = int(line.split()[1]) / 1024.0
+                elif line.startswith('Threads:'):
+                    threads = int(line.split()[1])
+    except OSError:
+        pass
+    return rss_mb, threads
+
+
+def sample_process(checkpoint_path):
+    """Take one resource sample of the current (daemon) process"""
+    rss_mb, threads = read_proc_status()
+    if rss_mb is None:
+        import resource
+        rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0
+    try:
+        open_fds = len(os.listdir('/proc/self/fd'))
+    except OSError:
+        open_fds = None
+    return {
+        'rss_mb': round(rss_mb, 2),
+        'open_fds': open_fds,
+        'threads': threads if threads is not None else threading.active_count(),
+        'checkpoint_bytes': os.path.getsize(checkpoint_path) if os.path.exists(checkpoint_path) else 0
+    }
+
+
+def linear_trend(xs, ys):
+    """Least-squares slope and intercept"""
+    n = len(xs)
+    mean_x = sum(xs) / n
+    mean_y = sum(ys) / n
+    var_x = sum((x - mean_x) ** 2 for x in xs)
+    if var_x == 0:
+        return 0.0, mean_y
+    slope = sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, ys)) / var_x
+    return slope, mean_y - slope * mean_x
+
+
+def evaluate_trends(samples, warmup_fraction, thresholds=TREND_THRESHOLDS):
+    """Fit a line per metric over the post-warmup samples and flag sustained growth"""
+    steady = samples[int(len(samples) * warmup_fraction):]
+    results = {}
+    for metric, (relative, absolute) in thresholds.items():
+        points = [(s['sim_hours'], s[metric]) for s in steady if s.get(metric) is not None]
+        if len(points) < 3:
+            results[metric] = {'status': 'skipped', 'reason': 'not enough samples'}
+            continue
+
+        xs, ys = zip(*points)
+        slope, intercept = linear_trend(xs, ys)
+        start = intercept + slope * xs[0]
+        growth = slope * (xs[-1] - xs[0])
+        relative_growth = growth / start if start > 0 else 0.0
+        leaking = growth > absolute and relative_growth > relative
+        results[metric] = {
+            'status': 'FAIL' if leaking else 'PASS',
+            'start': round(start, 2),
+            'growth': round(growth, 2),
+            'relative_growth': round(relative_growth, 4),
+            'slope_per_hour': round(slope, 4),
+            'threshold_relative': relative,
+            'threshold_absolute': absolute
+        }
+    return results
+
+
+class SoakTest:
+    """Runs the sync daemon in-process against a stub server in a child process"""
+
+    def __init__(self, args):
+        self.args = args
+        self.workdir = tempfile.mkdtemp(prefix='attendance_soak_')
+        self.csv_path = os.path.join(self.workdir, 'Pattendance_log.csv')
+        self.checkpoint_path = os.path.join(self.workdir, 'processed_records.json')
+        self.port = free_port()
+        self.stub = None
+        self.samples = []
+
+    def start_stub(self):
+        command = [sys.executable, STUB_SERVER, '--port', str(self.port),
+                   '--latency', self.args.latency, '--error-rate', str(self.args.error_rate),
+                   '--reset-rate', str(self.args.reset_rate), '--seed', str(self.args.seed)]
+        self.stub = subprocess.Popen(command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        for _ in range(50):
+            try:
+                requests.get(f'{self.api_url}/_stub/stats', timeout=1)
+                return
+            except requests.exceptions.RequestException:
+                time.sleep(0.1)
+        raise RuntimeError('Stub API server did not start')
+
+    @property
+    def api_url(self):
+        return f'http://127.0.0.1:{self.port}/api'
+
+    def load_daemon(self):
+        """Import attendance_sync configured for the soak sandbox"""
+        os.environ['ATTENDANCE_API_URL'] = self.api_url
+        os.environ['ATTENDANCE_CSV_PATH'] = self.csv_path
+        os.environ['ATTENDANCE_CHECKPOINT_PATH'] = self.checkpoint_path
+        os.environ['ATTENDANCE_RETRY_PATH'] = os.path.join(self.workdir, 'retry_records.json')
+        os.environ['ATTENDANCE_RETENTION_DAYS'] = str(self.args.retention_days)
+        os.chdir(self.workdir)  # attendance_sync writes its log file to the cwd
+        sys.path.insert(0, BACKEND_DIR)
+        import attendance_sync
+        if not self.args.verbose:
+            attendance_sync.logger.setLevel(logging.WARNING)
+        return attendance_sync.AttendanceSync()
+
+    def run(self):
+        print("=== Attendance Sync Soak Test ===")
+        print(f"Simulated hours: {self.args.hours}, tick: {self.args.tick_seconds}s, students: {self.args.students}")
+        print(f"Work directory: {self.workdir}")
+
+        self.start_stub()
+        try:
+            daemon = self.load_daemon()
+            school = SyntheticSchool(self.args.students, self.args.seed)
+            sim_start = datetime.strptime(self.args.start, '%Y-%m-%d')
+            tick = timedelta(seconds=self.args.tick_seconds)
+            total_ticks = int(self.args.hours * 3600 / self.args.tick_seconds)
+            sample_every = max(1, total_ticks // self.args.samples)
+            write_csv(self.csv_path, [])
+
+            wall_start = time.monotonic()
+            sim_now = sim_start
+            events_generated = 0
+            for tick_number in range(total_ticks):
+                sim_next = sim_now + tick
+                if sim_next.date() != sim_now.date():
+                    write_csv(self.csv_path, [])  # the recognizer rotates its log daily
+                events = school.events_between(sim_now, sim_next)
+                if events:
+                    write_csv(self.csv_path, events, append=True)
+                    events_generated += len(events)
+                # Advance the file mtime with simulated time so change detection behaves
+                os.utime(self.csv_path, (sim_next.timestamp(), sim_next.timestamp()))
+                daemon.sync_attendance()
+                sim_now = sim_next
+
+                if tick_number % sample_every == 0 or tick_number == total_ticks - 1:
+                    sample = sample_process(self.checkpoint_path)
+                    sample['sim_hours'] = round((sim_now - sim_start).total_seconds() / 3600.0, 3)
+                    sample['processed_records'] = len(daemon.processed_records)
+                    self.samples.append(sample)
+
+            wall_seconds = time.monotonic() - wall_start
+            stub_stats = requests.get(f'{self.api_url}/_stub/stats', timeout=5).json()['data']
+        finally:
+            self.stub.terminate()
+            self.stub.wait(timeout=10)
+
+        trends = evaluate_trends(self.samples, self.args.warmup)
+        return self.report(trends, events_generated, wall_seconds, stub_stats)
+
+    def report(self, trends, events_generated, wall_seconds, stub_stats):
+        print(f"\n=== SOAK REPORT ===")
+        print(f"Wall time: {wall_seconds:.1f}s for {self.args.hours} simulated hours "
+              f"({self.args.hours * 3600 / max(wall_seconds, 1e-9):.0f}x)")
+        print(f"Events generated: {events_generated}, stored by stub: {stub_stats['stored']}")
+        for metric, result in trends.items():
+            if result['status'] == 'skipped':
+                print(f"[SKIP] {metric}: {result['reason']}")
+            else:
+                print(f"[{result['status']}] {metric}: start {result['start']}, "
+                      f"growth {result['growth']} ({result['relative_growth']:+.1%})")
+
+        passed = all(r['status'] != 'FAIL' for r in trends.values())
+        report = {
+            'summary': {
+                'passed': passed,
+                'simulated_hours': self.args.hours,
+                'wall_seconds': round(wall_seconds, 2),
+                'events_generated': events_generated,
+                'events_per_sec': round(events_generated / wall_seconds, 2) if wall_seconds else 0.0,
+                'peak_rss_mb': max(s['rss_mb'] for s in self.samples) if self.samples else 0.0
+            },
+            'stub': stub_stats,
+            'trends': trends,
+            'samples': self.samples,
+            'generated_at': datetime.now().isoformat()
+        }
+        with open(self.args.report, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"\nDetailed report saved to: {self.args.report}")
+        print("\n🎉 No resource growth detected" if passed else "\n⚠️  Resource growth detected - check report")
+        return passed
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Soak test the attendance sync daemon in accelerated time')
+    parser.add_argument('--hours', type=float, default=72, help='Simulated hours to run')
+    parser.add_argument('--tick-seconds', type=int, default=60, help='Simulated seconds per daemon sync pass')
+    parser.add_argument('--students', type=int, default=300)
+    parser.add_argument('--start', default='2025-01-06', help='Simulated start date (YYYY-MM-DD)')
+    parser.add_argument('--samples', type=int, default=60, help='Approximate number of resource samples')
+    parser.add_argument('--warmup', type=float, default=0.5, help='Fraction of samples ignored before trend fitting')
+    parser.add_argument('--retention-days', type=int, default=1, help='Daemon checkpoint retention window')
+    parser.add_argument('--latency', default='none', help='Stub latency spec, see stub_api_server.py')
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--reset-rate', type=float, default=0.0)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--report', default=os.path.abspath('soak_test_report.json'))
+    parser.add_argument('--verbose', action='store_true', help='Keep the daemon INFO logging')
+    args = parser.parse_args()
+
+    success = SoakTest(args).run()
+    sys.exit(0 if success else 1)
+
+
+if __name__ == '__main__':
+    main()
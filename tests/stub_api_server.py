@@ -0,0 +1,464 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the school API server
+Serves /api/attendance/realtime, /api/attendance/public and /api/health from
+memory so the sync daemon can be benchmarked and fault-tested fully offline.
+Also serves /api/auth/login, /api/classes and /api/institutions (with ETags and
+expiring JWT-shaped tokens) for exercising backend/school_client.py, and a
+multipart POST /api/students with the server's validation and upload limits
+for backend/student_importer.py.
+"""
+
+import argparse
+import base64
+import email.parser
+import email.policy
+import hashlib
+import json
+import random
+import socket
+import struct
+import sys
+import threading
+import time
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+REQUIRED_ATTENDANCE_FIELDS = ('date', 'time', 'name', 'id', 'dept')
+STUB_USERS = {'admin': 'admin123'}
+# Institution of the stub admin; students it creates are scoped to it
+STUB_INSTITUTION_ID = 1
+TOKEN_TTL_SECONDS = 24 * 3600
+REQUIRED_STUDENT_FIELDS = ('id', 'name', 'department', 'username', 'password')
+MAX_PHOTOS = 5
+MAX_PHOTO_BYTES = 5 * 1024 * 1024
+
+
+def parse_latency_spec(spec):
+    """Parse a latency spec such as 'fixed:20', 'uniform:5,50', 'normal:30,10',
+    'exp:25' or 'lognormal:3,0.5' into a sampler returning seconds.
+    Values are milliseconds (lognormal takes mu/sigma of the log of ms)."""
+    if not spec or spec == 'none':
+        return lambda rng: 0.0
+
+    kind, _, args = spec.partition(':')
+    try:
+        values = [float(v) for v in args.split(',')] if args else []
+    except ValueError:
+        raise ValueError(f"Invalid latency spec: {spec}")
+
+    if kind == 'fixed' and len(values) == 1:
+        return lambda rng: values[0] / 1000.0
+    if kind == 'uniform' and len(values) == 2:
+        return lambda rng: rng.uniform(values[0], values[1]) / 1000.0
+    if kind == 'normal' and len(values) == 2:
+        return lambda rng: max(0.0, rng.gauss(values[0], values[1])) / 1000.0
+    if kind == 'exp' and len(values) == 1 and values[0] > 0:
+        return lambda rng: rng.expovariate(1.0 / values[0]) / 1000.0
+    if kind == 'lognormal' and len(values) == 2:
+        return lambda rng: rng.lognormvariate(values[0], values[1]) / 1000.0
+
+    raise ValueError(f"Invalid latency spec: {spec}")
+
+
+def parse_multipart(content_type, raw):
+    """Split a multipart/form-data body into (fields, files); files are
+    (field, filename, content_type, size) tuples"""
+    message = email.parser.BytesParser(policy=email.policy.HTTP).parsebytes(
+        f'Content-Type: {content_type}\r\n\r\n'.encode() + raw)
+    fields, files = {}, []
+    for part in message.iter_parts():
+        name = part.get_param('name', header='content-disposition')
+        payload = part.get_payload(decode=True) or b''
+        if part.get_filename() is None:
+            fields[name] = payload.decode('utf-8')
+        else:
+            files.append((name, part.get_filename(), part.get_content_type(), len(payload)))
+    return fields, files
+
+
+class FaultProfile:
+    """Fault injection settings applied to every stub request"""
+
+    def __init__(self, latency='none', error_rate=0.0, reset_rate=0.0,
+                 max_rps=None, seed=None):
+        if not 0.0 <= error_rate <= 1.0 or not 0.0 <= reset_rate <= 1.0:
+            raise ValueError("error_rate and reset_rate must be between 0 and 1")
+        if max_rps is not None and max_rps <= 0:
+            raise ValueError("max_rps must be positive")
+
+        self.latency = latency
+        self.sample_latency = parse_latency_spec(latency)
+        self.error_rate = error_rate
+        self.reset_rate = reset_rate
+        self.max_rps = max_rps
+        self.rng = random.Random(seed)
+        self.rng_lock = threading.Lock()
+
+    def draw(self):
+        """Decide the fate of one request: (latency_seconds, reset, error)"""
+        with self.rng_lock:
+            delay = self.sample_latency(self.rng)
+            reset = self.rng.random() < self.reset_rate
+            error = not reset and self.rng.random() < self.error_rate
+        return delay, reset, error
+
+    def to_dict(self):
+        return {
+            'latency': self.latency,
+            'error_rate': self.error_rate,
+            'reset_rate': self.reset_rate,
+            'max_rps': self.max_rps
+        }
+
+
+class ThroughputLimiter:
+    """Spaces request admission so no more than max_rps are served per second"""
+
+    def __init__(self, max_rps):
+        self.interval = 1.0 / max_rps if max_rps else 0.0
+        self.next_slot = 0.0
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        if not self.interval:
+            return
+        with self.lock:
+            now = time.monotonic()
+            slot = max(now, self.next_slot)
+            self.next_slot = slot + self.interval
+        wait = slot - time.monotonic()
+        if wait > 0:
+            time.sleep(wait)
+
+
+class StubState:
+    """In-memory attendance store and request counters"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.records = []
+        self.classes = []
+        self.students = {}
+        self.institutions = [{'id': 1, 'name': 'Bhadam School', 'institution_code': 'BHS'}]
+        self.tokens = {}
+        self.counters = {
+            'requests': 0,
+            'inserted': 0,
+            'rejected': 0,
+            'injected_errors': 0,
+            'injected_resets': 0,
+            'logins': 0,
+            'not_modified': 0,
+            'students_created': 0,
+            'photos_received': 0
+        }
+
+    def count(self, key):
+        with self.lock:
+            self.counters[key] += 1
+
+    def add_record(self, record):
+        with self.lock:
+            record['id'] = len(self.records) + 1
+            self.records.append(record)
+            self.counters['inserted'] += 1
+
+    def issue_token(self, username, ttl):
+        """JWT-shaped token whose payload carries exp, like jsonwebtoken's"""
+        exp = int(time.time() + ttl)
+        payload = base64.urlsafe_b64encode(json.dumps({'username': username, 'exp': exp}).encode()).rstrip(b'=')
+        with self.lock:
+            token = f'stub.{payload.decode()}.{len(self.tokens)}'
+            self.tokens[token] = exp
+            self.counters['logins'] += 1
+        return token
+
+    def valid_token(self, token):
+        with self.lock:
+            exp = self.tokens.get(token)
+        return exp is not None and exp > time.time()
+
+    def latest(self, limit):
+        with self.lock:
+            rows = sorted(self.records, key=lambda r: (r['date'], r['time']), reverse=True)
+        return rows[:limit]
+
+    def list_students(self, query):
+        """Mirror GET /api/students: the admin's institution, one status (default active), by name"""
+        status = query.get('status', ['active'])[0]
+        department = query.get('department', [None])[0]
+        with self.lock:
+            rows = [s for s in self.students.values()
+                    if s.get('institution_id') == STUB_INSTITUTION_ID and s.get('status') == status
+                    and (department is None or s.get('department') == department)]
+        return sorted(rows, key=lambda s: s['name'])
+
+    def snapshot(self):
+        with self.lock:
+            return dict(self.counters, stored=len(self.records))
+
+
+class StubRequestHandler(BaseHTTPRequestHandler):
+    """Routes requests the same way backend/server.js does for the stubbed endpoints"""
+
+    protocol_version = 'HTTP/1.1'
+    server_version = 'SchoolStubAPI/1.0'
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def send_json(self, status, body):
+        payload = json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def send_json_etag(self, body):
+        """200 with a weak ETag, or 304 when If-None-Match matches (as Express does)"""
+        payload = json.dumps(body).encode('utf-8')
+        etag = f'W/"{len(payload):x}-{hashlib.sha1(payload).hexdigest()[:27]}"'
+        if self.headers.get('If-None-Match') == etag:
+            self.server.state.count('not_modified')
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.send_header('ETag', etag)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def authorized(self):
+        """Mirror authenticateToken: 401 unless a live bearer token is presented"""
+        token = (self.headers.get('Authorization') or '').partition(' ')[2]
+        if self.server.state.valid_token(token):
+            return True
+        self.send_json(401, {'error': 'Invalid or expired token'})
+        return False
+
+    def reset_connection(self):
+        """Abort with a TCP RST so clients see a connection reset"""
+        self.server.state.count('injected_resets')
+        self.close_connection = True
+        try:
+            self.connection.setsockopt(socket.SOL_SOCKET, socket.SO_LINGER, struct.pack('ii', 1, 0))
+        except OSError:
+            pass
+        self.connection.close()
+
+    def apply_faults(self):
+        """Apply throughput cap, latency and injected failures. Returns False if handled."""
+        state = self.server.state
+        state.count('requests')
+        self.server.limiter.acquire()
+
+        delay, reset, error = self.server.faults.draw()
+        if delay:
+            time.sleep(delay)
+        if reset:
+            self.reset_connection()
+            return False
+        if error:
+            state.count('injected_errors')
+            self.send_json(500, {'error': 'Injected failure'})
+            return False
+        return True
+
+    def read_body(self):
+        """Decoded request body and uploaded files: JSON, or urlencoded/multipart form fields"""
+        length = int(self.headers.get('Content-Length') or 0)
+        raw = self.rfile.read(length) if length else b''
+        content_type = self.headers.get('Content-Type') or ''
+        if content_type.startswith('multipart/form-data'):
+            return parse_multipart(content_type, raw)
+        if content_type.startswith('application/x-www-form-urlencoded'):
+            return {k: v[0] for k, v in parse_qs(raw.decode('utf-8')).items()}, []
+        try:
+            return json.loads(raw or b'{}'), []
+        except ValueError:
+            return None, []
+
+    def create_student(self, body, files):
+        """Mirror POST /api/students: multer limits first, then field and uniqueness checks"""
+        if len(files) > MAX_PHOTOS or any(field != 'photos' for field, _, _, _ in files):
+            return self.send_json(400, {'error': 'Photo upload error: Unexpected field'})
+        if any(size > MAX_PHOTO_BYTES for _, _, _, size in files):
+            return self.send_json(400, {'error': 'Photo upload error: File too large'})
+        if any(not content_type.startswith('image/') for _, _, content_type, _ in files):
+            return self.send_json(400, {'error': 'Photo upload error: Only image files are allowed'})
+        if not all(body.get(field) for field in REQUIRED_STUDENT_FIELDS):
+            return self.send_json(400, {'error': 'Missing required fields'})
+
+        state = self.server.state
+        with state.lock:
+            if body['id'] in state.students:
+                return self.send_json(400, {'error': 'Student ID already exists'})
+            if any(s['username'] == body['username'] for s in state.students.values()):
+                return self.send_json(400, {'error': 'Username already exists'})
+            student = {k: v for k, v in body.items() if k != 'password'}
+            student.setdefault('status', 'active')
+            student['institution_id'] = STUB_INSTITUTION_ID
+            student['photos'] = [filename for _, filename, _, _ in files]
+            state.students[body['id']] = student
+            state.counters['students_created'] += 1
+            state.counters['photos_received'] += len(files)
+        self.send_json(201, {'success': True, 'data': student})
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path == '/api/_stub/stats':
+            return self.send_json(200, {'success': True, 'data': self.server.state.snapshot()})
+
+        if not self.apply_faults():
+            return
+
+        if url.path == '/api/health':
+            self.send_json(200, {'status': 'ok', 'timestamp': datetime.now().isoformat()})
+        elif url.path == '/api/attendance/public':
+            query = parse_qs(url.query)
+            try:
+                limit = int(query.get('limit', ['10'])[0])
+            except ValueError:
+                limit = 10
+            self.send_json(200, {'success': True, 'data': self.server.state.latest(limit)})
+        elif url.path == '/api/institutions':
+            self.send_json_etag({'success': True, 'data': self.server.state.institutions})
+        elif url.path == '/api/classes':
+            if self.authorized():
+                self.send_json_etag({'success': True, 'data': self.server.state.classes})
+        elif url.path == '/api/students':
+            if self.authorized():
+                self.send_json_etag({'success': True, 'data': self.server.state.list_students(parse_qs(url.query))})
+        else:
+            self.send_json(404, {'error': 'Not found'})
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        body, files = self.read_body()
+
+        if not self.apply_faults():
+            return
+
+        if url.path == '/api/auth/login':
+            body = body or {}
+            if STUB_USERS.get(body.get('username')) != body.get('password'):
+                return self.send_json(401, {'error': 'Invalid credentials'})
+            token = self.server.state.issue_token(body['username'], self.server.token_ttl)
+            return self.send_json(200, {'success': True, 'token': token, 'user': {
+                'username': body['username'], 'role': 'admin', 'institution_id': STUB_INSTITUTION_ID}})
+
+        if url.path == '/api/classes':
+            if not self.authorized():
+                return
+            with self.server.state.lock:
+                created = dict(body or {}, id=len(self.server.state.classes) + 1)
+                self.server.state.classes.append(created)
+            return self.send_json(201, {'success': True, 'data': created})
+
+        if url.path == '/api/students':
+            if self.authorized():
+                self.create_student(body or {}, files)
+            return
+
+        if url.path != '/api/attendance/realtime':
+            return self.send_json(404, {'error': 'Not found'})
+
+        if body is None or not all(body.get(field) for field in REQUIRED_ATTENDANCE_FIELDS):
+            self.server.state.count('rejected')
+            return self.send_json(400, {'error': 'Missing required fields'})
+
+        record = {
+            'date': body['date'],
+            'time': body['time'],
+            'student_name': body['name'],
+            'student_id': body['id'],
+            'department': body['dept'],
+            'role': body.get('role') or 'Student',
+            'institution_code': body.get('institution_code')
+        }
+        self.server.state.add_record(record)
+        self.send_json(200, {
+            'success': True,
+            'message': 'Attendance recorded successfully',
+            'data': record
+        })
+
+
+class StubAPIServer(ThreadingHTTPServer):
+    """Threaded stub server; use start()/stop() to run it in the background"""
+
+    daemon_threads = True
+
+    def __init__(self, host='127.0.0.1', port=0, faults=None, verbose=False, token_ttl=TOKEN_TTL_SECONDS):
+        super().__init__((host, port), StubRequestHandler)
+        self.token_ttl = token_ttl
+        self.faults = faults or FaultProfile()
+        self.limiter = ThroughputLimiter(self.faults.max_rps)
+        self.state = StubState()
+        self.verbose = verbose
+        self.thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f'http://{host}:{port}/api'
+
+    def start(self):
+        self.thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+        if self.thread:
+            self.thread.join(timeout=5)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def main():
+    """Run the stub server in the foreground"""
+    parser = argparse.ArgumentParser(description='Offline stand-in for the school attendance API')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=3000)
+    parser.add_argument('--latency', default='none',
+                        help="fixed:MS | uniform:LO,HI | normal:MEAN,SD | exp:MEAN | lognormal:MU,SIGMA")
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Fraction of requests answered with HTTP 500')
+    parser.add_argument('--reset-rate', type=float, default=0.0, help='Fraction of connections reset without a response')
+    parser.add_argument('--max-rps', type=float, default=None, help='Throughput cap in requests per second')
+    parser.add_argument('--seed', type=int, default=None, help='RNG seed for reproducible fault sequences')
+    parser.add_argument('--verbose', action='store_true')
+    args = parser.parse_args()
+
+    try:
+        faults = FaultProfile(args.latency, args.error_rate, args.reset_rate, args.max_rps, args.seed)
+    except ValueError as e:
+        parser.error(str(e))
+
+    server = StubAPIServer(args.host, args.port, faults, args.verbose)
+    print("🧪 School API stub server")
+    print(f"Listening on: {server.base_url}")
+    print(f"Faults: {json.dumps(faults.to_dict())}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\nStub server stopped")
+    finally:
+        server.server_close()
+        print(f"Final counters: {json.dumps(server.state.snapshot())}")
+
+
+if __name__ == '__main__':
+    sys.exit(main())
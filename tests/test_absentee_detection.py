@@ -0,0 +1,73 @@
+"""
+Tests for roster-diff absentee detection
+"""
+
+import os
+import sqlite3
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'backend'))
+
+from absentee_detection import RosterIndex, detect_absentees, seen_from_db  # noqa: E402
+from db_maintenance import BENCHMARK_SCHEMA  # noqa: E402
+
+SCHEMA = """
+CREATE TABLE students (id TEXT PRIMARY KEY, name TEXT, class TEXT, status TEXT DEFAULT 'active',
+                       institution_id INTEGER, updated_at DATETIME DEFAULT CURRENT_TIMESTAMP);
+"""
+
+
+class AbsenteeDetectionTest(unittest.TestCase):
+
+    def setUp(self):
+        self.conn = sqlite3.connect(':memory:')
+        self.conn.executescript(SCHEMA)
+        self.conn.executemany('INSERT INTO students (id, name, class, status, institution_id) VALUES (?, ?, ?, ?, ?)', [
+            ('S1', 'On Time', '10A', 'active', 1),
+            ('S2', 'Late', '10A', 'active', 1),
+            ('S3', 'Missing', '10A', 'active', 1),
+            ('S4', 'Graduated', '10A', 'inactive', 1),
+            ('S5', 'Too Late', None, 'active', 2),
+        ])
+        self.roster = RosterIndex()
+        self.roster.refresh(self.conn)
+
+    def tearDown(self):
+        self.conn.close()
+
+    def test_absent_and_late_per_class(self):
+        seen = [('S1', '07:55:00'), ('S2', '08:20:00'), ('S5', '09:30:00'), ('GHOST', '07:00:00')]
+        report, unknown = detect_absentees(self.roster, seen, '08:00:00', '09:00:00')
+
+        class_10a = report['1']['10A']
+        self.assertEqual(class_10a['enrolled'], 3)
+        self.assertEqual([s['student_id'] for s in class_10a['absent']], ['S3'])
+        self.assertEqual([(s['student_id'], s['minutes_late']) for s in class_10a['late']], [('S2', 20)])
+        self.assertEqual([s['student_id'] for s in report['2']['Unassigned']['absent']], ['S5'])
+        self.assertEqual(unknown, 1)
+
+    def test_refresh_skips_unchanged_roster(self):
+        self.assertFalse(self.roster.refresh(self.conn))
+        self.conn.execute("UPDATE students SET status = 'inactive' WHERE id = 'S3'")
+        self.assertTrue(self.roster.refresh(self.conn))
+        self.assertNotIn('S3', self.roster.slot)
+
+    def test_rollup_rows_from_several_institutions_count_once(self):
+        conn = sqlite3.connect(':memory:')
+        conn.executescript(BENCHMARK_SCHEMA)
+        conn.executemany('INSERT INTO attendance_daily (institution_id, student_id, date, first_in, last_out) '
+                         'VALUES (?, ?, ?, ?, ?)', [(1, 'S2', '2025-03-03', '07:50:00', '15:00:00'),
+                                                    (0, 'S2', '2025-03-03', '08:20:00', '08:20:00')])
+        report, _ = detect_absentees(self.roster, seen_from_db(conn, '2025-03-03'), '08:00:00', '09:00:00')
+        self.assertEqual(report['1']['10A']['late'], [])
+        conn.close()
+
+    def test_institution_filter(self):
+        roster = RosterIndex()
+        roster.refresh(self.conn, institution_id=2)
+        self.assertEqual(roster.ids, ['S5'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,85 @@
+"""
+Tests for the offline attendance analytics engine
+"""
+
+import os
+import sqlite3
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'backend'))
+
+try:
+    import numpy  # noqa: F401
+    from attendance_analytics import AttendanceAnalytics, load_db, load_roster, AttendanceColumns, run_lengths
+except ImportError:  # numpy is optional outside the analytics tooling
+    numpy = None
+
+SCHEMA = """
+CREATE TABLE students (id TEXT PRIMARY KEY, name TEXT, department TEXT, class TEXT,
+                       status TEXT DEFAULT 'active', institution_id INTEGER);
+CREATE TABLE attendance (id INTEGER PRIMARY KEY AUTOINCREMENT, date TEXT, time TEXT, student_id TEXT,
+                         student_name TEXT, department TEXT, institution_id INTEGER);
+"""
+
+
+@unittest.skipIf(numpy is None, 'numpy not installed')
+class AttendanceAnalyticsTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.tmp.name, 'school.db')
+        with sqlite3.connect(self.db_path) as conn:
+            conn.executescript(SCHEMA)
+            conn.executemany('INSERT INTO students (id, name, department, class, institution_id) VALUES (?, ?, ?, ?, ?)', [
+                ('A1', 'Always Present', 'CSE', '10A', 1),
+                ('A2', 'Often Absent', 'CSE', '10A', 1),
+                ('B1', 'Other School', 'BBA', '9B', 2),
+            ])
+            days = ['2025-03-03', '2025-03-04', '2025-03-05', '2025-03-06']
+            rows = []
+            for day in days:
+                rows.append((day, '07:50:00', 'A1', 'Always Present', 'CSE', 1))
+                rows.append((day, '15:30:00', 'A1', 'Always Present', 'CSE', 1))
+            rows.append(('2025-03-03', '08:20:00', 'A2', 'Often Absent', 'CSE', 1))
+            rows.append(('2025-03-03', '07:59:00', 'A2', 'Often Absent', 'CSE', 1))  # earlier sighting wins
+            rows.append(('2025-03-10', '09:30:00', 'B1', 'Other School', 'BBA', 2))
+            conn.executemany('INSERT INTO attendance (date, time, student_id, student_name, department, institution_id) '
+                             'VALUES (?, ?, ?, ?, ?, ?)', rows)
+        columns = AttendanceColumns()
+        load_roster(columns, self.db_path)
+        load_db(self.db_path, columns=columns)
+        self.report = AttendanceAnalytics(columns).report()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_rates_use_each_institutions_school_days(self):
+        self.assertEqual(self.report['by_class']['10A']['present_days'], 5)
+        self.assertEqual(self.report['by_class']['10A']['expected_days'], 8)
+        self.assertEqual(self.report['by_class']['9B']['attendance_rate'], 1.0)
+        self.assertEqual(self.report['by_institution']['1']['monthly'], {'2025-03': 0.625})
+
+    def test_chronic_absence_list(self):
+        chronic = self.report['chronic_absence']
+        self.assertEqual([s['student_id'] for s in chronic], ['A2'])
+        self.assertEqual(chronic[0]['days_absent'], 3)
+        self.assertEqual(chronic[0]['current_absence_streak'], 3)
+
+    def test_late_distribution_uses_first_sighting(self):
+        late = self.report['late_arrivals']['by_department']
+        self.assertEqual(late['CSE']['arrivals'], 5)
+        self.assertEqual(late['CSE']['late'], 0)
+        self.assertEqual(late['BBA']['late'], 1)
+        self.assertEqual(late['BBA']['buckets']['60m+'], 1)
+
+    def test_run_lengths(self):
+        matrix = numpy.array([[1, 1, 0, 1, 1, 1], [0, 0, 0, 0, 0, 0], [1, 0, 0, 1, 1, 1]], dtype=bool)
+        longest, trailing = run_lengths(matrix)
+        self.assertEqual(longest.tolist(), [3, 0, 3])
+        self.assertEqual(trailing.tolist(), [3, 0, 3])
+
+
+if __name__ == '__main__':
+    unittest.main()
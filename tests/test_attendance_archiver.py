@@ -0,0 +1,68 @@
+"""
+Tests for the attendance cold-storage archiver
+"""
+
+import os
+import sys
+import tempfile
+import unittest
+from datetime import date
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'backend'))
+
+from attendance_archiver import AttendanceArchiver, current_term_start, load_index, query_archives  # noqa: E402
+from db_maintenance import build_synthetic_db  # noqa: E402
+
+
+class AttendanceArchiverTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.tmp.name, 'school.db')
+        self.archive_dir = os.path.join(self.tmp.name, 'archive')
+        self.conn = build_synthetic_db(self.db_path, 3000, 2, 10)
+
+    def tearDown(self):
+        self.conn.close()
+        self.tmp.cleanup()
+
+    def count(self, where='', params=()):
+        return self.conn.execute(f'SELECT COUNT(*) FROM attendance {where}', params).fetchone()[0]
+
+    def test_archive_moves_closed_months_and_stays_queryable(self):
+        old_rows = self.count("WHERE date < '2025-05-01'")
+        sample = self.conn.execute("SELECT student_id, date FROM attendance WHERE date < '2025-05-01' "
+                                   "AND institution_id = 2 LIMIT 1").fetchone()
+        expected = self.count("WHERE student_id = ? AND date = ?", sample)
+
+        result = AttendanceArchiver(self.db_path, self.archive_dir).run('2025-05-01', compact=False)
+        self.assertEqual(result['rows_archived'], old_rows)
+        self.assertEqual(self.count("WHERE date < '2025-05-01'"), 0)
+
+        index = load_index(self.archive_dir)
+        self.assertEqual(sum(e['rows'] for e in index['archives'].values()), old_rows)
+        self.assertIn('2/2025-01', index['archives'])
+
+        rows = list(query_archives(self.archive_dir, institution=2, start=sample[1], end=sample[1],
+                                   student_id=sample[0], columns=['date', 'student_id']))
+        self.assertEqual(len(rows), expected)
+        self.assertTrue(all(r == {'date': sample[1], 'student_id': sample[0]} for r in rows))
+
+    def test_late_rows_merge_into_existing_archive(self):
+        archiver = AttendanceArchiver(self.db_path, self.archive_dir)
+        archiver.run('2025-02-01', compact=False)
+        before = load_index(self.archive_dir)['archives']['1/2025-01']['rows']
+
+        self.conn.execute("INSERT INTO attendance (date, time, student_id, student_name, department, institution_id) "
+                          "VALUES ('2025-01-15', '08:00:00', 'S00100001', 'Late Row', 'CSE', 1)")
+        self.conn.commit()
+        AttendanceArchiver(self.db_path, self.archive_dir).run('2025-02-01', compact=False)
+        self.assertEqual(load_index(self.archive_dir)['archives']['1/2025-01']['rows'], before + 1)
+
+    def test_current_term_start(self):
+        self.assertEqual(current_term_start(date(2025, 10, 19)), date(2025, 9, 1))
+        self.assertEqual(current_term_start(date(2025, 3, 2)), date(2025, 1, 1))
+
+
+if __name__ == '__main__':
+    unittest.main()
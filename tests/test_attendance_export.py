@@ -0,0 +1,79 @@
+"""
+Tests for the cursor-paginated attendance export client
+"""
+
+import csv
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'backend'))
+
+from attendance_export import AttendancePager, ExportError, export_attendance  # noqa: E402
+
+
+class FakePager(AttendancePager):
+    """Serves pages from memory; cursors are row offsets. Fails once at fail_at."""
+
+    def __init__(self, rows, page_size, fail_at=None):
+        self.rows = rows
+        self.page_size = page_size
+        self.fail_at = fail_at
+        self.fetched = []
+
+    def fetch(self, cursor):
+        start = int(cursor or 0)
+        if start == self.fail_at:
+            self.fail_at = None
+            raise ExportError('connection dropped')
+        self.fetched.append(start)
+        page = self.rows[start:start + self.page_size]
+        end = start + len(page)
+        return page, str(end) if end < len(self.rows) else None
+
+
+def make_rows(count):
+    return [{'id': count - i, 'date': '2025-03-03', 'time': '08:00:00', 'student_id': f'S{i}',
+             'student_name': 'n', 'department': 'CSE'} for i in range(count)]
+
+
+class AttendanceExportTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.output = os.path.join(self.tmp.name, 'export.csv')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def read_ids(self):
+        with open(self.output, newline='') as f:
+            return [int(row['id']) for row in csv.DictReader(f)]
+
+    def test_streams_all_pages(self):
+        summary = export_attendance(FakePager(make_rows(95), 10), self.output)
+        self.assertEqual(summary['rows'], 95)
+        self.assertEqual(summary['pages'], 10)
+        self.assertEqual(self.read_ids(), list(range(95, 0, -1)))
+        self.assertFalse(os.path.exists(self.output + '.state.json'))
+
+    def test_resumes_from_last_cursor_without_duplicates(self):
+        rows = make_rows(50)
+        with self.assertRaises(ExportError):
+            export_attendance(FakePager(rows, 10, fail_at=30), self.output)
+        self.assertEqual(len(self.read_ids()), 30)
+
+        # Simulate a partially written page after the last checkpoint
+        with open(self.output, 'a') as f:
+            f.write('999,2025-03-03,partial')
+
+        pager = FakePager(rows, 10)
+        summary = export_attendance(pager, self.output)
+        self.assertTrue(summary['resumed'])
+        self.assertEqual(pager.fetched[0], 30)
+        self.assertEqual(self.read_ids(), list(range(50, 0, -1)))
+
+
+if __name__ == '__main__':
+    unittest.main()
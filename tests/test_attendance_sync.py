@@ -0,0 +1,163 @@
+"""
+Tests for the attendance sync daemon against the offline stub API server
+"""
+
+import csv
+import json
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'backend'))
+
+from tests.stub_api_server import STUB_INSTITUTION_ID, FaultProfile, StubAPIServer  # noqa: E402
+
+attendance_sync = None
+WORKDIR = None
+
+
+def setUpModule():
+    """Import attendance_sync with its files sandboxed; it reads these paths at import time"""
+    global attendance_sync, WORKDIR
+    WORKDIR = tempfile.mkdtemp(prefix='attendance_sync_test_')
+    for name, filename in (('ATTENDANCE_CSV_PATH', 'Pattendance_log.csv'),
+                           ('ATTENDANCE_CHECKPOINT_PATH', 'processed_records.json'),
+                           ('ATTENDANCE_RETRY_PATH', 'retry_records.json'),
+                           ('ATTENDANCE_ROSTER_CACHE_PATH', 'roster_cache.json'),
+                           ('ATTENDANCE_QUARANTINE_PATH', 'quarantine.jsonl')):
+        os.environ[name] = os.path.join(WORKDIR, filename)
+    os.environ['ATTENDANCE_RETENTION_DAYS'] = '2'
+    cwd = os.getcwd()
+    os.chdir(WORKDIR)  # attendance_sync writes its log file to the cwd
+    try:
+        import attendance_sync as module
+    finally:
+        os.chdir(cwd)
+    attendance_sync = module
+
+
+def tearDownModule():
+    shutil.rmtree(WORKDIR, ignore_errors=True)
+
+
+class AttendanceSyncTest(unittest.TestCase):
+
+    def setUp(self):
+        for filename in os.listdir(WORKDIR):
+            if not filename.endswith('.log'):
+                os.remove(os.path.join(WORKDIR, filename))
+        self.server = StubAPIServer()
+        self.server.start()
+        self.original_endpoint = attendance_sync.ATTENDANCE_ENDPOINT
+        attendance_sync.ATTENDANCE_ENDPOINT = f'{self.server.base_url}/attendance/realtime'
+        self.mtime = 1700000000
+
+    def tearDown(self):
+        attendance_sync.ATTENDANCE_ENDPOINT = self.original_endpoint
+        self.server.stop()
+
+    def write_day(self, day, student_ids):
+        """The recognizer's log holds one day at a time (it rotates daily)"""
+        with open(attendance_sync.CSV_FILE_PATH, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            writer.writerow(['Date', 'Time', 'Name', 'ID', 'Dept', 'Role'])
+            for n, student_id in enumerate(student_ids):
+                writer.writerow([day, f'08:{n:02d}:00', f'Student {student_id}', student_id, 'CSE', 'Student'])
+        self.mtime += 60
+        os.utime(attendance_sync.CSV_FILE_PATH, (self.mtime, self.mtime))
+
+    def stored(self):
+        return sorted(f"{r['date']}_{r['student_id']}" for r in self.server.state.records)
+
+    def enroll(self, student_id, name):
+        self.server.state.students[student_id] = {'id': student_id, 'name': name, 'department': 'CSE',
+                                                  'status': 'active', 'institution_id': STUB_INSTITUTION_ID}
+
+    def with_roster(self):
+        """Enable roster validation against the stub's admin account, refreshing on every pass"""
+        for name, value in (('API_BASE_URL', self.server.base_url), ('API_USERNAME', 'admin'),
+                            ('API_PASSWORD', 'admin123'), ('ROSTER_REFRESH_INTERVAL', 0)):
+            patcher = mock.patch.object(attendance_sync, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def quarantined(self):
+        with open(attendance_sync.QUARANTINE_FILE, 'r', encoding='utf-8') as f:
+            return [json.loads(line) for line in f if line.strip()]
+
+    def test_outage_longer_than_retention_loses_nothing(self):
+        self.server.faults = FaultProfile(error_rate=1.0)
+        sync = attendance_sync.AttendanceSync()
+        days = ['2025-03-03', '2025-03-04', '2025-03-05', '2025-03-06']
+        for day in days:
+            self.write_day(day, ['444', '445'])
+            sync.sync_attendance()
+        self.assertEqual(len(sync.retry_records), 8)
+        self.assertGreater(sync.retention_cutoff, days[0])  # day one is behind the window by now
+
+        # A restart mid-outage keeps the pending rows
+        sync = attendance_sync.AttendanceSync()
+        self.assertEqual(len(sync.retry_records), 8)
+
+        self.server.faults = FaultProfile()
+        sync.sync_attendance()  # the CSV is unchanged; pending rows are still resent
+        self.assertEqual(self.stored(), sorted(f'{day}_{sid}' for day in days for sid in ('444', '445')))
+        self.assertEqual(sync.retry_records, {})
+        with open(attendance_sync.RETRY_RECORDS_FILE, 'r', encoding='utf-8') as f:
+            self.assertEqual(json.load(f), [])
+
+        sync.sync_attendance()
+        self.assertEqual(len(self.server.state.records), 8)  # nothing sent twice
+
+    def test_roster_revalidates_with_etag(self):
+        self.with_roster()
+        self.enroll('TONMOY', 'Tonmoy Ahmed')
+        roster = attendance_sync.RosterCache(attendance_sync.ROSTER_CACHE_FILE)
+        self.assertTrue(roster.refresh(force=True))
+        self.assertFalse(roster.refresh(force=True))  # unchanged: a 304, roster kept
+        self.assertEqual(self.server.state.counters['not_modified'], 1)
+        self.assertEqual(roster.lookup(' tonmoy ')['id'], 'TONMOY')
+
+        # A restart restores the cached roster and its ETag, so the first check is a 304 too
+        restored = attendance_sync.RosterCache(attendance_sync.ROSTER_CACHE_FILE)
+        self.assertTrue(restored.ready)
+        self.assertFalse(restored.refresh(force=True))
+        self.assertEqual(self.server.state.counters['not_modified'], 2)
+
+        self.enroll('S445', 'Sarah Johnson')
+        self.assertTrue(restored.refresh(force=True))
+        self.assertEqual(restored.lookup('s445')['name'], 'Sarah Johnson')
+
+    def test_ids_are_canonicalized_against_the_roster(self):
+        self.with_roster()
+        self.enroll('TONMOY', 'Tonmoy Ahmed')
+        sync = attendance_sync.AttendanceSync()
+        self.write_day('2025-03-03', ['tonmoy'])
+        sync.sync_attendance()
+        record = self.server.state.records[0]
+        self.assertEqual((record['student_id'], record['student_name']), ('TONMOY', 'Tonmoy Ahmed'))
+
+    def test_quarantined_records_replay_once_enrolled(self):
+        self.with_roster()
+        self.enroll('TONMOY', 'Tonmoy Ahmed')
+        sync = attendance_sync.AttendanceSync()
+        self.write_day('2025-03-03', ['tonmoy', 'X777'])
+        sync.sync_attendance()
+        self.assertEqual(self.stored(), ['2025-03-03_TONMOY'])
+        self.assertEqual([(q['student_id'], q['reason']) for q in self.quarantined()], [('X777', 'unknown_student_id')])
+
+        sync.sync_attendance()  # roster unchanged: stays quarantined
+        self.assertEqual(len(self.quarantined()), 1)
+
+        self.enroll('X777', 'Ayon Rahman')
+        sync.sync_attendance()  # no new CSV rows; the roster change alone replays it
+        self.assertEqual(self.stored(), ['2025-03-03_TONMOY', '2025-03-03_X777'])
+        self.assertEqual(self.server.state.records[-1]['student_name'], 'Ayon Rahman')
+        self.assertEqual(self.quarantined(), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,62 @@
+"""
+Tests for the school.db index advisor and maintenance scheduler
+"""
+
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'backend'))
+
+import db_maintenance  # noqa: E402
+
+
+class DbMaintenanceTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.conn = db_maintenance.build_synthetic_db(os.path.join(self.tmp.name, 'school.db'), 2000, 3, 20)
+
+    def tearDown(self):
+        self.conn.close()
+        self.tmp.cleanup()
+
+    def test_advisor_proposes_then_clears_indexes(self):
+        proposals = db_maintenance.propose_indexes(self.conn)
+        self.assertIn('GET /api/attendance?student_id', proposals['idx_attendance_student_date_time'])
+        self.assertFalse(db_maintenance.SERVER_INDEXES & set(proposals))
+
+        db_maintenance.apply_indexes(self.conn, proposals)
+        self.assertEqual(db_maintenance.propose_indexes(self.conn), {})
+        for shape in db_maintenance.analyze_shapes(self.conn):
+            if shape['query'].startswith('GET /api/attendance'):
+                self.assertEqual(shape['problems'], [], shape['query'])
+
+    def test_attendance_shapes_match_server_pagination(self):
+        server = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'backend', 'server.js')
+        with open(server, 'r', encoding='utf-8') as f:
+            source = f.read()
+        self.assertIn(f"'{db_maintenance.ATTENDANCE_CURSOR}'", source)
+        self.assertIn(f"'{db_maintenance.ATTENDANCE_PAGE}'", source)
+
+    def test_shapes_on_missing_tables_are_skipped(self):
+        self.conn.execute('DROP TABLE attendance_daily')
+        self.conn.execute('DROP INDEX idx_attendance_date_time')
+        shapes = {shape['query']: shape for shape in db_maintenance.analyze_shapes(self.conn)}
+        self.assertIn('no such table: attendance_daily', shapes['GET /api/attendance/stats (today)']['skipped'])
+        self.assertNotIn('skipped', shapes['GET /api/attendance'])
+        self.assertNotIn('idx_attendance_date_time', db_maintenance.propose_indexes(self.conn))
+
+    def test_due_tasks_follow_schedule(self):
+        state = {}
+        ran = db_maintenance.run_due_tasks(self.conn, state, now=1000000)
+        self.assertEqual(set(ran), {'checkpoint', 'analyze', 'vacuum'})
+        self.assertTrue(ran['vacuum']['skipped'])
+
+        ran = db_maintenance.run_due_tasks(self.conn, state, now=1000000 + db_maintenance.CHECKPOINT_INTERVAL)
+        self.assertEqual(set(ran), {'checkpoint'})
+
+
+if __name__ == '__main__':
+    unittest.main()
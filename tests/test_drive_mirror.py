@@ -0,0 +1,111 @@
+"""
+Tests for the incremental uploads/ -> Drive mirror, run against LocalDrive
+"""
+
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'backend'))
+
+from drive_mirror import DriveMirror, LocalDrive, TransientDriveError  # noqa: E402
+
+CHUNK = 1024
+
+
+class Crash(BaseException):
+    """Stands in for the process dying mid-transfer"""
+
+
+class FlakyDrive(LocalDrive):
+    """Fails the chunk after `after` successful chunks, once"""
+
+    def __init__(self, root, after, error):
+        super().__init__(root)
+        self.after = after
+        self.error = error
+
+    def upload_chunk(self, session, data, offset, size):
+        if self.after == 0 and self.error:
+            error, self.error = self.error, None
+            raise error
+        self.after -= 1
+        return super().upload_chunk(session, data, offset, size)
+
+
+class DriveMirrorTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.uploads = os.path.join(self.tmp.name, 'uploads')
+        self.remote = os.path.join(self.tmp.name, 'drive')
+        self.write('Tonmoy', 'photos-1.png', b'a' * 3000)
+        self.write('Tonmoy', 'photos-2.png', b'b' * 500)
+        self.write('Brock_Lesnar', 'photos-1.jpg', b'a' * 3000)  # same content as Tonmoy's first photo
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, student, filename, content):
+        folder = os.path.join(self.uploads, 'bhadam_school', 'students', student)
+        os.makedirs(folder, exist_ok=True)
+        with open(os.path.join(folder, filename), 'wb') as f:
+            f.write(content)
+
+    def mirror(self, drive=None):
+        drive = drive or LocalDrive(self.remote)
+        return DriveMirror(drive, self.uploads, workers=2, chunk_size=CHUNK,
+                           folder_names={'bhadam_school': 'Bhadam School (BHS)'}, backoff_base=0), drive
+
+    def remote_file(self, student, filename):
+        return os.path.join(self.remote, 'SchoolApp_Photos', 'Bhadam School (BHS)', 'Students', student, filename)
+
+    def test_mirrors_incrementally_with_cached_folders(self):
+        mirror, drive = self.mirror()
+        report = mirror.run()
+        self.assertEqual(report['uploaded'] + report['copied'], 3)
+        self.assertEqual(report['copied'], 1)
+        with open(self.remote_file('Brock_Lesnar', 'photos-1.jpg'), 'rb') as f:
+            self.assertEqual(f.read(), b'a' * 3000)
+
+        mirror, drive = self.mirror()
+        report = mirror.run()
+        self.assertEqual((report['uploaded'], report['unchanged']), (0, 3))
+        self.assertEqual(drive.calls['find_folder'], 0)
+
+        self.write('Tonmoy', 'photos-2.png', b'c' * 700)
+        os.remove(os.path.join(self.uploads, 'bhadam_school', 'students', 'Brock_Lesnar', 'photos-1.jpg'))
+        mirror, drive = self.mirror()
+        report = mirror.run(delete=True)
+        self.assertEqual((report['uploaded'], report['deleted']), (1, 1))
+        self.assertEqual(drive.calls['find_folder'], 0)
+        with open(self.remote_file('Tonmoy', 'photos-2.png'), 'rb') as f:
+            self.assertEqual(f.read(), b'c' * 700)
+        self.assertFalse(os.path.exists(self.remote_file('Brock_Lesnar', 'photos-1.jpg')))
+
+    def test_resumes_interrupted_upload_from_last_chunk(self):
+        mirror, _ = self.mirror(FlakyDrive(self.remote, after=1, error=Crash()))
+        mirror.workers = 1
+        with self.assertRaises(Crash):
+            mirror.run()
+
+        mirror, drive = self.mirror()
+        report = mirror.run()
+        self.assertEqual(report['failed'], 0)
+        # Saved sessions were reused: only the two missing chunks of the 3-chunk file were sent
+        self.assertEqual(drive.calls['start_upload'], 0)
+        self.assertEqual(drive.calls['upload_chunk'], 2)
+        with open(self.remote_file('Tonmoy', 'photos-1.png'), 'rb') as f:
+            self.assertEqual(f.read(), b'a' * 3000)
+        self.assertEqual(mirror.manifest['pending'], {})
+
+    def test_retries_transient_errors(self):
+        mirror, drive = self.mirror(FlakyDrive(self.remote, after=2, error=TransientDriveError('HTTP 503')))
+        report = mirror.run()
+        self.assertEqual((report['failed'], report['uploaded'] + report['copied']), (0, 3))
+        self.assertEqual(drive.calls['upload_offset'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,72 @@
+"""
+Tests for the memory-mappable face gallery exporter
+"""
+
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'backend'))
+
+try:
+    import numpy as np
+    from PIL import Image
+except ImportError:  # numpy and Pillow are optional for the rest of the suite
+    np = None
+
+if np is not None:
+    from face_gallery import FaceGallery, build_gallery  # noqa: E402
+    from photo_preprocess import PhotoPreprocessor  # noqa: E402
+
+
+@unittest.skipIf(np is None, 'numpy/Pillow not installed')
+class FaceGalleryTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.uploads = self.tmp.name
+        self.write('Alice', 'photos-1.jpg', (200, 0, 0))
+        self.write('Alice', 'photos-2.jpg', (200, 0, 0))  # duplicate upload
+        self.write('Bob', 'photos-1.jpg', (0, 0, 200))
+        self.write('Bob', 'photos-2.jpg', (0, 200, 0))
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, student, filename, color):
+        folder = os.path.join(self.uploads, 'ideal_school', 'students', student)
+        os.makedirs(folder, exist_ok=True)
+        Image.new('RGB', (300, 400), color).save(os.path.join(folder, filename), 'JPEG')
+
+    def build(self):
+        PhotoPreprocessor(self.uploads, workers=1).run()
+        return build_gallery(self.uploads, 'ideal_school')
+
+    def test_exports_offsets_and_faces(self):
+        summary = self.build()
+        self.assertEqual((summary['students'], summary['faces']), (2, 3))
+
+        gallery = FaceGallery(self.uploads, 'ideal_school')
+        self.assertIsInstance(gallery.faces, np.memmap)
+        self.assertEqual(gallery.faces.shape, (3, 112, 112, 3))
+        self.assertEqual(gallery.labels(), ['Alice', 'Bob', 'Bob'])
+        alice = gallery.student_faces('Alice')
+        self.assertEqual(alice.shape[0], 1)
+        self.assertGreater(int(alice[0, 56, 56, 0]), 150)
+
+    def test_rebuild_only_decodes_changed_students(self):
+        self.build()
+        self.assertFalse(self.build()['written'])
+
+        self.write('Alice', 'photos-3.jpg', (0, 0, 0))
+        summary = self.build()
+        self.assertEqual((summary['decoded_students'], summary['copied_students']), (1, 1))
+        gallery = FaceGallery(self.uploads, 'ideal_school')
+        self.assertEqual(gallery.labels(), ['Alice', 'Alice', 'Bob', 'Bob'])
+        # Bob's rows were copied from the previous gallery, not decoded again
+        self.assertGreater(int(gallery.student_faces('Bob')[:, 56, 56, 1].max()), 150)
+
+
+if __name__ == '__main__':
+    unittest.main()
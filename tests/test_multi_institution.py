@@ -5,13 +5,22 @@ Tests the core institution isolation and data handling
 
 import os
 import sys
+import argparse
 import requests
 import json
+import math
+import sqlite3
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'backend'))
+
+from school_client import SchoolAPIError, SchoolClient  # noqa: E402
+
 # Test configuration
-API_BASE_URL = 'http://localhost:3000/api'
+API_BASE_URL = os.getenv('SCHOOL_API_URL', 'http://localhost:3000/api')
 TEST_INSTITUTIONS = [
     {
         'name': 'Test Primary School',
@@ -35,13 +44,80 @@ TEST_INSTITUTIONS = [
     }
 ]
 
+# Load test configuration
+LOAD_TENANT_STEPS = [5, 25, 50]
+LOAD_WORKERS = 16
+LOAD_ROUNDS_PER_TENANT = 10
+LOAD_STUDENTS_PER_TENANT = 5
+
+# Realtime ingest configuration
+INGEST_TENANTS = 5
+INGEST_EVENTS = 2000
+
+# Scaled isolation configuration
+ISOLATION_TENANT_STEPS = [10, 50, 100]
+ISOLATION_STUDENTS_PER_TENANT = 50
+ISOLATION_ATTENDANCE_PER_TENANT = 200
+
+# Same statement as ATTENDANCE_ROLLUP_UPSERT in backend/server.js, for rows seeded straight into the DB
+ATTENDANCE_ROLLUP_UPSERT = """
+    INSERT INTO attendance_daily (institution_id, student_id, date, first_in, last_out, sighting_count, present)
+    VALUES (COALESCE(?, 0), ?, ?, ?, ?, 1, 1)
+    ON CONFLICT(institution_id, student_id, date) DO UPDATE SET
+        first_in = MIN(first_in, excluded.first_in),
+        last_out = MAX(last_out, excluded.last_out),
+        sighting_count = sighting_count + 1,
+        present = 1,
+        updated_at = CURRENT_TIMESTAMP
+"""
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = min(max(1, math.ceil(pct / 100.0 * len(sorted_values))), len(sorted_values))
+    return sorted_values[rank - 1]
+
+
+def summarize_latencies(samples):
+    """Summarize [(latency_ms, ok)] samples into latency percentiles and error rate"""
+    latencies = sorted(latency for latency, _ in samples)
+    errors = sum(1 for _, ok in samples if not ok)
+    return {
+        'requests': len(samples),
+        'errors': errors,
+        'error_rate': (errors / len(samples)) if samples else 0.0,
+        'p50_ms': round(percentile(latencies, 50), 2),
+        'p95_ms': round(percentile(latencies, 95), 2),
+        'p99_ms': round(percentile(latencies, 99), 2),
+        'max_ms': round(latencies[-1], 2) if latencies else 0.0
+    }
+
+
+def tenant_prefix(index):
+    """Three-letter name prefix so generated institution codes do not collide"""
+    index %= 26 ** 3
+    letters = ''
+    for _ in range(3):
+        index, remainder = divmod(index, 26)
+        letters = chr(ord('A') + remainder) + letters
+    return letters.capitalize()
+
+
 class MultiInstitutionTester:
     """Test class for multi-institution functionality"""
     
-    def __init__(self):
+    def __init__(self, use_sdk=False):
         self.session = requests.Session()
+        self.use_sdk = use_sdk
         self.institutions_created = []
         self.test_results = []
+        self.load_tenants = []
+        self.load_results = []
+        self.ingest_results = []
+        self.isolation_results = []
+        self.local = threading.local()
         
     def log_test(self, test_name, success, message=""):
         """Log test result"""
@@ -254,6 +330,421 @@ class MultiInstitutionTester:
             )
             return True
     
+    # ===== LOAD TEST MODE =====
+
+    def thread_session(self):
+        """Per-worker session; requests.Session is not safe to share across threads"""
+        if not hasattr(self.local, 'session'):
+            self.local.session = requests.Session()
+        return self.local.session
+
+    def timed_request(self, method, endpoint, **kwargs):
+        """Issue one request and return (latency_ms, ok)"""
+        started = time.perf_counter()
+        try:
+            response = self.thread_session().request(method, f'{API_BASE_URL}{endpoint}', timeout=30, **kwargs)
+            ok = response.status_code < 400
+        except requests.exceptions.RequestException:
+            ok = False
+        return (time.perf_counter() - started) * 1000.0, ok
+
+    def timed_call(self, func, *args):
+        """Time one SDK call and return (latency_ms, ok)"""
+        started = time.perf_counter()
+        try:
+            func(*args)
+            ok = True
+        except (SchoolAPIError, requests.exceptions.RequestException):
+            ok = False
+        return (time.perf_counter() - started) * 1000.0, ok
+
+    def sdk_savings(self):
+        """Request savings summed over every tenant's SDK client"""
+        totals = {}
+        for tenant in self.load_tenants:
+            for key, value in tenant['client'].request_savings().items():
+                if key != 'requests_saved_pct':
+                    totals[key] = totals.get(key, 0) + value
+        calls = totals.get('calls', 0)
+        totals['requests_saved_pct'] = round(100.0 * (calls - totals.get('http_requests', 0)) / calls, 1) if calls else 0.0
+        return totals
+
+    def create_load_tenant(self, index, student_count=LOAD_STUDENTS_PER_TENANT, seed_db=None):
+        """Create one load-test institution, log in as its admin and seed students/classes.
+        Setup runs sequentially on the shared session; only the workload is concurrent.
+        With seed_db, students are written straight into the server's SQLite file, which
+        skips the per-student bcrypt hashing of POST /api/students."""
+        run_tag = f"{os.getpid()}x{index}"
+        institution_data = {
+            'name': f'{tenant_prefix(os.getpid() + index * 7919)} Load School {index}',
+            'regNumber': f'LOAD{run_tag}',
+            'type': 'primary_school',
+            'email': f'load{run_tag}@loadtest.edu',
+            'adminEmail': f'load{run_tag}@loadtest.edu',
+            'adminUsername': f'load_admin_{run_tag}_{int(time.time())}',
+            'adminPassword': 'LoadPass123!',
+            'adminName': f'Load Admin {index}'
+        }
+
+        session = self.session
+        response = session.post(f'{API_BASE_URL}/institutions', json=institution_data, timeout=30)
+        if response.status_code != 201:
+            raise RuntimeError(f"Institution creation failed: {response.status_code}")
+        result = response.json()
+        institution_id = result.get('data', {}).get('institutionId') or result.get('institution', {}).get('id')
+
+        # The create response does not always carry the generated code, so read it back
+        response = session.get(f'{API_BASE_URL}/institutions/{institution_id}', timeout=30)
+        institution_code = response.json().get('data', {}).get('institution_code') if response.ok else None
+
+        response = session.post(f'{API_BASE_URL}/auth/login', json={
+            'username': institution_data['adminUsername'],
+            'password': institution_data['adminPassword']
+        }, timeout=30)
+        if response.status_code != 200:
+            raise RuntimeError(f"Admin login failed: {response.status_code}")
+
+        tenant = {
+            'id': institution_id,
+            'code': institution_code,
+            'name': institution_data['name'],
+            'headers': {'Authorization': f"Bearer {response.json()['token']}"},
+            'student_ids': [f'LOAD{run_tag}S{n}' for n in range(student_count)]
+        }
+
+        response = session.post(f'{API_BASE_URL}/classes', headers=tenant['headers'], json={
+            'name': f'Class {index}', 'department': 'Load'
+        }, timeout=30)
+        tenant['class_ids'] = [response.json().get('data', {}).get('id')] if response.ok else []
+        if self.use_sdk:
+            tenant['client'] = SchoolClient(API_BASE_URL, institution_data['adminUsername'],
+                                            institution_data['adminPassword'],
+                                            token=tenant['headers']['Authorization'].split(' ')[1])
+
+        if seed_db:
+            with sqlite3.connect(seed_db, timeout=30) as conn:
+                conn.executemany(
+                    'INSERT INTO students (id, name, department, class, status, institution_id) VALUES (?, ?, ?, ?, ?, ?)',
+                    [(student_id, f'Load Student {index} {n}', 'Load', f'Class {index}', 'active', institution_id)
+                     for n, student_id in enumerate(tenant['student_ids'])]
+                )
+            return tenant
+
+        for n, student_id in enumerate(tenant['student_ids']):
+            session.post(f'{API_BASE_URL}/students', headers=tenant['headers'], data={
+                'id': student_id,
+                'name': f'Load Student {index} {n}',
+                'department': 'Load',
+                'username': f'load_student_{run_tag}_{n}',
+                'password': 'LoadPass123!'
+            }, timeout=30)
+        return tenant
+
+    def tenant_workload(self, tenant, round_number):
+        """One round of dashboard-style traffic for a tenant"""
+        now = datetime.now()
+        headers = tenant['headers']
+        student_id = tenant['student_ids'][round_number % len(tenant['student_ids'])]
+        record = {
+            'date': now.strftime('%Y-%m-%d'),
+            'time': now.strftime('%H:%M:%S'),
+            'name': f'Load Student {student_id}',
+            'id': student_id,
+            'dept': 'Load',
+            'role': 'Student',
+            'institution_code': tenant['code']
+        }
+        if self.use_sdk:
+            client = tenant['client']
+            return [
+                ('POST /api/attendance/realtime', self.timed_call(client.record_attendance, record)),
+                ('GET /api/students', self.timed_call(client.list_students)),
+                ('GET /api/classes', self.timed_call(client.list_classes)),
+                ('GET /api/attendance', self.timed_call(client.list_attendance)),
+                ('GET /api/institution/stats', self.timed_call(client.institution_stats))
+            ]
+        samples = []
+        samples.append(('POST /api/attendance/realtime', self.timed_request('POST', '/attendance/realtime', json=record)))
+        samples.append(('GET /api/students', self.timed_request('GET', '/students', headers=headers)))
+        samples.append(('GET /api/classes', self.timed_request('GET', '/classes', headers=headers)))
+        samples.append(('GET /api/attendance', self.timed_request('GET', '/attendance', headers=headers)))
+        samples.append(('GET /api/institution/stats', self.timed_request('GET', '/institution/stats', headers=headers)))
+        return samples
+
+    def run_load_step(self, tenant_count, workers, rounds):
+        """Grow the tenant pool to tenant_count and drive all tenants concurrently"""
+        for index in range(len(self.load_tenants), tenant_count):
+            try:
+                self.load_tenants.append(self.create_load_tenant(index))
+            except Exception as e:
+                self.log_test("Load Tenant Setup", False, f"Error: {str(e)}")
+
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            started = time.perf_counter()
+            jobs = [pool.submit(self.tenant_workload, tenant, r)
+                    for r in range(rounds) for tenant in self.load_tenants]
+            per_endpoint = {}
+            for job in jobs:
+                for endpoint, sample in job.result():
+                    per_endpoint.setdefault(endpoint, []).append(sample)
+            elapsed = time.perf_counter() - started
+
+        endpoints = {endpoint: summarize_latencies(samples) for endpoint, samples in sorted(per_endpoint.items())}
+        total_requests = sum(stats['requests'] for stats in endpoints.values())
+        step = {
+            'tenants': len(self.load_tenants),
+            'workers': workers,
+            'rounds': rounds,
+            'duration_s': round(elapsed, 3),
+            'throughput_rps': round(total_requests / elapsed, 2) if elapsed else 0.0,
+            'endpoints': endpoints
+        }
+        if self.use_sdk:
+            step['sdk'] = self.sdk_savings()
+        self.load_results.append(step)
+
+        worst_p99 = max((stats['p99_ms'] for stats in endpoints.values()), default=0.0)
+        worst_errors = max((stats['error_rate'] for stats in endpoints.values()), default=0.0)
+        self.log_test(
+            f"Load Step {step['tenants']} tenants",
+            worst_errors == 0,
+            f"{step['throughput_rps']} req/s, worst p99 {worst_p99}ms, worst error rate {worst_errors:.1%}"
+        )
+        return step
+
+    def run_load_test(self, tenant_steps=None, workers=LOAD_WORKERS, rounds=LOAD_ROUNDS_PER_TENANT):
+        """Run the concurrent load test, ramping the number of tenants step by step"""
+        tenant_steps = sorted(tenant_steps or LOAD_TENANT_STEPS)
+        print("=== Multi-Institution Load Test ===")
+        print(f"Testing against: {API_BASE_URL}")
+        print(f"Tenant steps: {tenant_steps}, workers: {workers}, rounds per tenant: {rounds}")
+
+        if not self.test_api_connection():
+            print("❌ API connection failed - aborting load test")
+            return False
+
+        for tenant_count in tenant_steps:
+            print(f"\n--- Load step: {tenant_count} tenants ---")
+            step = self.run_load_step(tenant_count, workers, rounds)
+            for endpoint, stats in step['endpoints'].items():
+                print(f"  {endpoint:32} p50 {stats['p50_ms']:8.1f}ms  p95 {stats['p95_ms']:8.1f}ms  "
+                      f"p99 {stats['p99_ms']:8.1f}ms  errors {stats['error_rate']:.1%}")
+            if 'sdk' in step:
+                sdk = step['sdk']
+                print(f"  SDK: {sdk['calls']} calls -> {sdk['http_requests']} HTTP requests "
+                      f"({sdk['cache_hits']} cache hits, {sdk['not_modified']} 304s, "
+                      f"{sdk['requests_saved_pct']}% saved)")
+
+        return self.generate_report()
+
+    # ===== REALTIME INGEST MODE =====
+
+    def run_ingest_test(self, tenant_count=INGEST_TENANTS, workers=LOAD_WORKERS, events=INGEST_EVENTS):
+        """Flood POST /api/attendance/realtime from concurrent gates and report inserts/sec"""
+        print("=== Realtime Attendance Ingest Test ===")
+        print(f"Testing against: {API_BASE_URL}")
+        print(f"Tenants: {tenant_count}, workers: {workers}, events: {events}")
+
+        if not self.test_api_connection():
+            print("❌ API connection failed - aborting ingest test")
+            return False
+
+        for index in range(len(self.load_tenants), tenant_count):
+            try:
+                self.load_tenants.append(self.create_load_tenant(index))
+            except Exception as e:
+                self.log_test("Ingest Tenant Setup", False, f"Error: {str(e)}")
+        if not self.load_tenants:
+            return self.generate_report()
+
+        # One sighting per event; seconds past 07:00 keep (student, date, time) distinct
+        today = datetime.now().strftime('%Y-%m-%d')
+        records = []
+        for n in range(events):
+            tenant = self.load_tenants[n % len(self.load_tenants)]
+            student_id = tenant['student_ids'][(n // len(self.load_tenants)) % len(tenant['student_ids'])]
+            seconds = 7 * 3600 + n
+            records.append({
+                'date': today,
+                'time': f'{seconds // 3600 % 24:02d}:{seconds // 60 % 60:02d}:{seconds % 60:02d}',
+                'name': f'Load Student {student_id}',
+                'id': student_id,
+                'dept': 'Load',
+                'institution_code': tenant['code']
+            })
+
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            started = time.perf_counter()
+            samples = list(pool.map(lambda record: self.timed_request('POST', '/attendance/realtime', json=record),
+                                    records))
+            elapsed = time.perf_counter() - started
+
+        stats = summarize_latencies(samples)
+        result = {
+            'tenants': len(self.load_tenants),
+            'workers': workers,
+            'events': events,
+            'duration_s': round(elapsed, 3),
+            'inserts_per_sec': round((events - stats['errors']) / elapsed, 2) if elapsed else 0.0,
+            'endpoint': stats
+        }
+        self.ingest_results.append(result)
+        print(f"  POST /api/attendance/realtime p50 {stats['p50_ms']:.1f}ms  p95 {stats['p95_ms']:.1f}ms  "
+              f"p99 {stats['p99_ms']:.1f}ms  errors {stats['error_rate']:.1%}")
+        self.log_test("Realtime Ingest", stats['errors'] == 0,
+                      f"{result['inserts_per_sec']} inserts/s over {events} events, {stats['errors']} errors")
+        return self.generate_report()
+
+    # ===== SCALED ISOLATION MODE =====
+
+    def seed_tenant_attendance(self, tenant, rows, seed_db=None):
+        """Record attendance rows for a tenant's students through the realtime endpoint (or the DB)"""
+        records = []
+        for n in range(rows):
+            student_id = tenant['student_ids'][n % len(tenant['student_ids'])]
+            day = 1 + (n // len(tenant['student_ids'])) % 28
+            records.append({
+                'date': f'2025-02-{day:02d}',
+                'time': f'{7 + n % 9:02d}:{n % 60:02d}:00',
+                'name': f'Load Student {student_id}',
+                'id': student_id,
+                'dept': 'Load',
+                'role': 'Student',
+                'institution_code': tenant['code']
+            })
+
+        if seed_db:
+            # Keep the daily rollups in step, as the realtime endpoint does; the stats endpoints read them
+            with sqlite3.connect(seed_db, timeout=30) as conn:
+                conn.executemany(
+                    'INSERT INTO attendance (date, time, student_id, student_name, department, institution_id) VALUES (?, ?, ?, ?, ?, ?)',
+                    [(r['date'], r['time'], r['id'], r['name'], r['dept'], tenant['id']) for r in records]
+                )
+                conn.executemany(ATTENDANCE_ROLLUP_UPSERT,
+                                 [(tenant['id'], r['id'], r['date'], r['time'], r['time']) for r in records])
+            return rows
+
+        session = self.thread_session()
+        stored = 0
+        for record in records:
+            try:
+                response = session.post(f'{API_BASE_URL}/attendance/realtime', json=record, timeout=30)
+                stored += response.status_code == 200
+            except requests.exceptions.RequestException:
+                pass
+        return stored
+
+    def verify_tenant_isolation(self, tenant, all_student_owners, attendance_limit):
+        """Query every tenant-scoped endpoint as the tenant admin and diff the results with set operations"""
+        headers = tenant['headers']
+        own_students = set(tenant['student_ids'])
+        session = self.thread_session()
+        timings = {}
+        violations = {}
+
+        def fetch(label, endpoint, **params):
+            started = time.perf_counter()
+            try:
+                response = session.get(f'{API_BASE_URL}{endpoint}', headers=headers, params=params, timeout=60)
+                ok = response.status_code == 200
+                body = response.json() if ok else {}
+            except (requests.exceptions.RequestException, ValueError):
+                ok, body = False, {}
+            timings[label] = ((time.perf_counter() - started) * 1000.0, ok)
+            return body.get('data')
+
+        students = fetch('GET /api/students', '/students') or []
+        returned_students = {row.get('id') for row in students}
+        foreign = returned_students - own_students
+        if foreign:
+            violations['students'] = sorted(foreign)[:10]
+
+        attendance = fetch('GET /api/attendance', '/attendance', limit=attendance_limit) or []
+        foreign_rows = [row for row in attendance
+                        if row.get('student_id') not in own_students or row.get('institution_id') != tenant['id']]
+        if foreign_rows:
+            leaked_from = {all_student_owners.get(row.get('student_id')) for row in foreign_rows}
+            violations['attendance'] = {
+                'rows': len(foreign_rows),
+                'tenants_leaked_from': sorted(str(t) for t in leaked_from)[:10]
+            }
+
+        classes = fetch('GET /api/classes', '/classes') or []
+        foreign_classes = {row.get('id') for row in classes} - set(tenant.get('class_ids', []))
+        if foreign_classes:
+            violations['classes'] = sorted(foreign_classes)[:10]
+
+        stats = fetch('GET /api/institution/stats', '/institution/stats') or {}
+        if stats.get('totalStudents') not in (None, len(own_students)):
+            violations['stats'] = {'totalStudents': stats.get('totalStudents'), 'expected': len(own_students)}
+
+        return violations, timings
+
+    def run_isolation_step(self, tenant_count, students, attendance_rows, workers, seed_db):
+        """Grow to tenant_count tenants, then verify every tenant concurrently"""
+        new_tenants = []
+        for index in range(len(self.load_tenants), tenant_count):
+            try:
+                tenant = self.create_load_tenant(index, students, seed_db)
+                self.load_tenants.append(tenant)
+                new_tenants.append(tenant)
+            except Exception as e:
+                self.log_test("Isolation Tenant Setup", False, f"Error: {str(e)}")
+
+        owners = {sid: tenant['id'] for tenant in self.load_tenants for sid in tenant['student_ids']}
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            stored = sum(pool.map(lambda t: self.seed_tenant_attendance(t, attendance_rows, seed_db), new_tenants))
+            results = list(pool.map(
+                lambda t: self.verify_tenant_isolation(t, owners, attendance_rows * 2), self.load_tenants))
+
+        per_endpoint = {}
+        leaking_tenants = {}
+        for tenant, (violations, timings) in zip(self.load_tenants, results):
+            if violations:
+                leaking_tenants[tenant['code'] or str(tenant['id'])] = violations
+            for label, sample in timings.items():
+                per_endpoint.setdefault(label, []).append(sample)
+
+        step = {
+            'tenants': len(self.load_tenants),
+            'students_per_tenant': students,
+            'attendance_rows_seeded': stored,
+            'tenants_with_violations': len(leaking_tenants),
+            'violations': dict(list(leaking_tenants.items())[:20]),
+            'endpoints': {label: summarize_latencies(samples) for label, samples in sorted(per_endpoint.items())}
+        }
+        self.isolation_results.append(step)
+        self.log_test(
+            f"Isolation {step['tenants']} tenants",
+            not leaking_tenants,
+            f"{len(leaking_tenants)} tenants saw foreign rows" if leaking_tenants else "No cross-tenant rows returned"
+        )
+        return step
+
+    def run_isolation_test(self, tenant_steps=None, students=ISOLATION_STUDENTS_PER_TENANT,
+                           attendance_rows=ISOLATION_ATTENDANCE_PER_TENANT, workers=LOAD_WORKERS, seed_db=None):
+        """Verify tenant isolation at growing tenant counts and record query latency scaling"""
+        tenant_steps = sorted(tenant_steps or ISOLATION_TENANT_STEPS)
+        print("=== Scaled Tenant Isolation Test ===")
+        print(f"Testing against: {API_BASE_URL}")
+        print(f"Tenant steps: {tenant_steps}, students/tenant: {students}, attendance rows/tenant: {attendance_rows}")
+        print(f"Seeding: {'direct to ' + seed_db if seed_db else 'via API'}")
+
+        if not self.test_api_connection():
+            print("❌ API connection failed - aborting isolation test")
+            return False
+
+        for tenant_count in tenant_steps:
+            print(f"\n--- Isolation step: {tenant_count} tenants ---")
+            step = self.run_isolation_step(tenant_count, students, attendance_rows, workers, seed_db)
+            for label in ('GET /api/attendance', 'GET /api/institution/stats'):
+                stats = step['endpoints'].get(label)
+                if stats:
+                    print(f"  {label:28} p50 {stats['p50_ms']:8.1f}ms  p95 {stats['p95_ms']:8.1f}ms  "
+                          f"p99 {stats['p99_ms']:8.1f}ms")
+
+        return self.generate_report()
+
     def cleanup_test_data(self):
         """Clean up test institutions (optional)"""
         print("\n--- Cleanup (keeping test data for inspection) ---")
@@ -287,6 +778,21 @@ class MultiInstitutionTester:
             'test_results': self.test_results,
             'generated_at': datetime.now().isoformat()
         }
+        if self.load_results:
+            report['load_test'] = {
+                'api_base_url': API_BASE_URL,
+                'steps': self.load_results
+            }
+        if self.ingest_results:
+            report['ingest_test'] = {
+                'api_base_url': API_BASE_URL,
+                'runs': self.ingest_results
+            }
+        if self.isolation_results:
+            report['isolation_test'] = {
+                'api_base_url': API_BASE_URL,
+                'steps': self.isolation_results
+            }
         
         with open('multi_institution_test_report.json', 'w') as f:
             json.dump(report, f, indent=2)
@@ -329,8 +835,35 @@ class MultiInstitutionTester:
 
 def main():
     """Main test function"""
-    tester = MultiInstitutionTester()
-    success = tester.run_all_tests()
+    parser = argparse.ArgumentParser(description='Multi-institution functional and load tests')
+    parser.add_argument('--load', action='store_true', help='Run the concurrent load test instead of the functional tests')
+    parser.add_argument('--isolation', action='store_true', help='Run the scaled tenant isolation test')
+    parser.add_argument('--ingest', action='store_true',
+                        help='Flood the realtime attendance endpoint and report inserts/sec')
+    parser.add_argument('--events', type=int, default=INGEST_EVENTS, help='Realtime events to send in ingest mode')
+    parser.add_argument('--tenants', default=None,
+                        help='Comma-separated tenant counts to ramp through in load/isolation mode (ingest uses the largest)')
+    parser.add_argument('--students', type=int, default=ISOLATION_STUDENTS_PER_TENANT, help='Students per tenant in isolation mode')
+    parser.add_argument('--attendance', type=int, default=ISOLATION_ATTENDANCE_PER_TENANT,
+                        help='Attendance rows per tenant in isolation mode')
+    parser.add_argument('--seed-db', default=None,
+                        help="Seed students/attendance directly into the server's SQLite file (needed at large scale)")
+    parser.add_argument('--workers', type=int, default=LOAD_WORKERS, help='Worker pool size in load mode')
+    parser.add_argument('--rounds', type=int, default=LOAD_ROUNDS_PER_TENANT, help='Workload rounds per tenant in load mode')
+    parser.add_argument('--sdk', action='store_true',
+                        help='Drive the load workload through backend/school_client.py and report request savings')
+    args = parser.parse_args()
+
+    tester = MultiInstitutionTester(use_sdk=args.sdk)
+    steps = [int(n) for n in args.tenants.split(',') if n.strip()] if args.tenants else None
+    if args.ingest:
+        success = tester.run_ingest_test(max(steps) if steps else INGEST_TENANTS, args.workers, args.events)
+    elif args.isolation:
+        success = tester.run_isolation_test(steps, args.students, args.attendance, args.workers, args.seed_db)
+    elif args.load:
+        success = tester.run_load_test(steps, args.workers, args.rounds)
+    else:
+        success = tester.run_all_tests()
     sys.exit(0 if success else 1)
 
 if __name__ == "__main__":
@@ -0,0 +1,96 @@
+"""
+Tests for fuzzy name-to-student reconciliation
+"""
+
+import os
+import sqlite3
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'backend'))
+
+from attendance_archiver import AttendanceArchiver  # noqa: E402
+from db_maintenance import BENCHMARK_SCHEMA  # noqa: E402
+from name_reconciliation import NameIndex, cleanup, normalize_name, rebuild_rollups  # noqa: E402
+
+ROSTER = [
+    {'id': '444', 'name': 'Tonmoy Ahmed', 'department': 'CSE'},
+    {'id': '447', 'name': 'Fatima Al-Zahra', 'department': 'Math'},
+    {'id': '501', 'name': 'Mamadou Diallo', 'department': 'BBA'},
+    {'id': '502', 'name': 'Mamadou Bah', 'department': 'BBA'},
+    {'id': '503', 'name': 'Aïssatou Condé', 'department': 'EEE'},
+]
+
+
+class NameReconciliationTest(unittest.TestCase):
+
+    def setUp(self):
+        self.index = NameIndex(ROSTER)
+
+    def test_normalize(self):
+        self.assertEqual(normalize_name('  Aïssatou  CONDÉ '), 'aissatou conde')
+        self.assertEqual(normalize_name('Fatima Al-Zahra'), 'fatima al zahra')
+
+    def test_recognizer_variants_match(self):
+        for query, expected in [('tonmoy', '444'), ('fatima al zahra', '447'), ('Aissatou Conde', '503'),
+                                ('Mamadou Dialo', '501'), ('bah mamadou', '502')]:
+            match = self.index.reconcile(query)
+            self.assertIsNotNone(match, query)
+            self.assertEqual(match.student_id, expected, query)
+
+    def test_shared_first_name_is_ambiguous(self):
+        self.assertTrue(self.index.lookup('mamadou').ambiguous)
+        self.assertIsNone(self.index.reconcile('mamadou'))
+        self.assertIsNone(self.index.reconcile('Zzyzx'))
+
+    def test_cleanup_rewrites_orphan_rows(self):
+        conn = sqlite3.connect(':memory:')
+        conn.executescript("""
+            CREATE TABLE students (id TEXT PRIMARY KEY, name TEXT, department TEXT);
+            CREATE TABLE attendance (id INTEGER PRIMARY KEY, date TEXT, time TEXT, student_id TEXT,
+                                     student_name TEXT, department TEXT, institution_id INTEGER);
+        """)
+        conn.executemany('INSERT INTO students VALUES (?, ?, ?)', [(s['id'], s['name'], s['department']) for s in ROSTER])
+        conn.executemany('INSERT INTO attendance (date, time, student_id, student_name, department) VALUES (?, ?, ?, ?, ?)', [
+            ('2025-03-03', '08:00:00', 'tonmoy', 'tonmoy', 'CSE'),
+            ('2025-03-04', '08:00:00', 'tonmoy', 'tonmoy', 'CSE'),
+            ('2025-03-03', '08:00:00', '999', 'Unknown Person', 'CSE'),
+        ])
+
+        report = cleanup(conn, self.index, apply=True)
+        self.assertEqual(report['reconciled_rows'], 2)
+        self.assertEqual(report['unmatched_rows'], 1)
+        rows = conn.execute("SELECT DISTINCT student_id, student_name FROM attendance WHERE date IS NOT NULL "
+                            "AND student_id = '444'").fetchall()
+        self.assertEqual(rows, [('444', 'Tonmoy Ahmed')])
+        conn.close()
+
+    def test_cleanup_keeps_rollups_of_archived_months(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            db_path = os.path.join(tmp, 'school.db')
+            conn = sqlite3.connect(db_path)
+            conn.executescript(BENCHMARK_SCHEMA)
+            conn.executemany('INSERT INTO students (id, name, department) VALUES (?, ?, ?)',
+                             [(s['id'], s['name'], s['department']) for s in ROSTER])
+            conn.executemany('INSERT INTO attendance (date, time, student_id, student_name, department, institution_id) '
+                             'VALUES (?, ?, ?, ?, ?, 1)', [
+                                 ('2025-02-10', '08:00:00', 'tonmoy', 'tonmoy', 'CSE'),
+                                 ('2025-02-10', '15:00:00', 'tonmoy', 'tonmoy', 'CSE'),
+                                 ('2025-03-03', '08:00:00', 'tonmoy', 'tonmoy', 'CSE'),
+                             ])
+            rebuild_rollups(conn, ['tonmoy'])
+            conn.commit()
+            AttendanceArchiver(db_path, os.path.join(tmp, 'archive')).run('2025-03-01', compact=False)
+
+            # Only the March row is still in attendance; February lives on in its rollup alone
+            report = cleanup(conn, self.index, apply=True)
+            self.assertEqual(report['reconciled_rows'], 1)
+            rollups = conn.execute('SELECT student_id, date, sighting_count FROM attendance_daily '
+                                   'ORDER BY date').fetchall()
+            self.assertEqual(rollups, [('tonmoy', '2025-02-10', 2), ('444', '2025-03-03', 1)])
+            conn.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
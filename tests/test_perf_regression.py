@@ -0,0 +1,71 @@
+"""
+Tests for the performance regression gate
+"""
+
+import unittest
+
+from tests.perf_regression import (DEFAULT_BASELINE_PATH, compare_reports, flatten_metrics, load_json,
+                                   median_report, parse_tolerances)
+
+
+def load_report(throughput, p99, rss=None):
+    report = {
+        'load_test': {
+            'steps': [{
+                'tenants': 50,
+                'throughput_rps': throughput,
+                'endpoints': {'POST /api/attendance/realtime': {'p50_ms': 10.0, 'p99_ms': p99}}
+            }]
+        }
+    }
+    if rss is not None:
+        report['peak_rss_mb'] = rss
+    return report
+
+
+def statuses(results):
+    return {r['class']: r['status'] for r in results}
+
+
+class PerfRegressionTest(unittest.TestCase):
+
+    def test_flatten_matches_steps_by_tenant_count(self):
+        metrics = flatten_metrics(load_report(100.0, 40.0))
+        self.assertIn('load_test.steps[tenants=50].throughput_rps', metrics)
+        self.assertIn('load_test.steps[tenants=50].endpoints.POST /api/attendance/realtime.p99_ms', metrics)
+
+    def test_within_tolerance_passes(self):
+        results = compare_reports(load_report(95.0, 45.0, 110.0), load_report(100.0, 40.0, 100.0))
+        self.assertEqual(statuses(results), {'throughput': 'ok', 'p99': 'ok', 'rss': 'ok'})
+
+    def test_regressions_detected_per_metric(self):
+        results = compare_reports(load_report(80.0, 60.0, 130.0), load_report(100.0, 40.0, 100.0))
+        self.assertEqual(statuses(results), {'throughput': 'regression', 'p99': 'regression', 'rss': 'regression'})
+
+    def test_small_latency_delta_is_noise(self):
+        results = compare_reports(load_report(100.0, 1.5), load_report(100.0, 1.0))
+        self.assertEqual(statuses(results)['p99'], 'ok')
+
+    def test_custom_tolerance_and_missing_metric(self):
+        tolerances = parse_tolerances(['p99=1.0'])
+        results = compare_reports(load_report(100.0, 70.0), load_report(100.0, 40.0, 100.0), tolerances)
+        self.assertEqual(statuses(results), {'throughput': 'ok', 'p99': 'ok', 'rss': 'missing'})
+
+    def test_median_of_runs(self):
+        runs = [load_report(100.0, 40.0), load_report(80.0, 90.0), load_report(120.0, 50.0)]
+        median = median_report(runs)
+        self.assertEqual(median['load_test']['steps'][0]['tenants'], 50)
+        metrics = flatten_metrics(median)
+        self.assertEqual(metrics['load_test.steps[tenants=50].throughput_rps'], 100.0)
+        self.assertEqual(metrics['load_test.steps[tenants=50].endpoints.POST /api/attendance/realtime.p99_ms'], 50.0)
+
+    def test_committed_baseline_gates_load_steps(self):
+        baseline = load_json(DEFAULT_BASELINE_PATH)
+        self.assertIn('cpu_count', baseline['baseline_source'])
+        results = compare_reports(baseline, baseline)
+        self.assertTrue(any(r['metric'].endswith('throughput_rps') for r in results))
+        self.assertEqual({r['status'] for r in results}, {'ok'})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,83 @@
+"""
+Tests for the incremental student photo manifest indexer
+"""
+
+import json
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'backend'))
+
+try:
+    from PIL import Image
+except ImportError:  # Pillow is optional for the rest of the suite
+    Image = None
+
+if Image is not None:
+    from photo_manifest import MANIFEST_FILE, index_uploads  # noqa: E402
+    from photo_preprocess import PhotoPreprocessor  # noqa: E402
+
+
+@unittest.skipIf(Image is None, 'Pillow not installed')
+class PhotoManifestTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.uploads = os.path.join(self.tmp.name, 'uploads')
+        self.student_dir = os.path.join(self.uploads, 'bhadam_school', 'students', 'Tonmoy')
+        os.makedirs(self.student_dir)
+        Image.new('RGB', (640, 480), (0, 90, 0)).save(os.path.join(self.student_dir, 'photos-1.png'))
+        Image.new('RGB', (320, 240), (90, 0, 0)).save(os.path.join(self.student_dir, 'photos-2.jpg'))
+        with open(os.path.join(self.student_dir, 'notes.txt'), 'w') as f:
+            f.write('not a photo')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def read_manifest(self):
+        with open(os.path.join(self.uploads, 'bhadam_school', MANIFEST_FILE)) as f:
+            return json.load(f)
+
+    def test_builds_manifest_with_dimensions_and_thumbnails(self):
+        PhotoPreprocessor(self.uploads, workers=1).run()
+        report = index_uploads(self.uploads)
+        self.assertEqual(report['bhadam_school']['indexed'], 2)
+
+        photos = self.read_manifest()['students']['Tonmoy']
+        self.assertEqual([p['filename'] for p in photos], ['photos-1.png', 'photos-2.jpg'])
+        self.assertEqual(photos[0]['path'], 'uploads/bhadam_school/students/Tonmoy/photos-1.png')
+        self.assertEqual((photos[0]['width'], photos[0]['height']), (640, 480))
+        self.assertEqual(len(photos[0]['sha256']), 64)
+        self.assertTrue(photos[0]['thumbnail'].startswith('uploads/bhadam_school/thumbnails/Tonmoy/'))
+        self.assertTrue(os.path.exists(os.path.join(self.tmp.name, photos[0]['thumbnail'])))
+
+    def test_incremental_update(self):
+        index_uploads(self.uploads)
+        report = index_uploads(self.uploads)['bhadam_school']
+        self.assertEqual((report['indexed'], report['reused'], report['written']), (0, 2, False))
+
+        os.remove(os.path.join(self.student_dir, 'photos-1.png'))
+        Image.new('RGB', (100, 200)).save(os.path.join(self.student_dir, 'photos-3.jpg'))
+        report = index_uploads(self.uploads)['bhadam_school']
+        self.assertEqual((report['indexed'], report['reused'], report['written']), (1, 1, True))
+        photos = self.read_manifest()['students']['Tonmoy']
+        self.assertEqual([p['filename'] for p in photos], ['photos-2.jpg', 'photos-3.jpg'])
+
+    def test_folder_change_without_new_photos_refreshes_manifest_mtime(self):
+        index_uploads(self.uploads)
+        manifest = os.path.join(self.uploads, 'bhadam_school', MANIFEST_FILE)
+        os.utime(manifest, (1700000000, 1700000000))
+        extra = os.path.join(self.student_dir, 'photos-9.jpg')
+        Image.new('RGB', (10, 10)).save(extra)
+        os.remove(extra)
+        self.assertGreater(os.stat(self.student_dir).st_mtime, os.stat(manifest).st_mtime)
+
+        report = index_uploads(self.uploads)['bhadam_school']
+        self.assertFalse(report['written'])
+        self.assertGreater(os.stat(manifest).st_mtime, os.stat(self.student_dir).st_mtime)
+
+
+if __name__ == '__main__':
+    unittest.main()
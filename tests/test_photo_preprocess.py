@@ -0,0 +1,71 @@
+"""
+Tests for parallel student photo preprocessing
+"""
+
+import json
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'backend'))
+
+try:
+    from PIL import Image
+except ImportError:  # Pillow is optional for the rest of the suite
+    Image = None
+
+if Image is not None:
+    from photo_preprocess import MANIFEST_FILE, PhotoPreprocessor  # noqa: E402
+
+
+@unittest.skipIf(Image is None, 'Pillow not installed')
+class PhotoPreprocessTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.uploads = self.tmp.name
+        self.student_dir = os.path.join(self.uploads, 'ideal_school', 'students', 'Brock_Lesnar')
+        os.makedirs(self.student_dir)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write_photo(self, name, size, orientation=1, color=(200, 40, 40)):
+        exif = Image.Exif()
+        exif[0x0112] = orientation
+        Image.new('RGB', size, color).save(os.path.join(self.student_dir, name), 'JPEG', exif=exif)
+
+    def test_orients_resizes_and_writes_thumbnails(self):
+        self.write_photo('photos-1.jpg', (3000, 2000), orientation=6)
+        Image.new('RGBA', (300, 300), (0, 0, 0, 0)).save(os.path.join(self.student_dir, 'photos-2.png'))
+
+        report = PhotoPreprocessor(self.uploads, workers=2).run()
+        self.assertEqual((report['processed'], report['skipped'], report['failed']), (2, 0, 0))
+
+        with open(os.path.join(self.uploads, MANIFEST_FILE)) as f:
+            photos = json.load(f)['photos']
+        rotated = next(p for p in photos.values() if p['source'].endswith('photos-1.jpg'))
+        self.assertEqual((rotated['width'], rotated['height']), (683, 1024))
+        with Image.open(os.path.join(self.uploads, rotated['thumbnail'])) as thumb:
+            self.assertEqual(thumb.size, (107, 160))
+        png = next(p for p in photos.values() if p['source'].endswith('photos-2.png'))
+        with Image.open(os.path.join(self.uploads, png['processed'])) as processed:
+            self.assertEqual(processed.mode, 'RGB')
+            self.assertEqual(processed.getpixel((0, 0)), (255, 255, 255))
+
+    def test_rerun_skips_unchanged_photos(self):
+        self.write_photo('photos-1.jpg', (800, 600))
+        self.write_photo('photos-2.jpg', (800, 600), color=(10, 10, 200))
+        PhotoPreprocessor(self.uploads, workers=1).run()
+
+        report = PhotoPreprocessor(self.uploads, workers=1).run()
+        self.assertEqual((report['processed'], report['skipped']), (0, 2))
+
+        self.write_photo('photos-2.jpg', (800, 600), color=(10, 200, 10))
+        report = PhotoPreprocessor(self.uploads, workers=1).run()
+        self.assertEqual((report['processed'], report['skipped']), (1, 1))
+
+
+if __name__ == '__main__':
+    unittest.main()
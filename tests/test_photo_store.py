@@ -0,0 +1,72 @@
+"""
+Tests for the content-addressed student photo store
+"""
+
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'backend'))
+
+from photo_store import PhotoStore, migrate  # noqa: E402
+
+
+class PhotoStoreTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.uploads = self.tmp.name
+        self.write('ideal_school', 'Brock_Lesnar', 'photos-1.jpg', b'A' * 1000)
+        self.write('ideal_school', 'Brock_Lesnar', 'photos-2.jpg', b'A' * 1000)
+        self.write('ideal_school', 'Brock_Lesnar', 'photos-3.jpg', b'B' * 500)
+        self.write('bhadam_school', 'Tonmoy', 'photos-1.jpg', b'A' * 1000)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, institution, student, filename, content):
+        folder = os.path.join(self.uploads, institution, 'students', student)
+        os.makedirs(folder, exist_ok=True)
+        with open(os.path.join(folder, filename), 'wb') as f:
+            f.write(content)
+
+    def photo(self, institution, student, filename):
+        return os.path.join(self.uploads, institution, 'students', student, filename)
+
+    def test_dry_run_reports_savings_without_touching_files(self):
+        report = migrate(self.uploads, workers=2, dry_run=True)
+        self.assertEqual((report['photos'], report['unique_photos']), (4, 2))
+        self.assertEqual(report['space_saved_bytes'], 2000)
+        self.assertEqual(report['upload_bytes_saved'], 2000)
+        self.assertFalse(os.path.exists(os.path.join(self.uploads, '.photo_store')))
+
+    def test_migrate_links_duplicates_to_one_blob(self):
+        report = migrate(self.uploads, workers=2)
+        self.assertEqual(report['bytes_after'], 1500)
+        first = self.photo('ideal_school', 'Brock_Lesnar', 'photos-1.jpg')
+        for other in (self.photo('ideal_school', 'Brock_Lesnar', 'photos-2.jpg'),
+                      self.photo('bhadam_school', 'Tonmoy', 'photos-1.jpg')):
+            self.assertTrue(os.path.samefile(first, other))
+        with open(first, 'rb') as f:
+            self.assertEqual(f.read(), b'A' * 1000)
+
+        store = PhotoStore(self.uploads)
+        self.assertEqual(len(store.references('ideal_school', 'Brock_Lesnar')), 2)
+        self.assertEqual(len(store.index['students']['ideal_school/Brock_Lesnar']), 3)
+
+        # Rerunning is a no-op
+        self.assertEqual(migrate(self.uploads)['files_linked'], 0)
+
+    def test_collapse_and_prune(self):
+        migrate(self.uploads, collapse=True)
+        self.assertFalse(os.path.exists(self.photo('ideal_school', 'Brock_Lesnar', 'photos-2.jpg')))
+
+        os.remove(self.photo('ideal_school', 'Brock_Lesnar', 'photos-3.jpg'))
+        report = migrate(self.uploads)
+        self.assertEqual(report['orphan_blobs_removed'], 1)
+        self.assertEqual(len(PhotoStore(self.uploads).index['blobs']), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
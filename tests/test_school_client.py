@@ -0,0 +1,57 @@
+"""
+Tests for the Python client SDK against the offline stub API server
+"""
+
+import os
+import sys
+import time
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'backend'))
+
+from school_client import SchoolAPIError, SchoolClient  # noqa: E402
+from tests.stub_api_server import FaultProfile, StubAPIServer  # noqa: E402
+
+
+class SchoolClientTest(unittest.TestCase):
+
+    def test_conditional_get_and_freshness_window(self):
+        with StubAPIServer() as server:
+            client = SchoolClient(server.base_url, 'admin', 'admin123', cache_freshness={'/classes': 0.2})
+            self.assertEqual(client.list_classes(), [])
+            self.assertEqual(client.list_classes(), [])  # fresh: no request
+            time.sleep(0.25)
+            self.assertEqual(client.list_classes(), [])  # stale: revalidated with a 304
+            self.assertEqual(server.state.counters['not_modified'], 1)
+
+            client.create_class({'name': 'Class 1', 'department': 'CSE'})
+            self.assertEqual([c['name'] for c in client.list_classes()], ['Class 1'])
+
+            savings = client.request_savings()
+            self.assertEqual((savings['calls'], savings['cache_hits'], savings['not_modified']), (5, 1, 1))
+            self.assertEqual(savings['logins'], 1)
+
+    def test_refreshes_expiring_token(self):
+        with StubAPIServer(token_ttl=1) as server:
+            client = SchoolClient(server.base_url, 'admin', 'admin123', cache_freshness={})
+            client.list_classes()
+            client.token_exp = None  # unknown expiry: only the server's 401 reveals it
+            time.sleep(1.1)
+            client.list_classes()  # expired token: 401, re-login, retry
+            self.assertEqual(server.state.counters['logins'], 2)
+
+        with StubAPIServer() as server:
+            with self.assertRaises(SchoolAPIError) as error:
+                SchoolClient(server.base_url, 'admin', 'wrong').list_classes()
+            self.assertEqual(error.exception.status, 401)
+
+    def test_retries_transient_failures(self):
+        with StubAPIServer(faults=FaultProfile(error_rate=0.3, seed=7)) as server:
+            client = SchoolClient(server.base_url, max_retries=6, backoff_factor=0, cache_freshness={})
+            for _ in range(20):
+                self.assertEqual(client.list_institutions()[0]['institution_code'], 'BHS')
+            self.assertGreater(server.state.counters['injected_errors'], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
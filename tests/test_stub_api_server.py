@@ -0,0 +1,78 @@
+"""
+Tests for the offline stub API server and its fault injection
+"""
+
+import json
+import time
+import unittest
+import urllib.error
+import urllib.request
+
+from tests.stub_api_server import FaultProfile, StubAPIServer, parse_latency_spec
+
+
+def call(url, payload=None, timeout=5):
+    """Issue a GET (or JSON POST when payload is given) and return (status, body)"""
+    data = json.dumps(payload).encode('utf-8') if payload is not None else None
+    request = urllib.request.Request(url, data=data, headers={'Content-Type': 'application/json'})
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            return response.status, json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read())
+
+
+ATTENDANCE = {'date': '2025-08-14', 'time': '12:00:00', 'name': 'Tonmoy Ahmed', 'id': '444', 'dept': 'CSE'}
+
+
+class StubAPIServerTest(unittest.TestCase):
+
+    def test_realtime_then_public(self):
+        with StubAPIServer() as server:
+            status, body = call(f'{server.base_url}/attendance/realtime', ATTENDANCE)
+            self.assertEqual(status, 200)
+            self.assertEqual(body['data']['student_id'], '444')
+
+            status, body = call(f'{server.base_url}/attendance/public?limit=5')
+            self.assertEqual(status, 200)
+            self.assertEqual(len(body['data']), 1)
+
+            status, _ = call(f'{server.base_url}/health')
+            self.assertEqual(status, 200)
+
+    def test_missing_fields_rejected(self):
+        with StubAPIServer() as server:
+            status, body = call(f'{server.base_url}/attendance/realtime', {'date': '2025-08-14'})
+            self.assertEqual(status, 400)
+            self.assertEqual(body['error'], 'Missing required fields')
+
+    def test_error_rate_injects_500(self):
+        with StubAPIServer(faults=FaultProfile(error_rate=1.0, seed=1)) as server:
+            status, body = call(f'{server.base_url}/health')
+            self.assertEqual(status, 500)
+            self.assertEqual(server.state.snapshot()['injected_errors'], 1)
+
+    def test_reset_rate_drops_connection(self):
+        with StubAPIServer(faults=FaultProfile(reset_rate=1.0, seed=1)) as server:
+            with self.assertRaises((ConnectionError, urllib.error.URLError, OSError)):
+                call(f'{server.base_url}/health')
+
+    def test_throughput_cap(self):
+        with StubAPIServer(faults=FaultProfile(max_rps=50)) as server:
+            started = time.monotonic()
+            for _ in range(6):
+                call(f'{server.base_url}/health')
+            self.assertGreaterEqual(time.monotonic() - started, 5 / 50.0)
+
+    def test_latency_specs(self):
+        import random
+        rng = random.Random(0)
+        self.assertEqual(parse_latency_spec('fixed:20')(rng), 0.02)
+        self.assertTrue(0.005 <= parse_latency_spec('uniform:5,50')(rng) <= 0.05)
+        self.assertGreaterEqual(parse_latency_spec('normal:1,100')(rng), 0.0)
+        with self.assertRaises(ValueError):
+            parse_latency_spec('gamma:1')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,197 @@
+"""
+Tests for the bulk student importer against the offline stub API server
+"""
+
+import os
+import sys
+import tempfile
+import unittest
+
+import requests
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'backend'))
+
+from school_client import SchoolClient  # noqa: E402
+from student_importer import ImportJournal, StudentImporter, read_roster, validate_roster  # noqa: E402
+from tests.stub_api_server import STUB_INSTITUTION_ID, FaultProfile, StubAPIServer  # noqa: E402
+
+PNG = (b'\x89PNG\r\n\x1a\n\x00\x00\x00\rIHDR\x00\x00\x00\x01\x00\x00\x00\x01\x08\x02\x00\x00\x00\x90wS\xde'
+       b'\x00\x00\x00\x0cIDATx\x9cc\xf8\xcf\xc0\x00\x00\x03\x01\x01\x00\xc9\xfe\x92\xef'
+       b'\x00\x00\x00\x00IEND\xaeB`\x82')
+
+
+class Crash(BaseException):
+    """Stands in for the process dying after the server committed a student"""
+
+
+class CrashingClient(SchoolClient):
+    def __init__(self, base_url, after):
+        super().__init__(base_url, 'admin', 'admin123')
+        self.after = after
+
+    def create_student(self, data, photos=None):
+        body = super().create_student(data, photos)
+        self.after -= 1
+        if self.after == 0:
+            raise Crash()
+        return body
+
+
+class LostResponseClient(SchoolClient):
+    """The server commits the first create but the response never arrives"""
+
+    def __init__(self, base_url):
+        super().__init__(base_url, 'admin', 'admin123')
+        self.lost = False
+
+    def create_student(self, data, photos=None):
+        body = super().create_student(data, photos)
+        if not self.lost:
+            self.lost = True
+            raise requests.exceptions.ConnectionError('connection reset')
+        return body
+
+
+class ListCountingClient(SchoolClient):
+    """Counts roster listings"""
+
+    def __init__(self, base_url):
+        super().__init__(base_url, 'admin', 'admin123')
+        self.list_calls = 0
+
+    def list_students(self, *args, **kwargs):
+        self.list_calls += 1
+        return super().list_students(*args, **kwargs)
+
+
+class StudentImporterTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.photos = os.path.join(self.tmp.name, 'photos')
+        os.makedirs(os.path.join(self.photos, 'S002'))
+        self.write_photo('S001_1.png')
+        self.write_photo('S001_2.png')
+        self.write_photo(os.path.join('S002', 'front.png'))
+        self.roster = os.path.join(self.tmp.name, 'roster.csv')
+        self.journal = os.path.join(self.tmp.name, 'roster.import.jsonl')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write_photo(self, name, content=PNG):
+        with open(os.path.join(self.photos, name), 'wb') as f:
+            f.write(content)
+
+    def write_roster(self, lines):
+        with open(self.roster, 'w', encoding='utf-8') as f:
+            f.write('Student ID,Name,Dept,Class,Email\n' + '\n'.join(lines) + '\n')
+
+    def students(self, count):
+        self.write_roster([f'S{i:03d},Student {i},CSE,Class 1,' for i in range(1, count + 1)])
+        return validate_roster(read_roster(self.roster), self.photos, default_password='pass1234')
+
+    def test_validates_locally_before_upload(self):
+        self.write_photo('S003.png', b'not an image')
+        self.write_photo('S004.png', b'\0' * (5 * 1024 * 1024 + 1))
+        for n in range(1, 7):
+            self.write_photo(f'S005-{n}.png')
+        self.write_roster(['S001,Ana,CSE,Class 1,ana@example.com', 'S002,Ben,CSE,,ben@', 'S003,Cy,CSE,,',
+                           'S004,Dee,EEE,,', 'S005,Eve,EEE,,', 'S001,Ana Again,CSE,,', ',Nobody,CSE,,', 'S006,Fay,EEE,,'])
+        students = validate_roster(read_roster(self.roster), self.photos, default_password='pass1234')
+        errors = {s['row']: s['errors'] for s in students}
+
+        self.assertEqual(errors[1], [])
+        self.assertEqual([os.path.basename(p) for p in students[0]['photos']], ['S001_1.png', 'S001_2.png'])
+        self.assertEqual(students[0]['data']['username'], 'S001')
+        self.assertEqual(errors[2], ['invalid email: ben@'])
+        self.assertEqual(errors[3], ['unreadable image: S003.png'])
+        self.assertIn('photo over 5MB', errors[4][0])
+        self.assertEqual(errors[5], ['6 photos (the server accepts at most 5)'])
+        self.assertIn('duplicate id S001 (also on row 1)', errors[6])
+        self.assertIn('missing id', errors[7])
+        self.assertEqual((errors[8], students[7]['warnings']), ([], ['no photos found']))
+
+        no_password = validate_roster(read_roster(self.roster)[:1], self.photos)
+        self.assertIn('missing password', no_password[0]['errors'][0])
+
+    def test_resumes_after_crash_from_next_row(self):
+        students = self.students(10)
+        with StubAPIServer() as server:
+            importer = StudentImporter(CrashingClient(server.base_url, after=4), ImportJournal(self.journal), workers=1)
+            with self.assertRaises(Crash):
+                importer.run(students)
+            # The fourth student (and any upload already in flight) reached the server but not the journal
+            in_flight = len(server.state.students) - 3
+            self.assertGreaterEqual(in_flight, 1)
+            journal = ImportJournal(self.journal)
+            self.assertEqual(sum(journal.is_done(s['data']['id']) for s in students), 3)
+            self.assertTrue(journal.was_sent('S004'))
+
+            client = SchoolClient(server.base_url, 'admin', 'admin123')
+            report = StudentImporter(client, ImportJournal(self.journal), workers=3).run(students)
+            self.assertEqual((report['resumed'], report['attempted']), (3, 7))
+            self.assertEqual((report['created'], report['already_existed'], report['failed']), (7 - in_flight, in_flight, 0))
+            self.assertEqual(len(server.state.students), 10)
+            self.assertEqual(server.state.students['S001']['photos'], ['S001_1.png', 'S001_2.png'])
+            self.assertGreater(report['students_per_minute'], 0)
+
+            report = StudentImporter(client, ImportJournal(self.journal)).run(students)
+            self.assertEqual((report['resumed'], report['attempted']), (10, 0))
+
+    def test_retries_transient_failures(self):
+        students = self.students(12)
+        with StubAPIServer(faults=FaultProfile(error_rate=0.3, seed=3)) as server:
+            client = SchoolClient(server.base_url, 'admin', 'admin123', max_retries=6, backoff_factor=0)
+            importer = StudentImporter(client, ImportJournal(self.journal), workers=4, max_attempts=8,
+                                       backoff_seconds=0)
+            report = importer.run(students)
+            self.assertEqual((report['created'], report['failed']), (12, 0))
+            self.assertGreater(server.state.counters['injected_errors'], 0)
+
+    def test_retry_confirms_own_create_without_resending_photos(self):
+        students = self.students(2)
+        with StubAPIServer() as server:
+            client = LostResponseClient(server.base_url)
+            client.ensure_token()
+            importer = StudentImporter(client, ImportJournal(self.journal), workers=1, backoff_seconds=0)
+            report = importer.run(students)
+            self.assertEqual((report['created'], report['already_existed'], report['failed']), (1, 1, 0))
+            self.assertEqual(server.state.counters['photos_received'], 3)
+
+    def test_existing_ids_and_usernames_are_failures(self):
+        students = self.students(3)
+        with StubAPIServer() as server:
+            # Student IDs are global: S001 belongs to another institution, S002's username is taken
+            server.state.students['S001'] = {'id': 'S001', 'name': 'Student 1', 'username': 'other1',
+                                             'status': 'active', 'institution_id': STUB_INSTITUTION_ID + 1}
+            server.state.students['X9'] = {'id': 'X9', 'name': 'Someone', 'username': 'S002',
+                                           'status': 'active', 'institution_id': STUB_INSTITUTION_ID}
+            client = SchoolClient(server.base_url, 'admin', 'admin123')
+            client.ensure_token()
+            report = StudentImporter(client, ImportJournal(self.journal), workers=1).run(students)
+            self.assertEqual((report['created'], report['already_existed'], report['failed']), (1, 0, 2))
+            self.assertEqual({f['id']: f['error'] for f in report['failures']},
+                             {'S001': 'Student ID already exists', 'S002': 'Username already exists'})
+
+            # A rerun has sent these rows before, so it looks them up instead of trusting the ID
+            report = StudentImporter(client, ImportJournal(self.journal), workers=1).run(students)
+            self.assertEqual((report['already_existed'], report['failed']), (0, 2))
+
+    def test_rerun_lists_the_roster_once(self):
+        students = self.students(6)
+        with StubAPIServer(faults=FaultProfile(error_rate=1.0)) as server:
+            client = SchoolClient(server.base_url, 'admin', 'admin123', max_retries=0)
+            report = StudentImporter(client, ImportJournal(self.journal), max_attempts=1).run(students)
+            self.assertEqual(report['failed'], 6)
+
+            # Every row was sent before, so each is looked up; one listing answers them all
+            server.faults = FaultProfile()
+            client = ListCountingClient(server.base_url)
+            report = StudentImporter(client, ImportJournal(self.journal), workers=3).run(students)
+            self.assertEqual((report['created'], report['failed']), (6, 0))
+            self.assertEqual(client.list_calls, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()